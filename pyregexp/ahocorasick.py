@@ -0,0 +1,229 @@
+"""Module containing the Aho-Corasick automaton classes.
+
+The AhoCorasick class finds the occurrences of many literals in a single
+scan of a test string. The AlternationMatcher class uses it to match the
+regexes that are, as a whole, alternations of literals, e.g. "GET|POST|PUT".
+The alternations of literals nested in a larger regex, e.g. "x(GET|POST)y",
+are left to the other matchers.
+
+Example:
+    Searching an alternation of literals in some test string::
+
+        automaton = AhoCorasick(["GET", "POST", "PUT"])
+        starts = automaton.starts("x PUT GET")  # 1 at the indexes 2 and 6
+"""
+
+
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+from .match import Match
+from .re_ast import RE, OrNode
+
+
+class AhoCorasick:
+    """ Aho-Corasick automaton of a list of literals.
+
+    The failure links are resolved when the automaton is built, so consuming
+    a character costs a single dictionary lookup.
+
+    Args:
+        literals (List[str]): the non empty literals to search
+    """
+
+    def __init__(self, literals: List[str]) -> None:
+        self.literals: List[str] = literals
+        # the trie of the literals
+        goto: List[Dict[str, int]] = [{}]
+        # whether a literal ends at a trie state
+        terminal: List[bool] = [False]
+        for literal in literals:
+            state = 0
+            for ch in literal:
+                next_ = goto[state].get(ch)
+                if next_ is None:
+                    next_ = len(goto)
+                    goto[state][ch] = next_
+                    goto.append({})
+                    terminal.append(False)
+                state = next_
+            terminal[state] = True
+        self.goto: List[Dict[str, int]] = goto
+        self.terminal: List[bool] = terminal
+
+        depth = [0] * len(goto)
+        fail = [0] * len(goto)
+        # the lengths of the literals ending at each state, longest first
+        outputs: List[Tuple[int, ...]] = [()] * len(goto)
+        # the complete transitions, following the failure links when the trie
+        # has no transition
+        delta: List[Dict[str, int]] = [{} for _ in range(len(goto))]
+        queue = deque([0])
+        while queue:
+            state = queue.popleft()
+            # the states are visited breadth first, so the failure state of
+            # state is already complete
+            fail_state = fail[state]
+            delta[state] = dict(delta[fail_state])
+            for ch, next_ in goto[state].items():
+                delta[state][ch] = next_
+                depth[next_] = depth[state] + 1
+                fail[next_] = delta[fail_state].get(ch, 0) if state != 0 else 0
+                queue.append(next_)
+            own = (depth[state],) if terminal[state] else ()
+            outputs[state] = own + outputs[fail_state]
+        self.delta: List[Dict[str, int]] = delta
+        self.outputs: List[Tuple[int, ...]] = outputs
+        self.max_len: int = max((len(literal) for literal in literals), default=0)
+
+    def starts(self, string: str) -> bytearray:
+        """ Returns the indexes at which a literal occurs.
+
+        Args:
+            string (str): the test string
+
+        Returns:
+            bytearray: at index i holds 1 if a literal starts at index i of
+            the test string, 0 otherwise
+        """
+        delta, outputs = self.delta, self.outputs
+        starts = bytearray(len(string) + 1)
+        state = 0
+        for str_i, ch in enumerate(string):
+            state = delta[state].get(ch, 0)
+            for length in outputs[state]:
+                starts[str_i + 1 - length] = 1
+        return starts
+
+    def first_end(self, string: str, start_idx: int = 0) -> int:
+        """ Returns the end index of the first literal occurring in the test
+        string from start_idx on, -1 if there is none.
+        """
+        delta, outputs = self.delta, self.outputs
+        state = 0
+        for str_i in range(start_idx, len(string)):
+            state = delta[state].get(string[str_i], 0)
+            if outputs[state]:
+                return str_i + 1
+        return -1
+
+    def first_start(self, string: str, start_idx: int = 0) -> int:
+        """ Returns the start index of the leftmost literal occurring in the
+        test string from start_idx on, -1 if there is none.
+
+        The scan stops as soon as no literal starting before the leftmost one
+        found so far can still end, so the string is scanned only up to the
+        first occurrence, plus the length of the longest literal.
+        """
+        delta, outputs, max_len = self.delta, self.outputs, self.max_len
+        first = -1
+        state = 0
+        for str_i in range(start_idx, len(string)):
+            if first != -1 and str_i >= first + max_len - 1:
+                break
+            state = delta[state].get(string[str_i], 0)
+            if outputs[state]:
+                # the longest literal ending here starts first
+                start = str_i + 1 - outputs[state][0]
+                if first == -1 or start < first:
+                    first = start
+        return first
+
+    def longest_at(self, string: str, start_idx: int) -> int:
+        """ Returns the end index of the longest literal occurring at
+        start_idx, -1 if there is none.
+        """
+        goto, terminal = self.goto, self.terminal
+        end_idx = -1
+        state = 0
+        for str_i in range(start_idx, len(string)):
+            state = goto[state].get(string[str_i])
+            if state is None:
+                break
+            if terminal[state]:
+                end_idx = str_i + 1
+        return end_idx
+
+
+class AlternationMatcher:
+    """ Matcher of the regexes that are, as a whole, alternations of literals.
+
+    Finds the same leftmost-longest match of the PikeVM, and returns the
+    match of the alternation group as the PikeVM does.
+
+    Args:
+        automaton (AhoCorasick): the automaton of the alternatives
+        group_id (int): the group id of the alternation
+        group_name (str): the group name of the alternation
+        capturing (bool): whether the alternation group is capturing
+    """
+
+    def __init__(self, automaton: AhoCorasick, group_id: int, group_name: str, capturing: bool) -> None:
+        self.automaton: AhoCorasick = automaton
+        self.group_id: int = group_id
+        self.group_name: str = group_name
+        self.capturing: bool = capturing
+
+    @classmethod
+    def from_ast(cls, ast: RE, automaton: AhoCorasick) -> 'AlternationMatcher':
+        """ Builds the AlternationMatcher of a regex.
+
+        Args:
+            ast (RE): the regex AST, an alternation of literals
+            automaton (AhoCorasick): the automaton of the alternatives, see
+                analysis.literal_alternatives
+
+        Returns:
+            AlternationMatcher: the matcher
+        """
+        node = ast.child
+        # the alternatives share the group of the alternation
+        while isinstance(node, OrNode):
+            node = node.left
+        return cls(automaton, node.group_id, node.group_name, node.is_capturing())
+
+    def is_match(self, string: str, start_idx: int = 0) -> bool:
+        """ Returns whether a literal occurs in the test string from
+        start_idx on.
+        """
+        return self.automaton.first_end(string, start_idx) != -1
+
+    def match_starts(self, string: str) -> bytearray:
+        """ Returns the indexes at which a match starts, see
+        AhoCorasick.starts.
+        """
+        return self.automaton.starts(string)
+
+    def longest_match_end(self, string: str, start_idx: int) -> int:
+        """ Returns the end index of the longest match starting at start_idx,
+        -1 if there is no match.
+        """
+        return self.automaton.longest_at(string, start_idx)
+
+    def search(self, string: str, start_idx: int = 0, anchored: bool = False) -> Tuple[bool, int, Deque[Match]]:
+        """ Searches the leftmost-longest match in the test string.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+            anchored (bool): if True the match must start at start_idx
+                (default is False)
+
+        Returns:
+            A tuple containing whether a match was found or not, the end index
+            of the match, and the deque containing the match of the
+            alternation group.
+        """
+        # the string is scanned only up to the leftmost match, so that the
+        # successive searches of finditer scan it once overall
+        match_start = start_idx if anchored else self.automaton.first_start(
+            string, start_idx)
+        end_idx = self.longest_match_end(
+            string, match_start) if match_start != -1 else -1
+        if end_idx == -1:
+            return False, start_idx, deque()
+        matches: Deque[Match] = deque()
+        if self.capturing:
+            matches.append(
+                Match(self.group_id, match_start, end_idx, string, self.group_name))
+        return True, end_idx, matches
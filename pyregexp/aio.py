@@ -0,0 +1,113 @@
+"""Module containing the asyncio matching functions.
+
+A long match blocks the event loop running it, so these functions either run
+the match in an executor (amatch), or split the test string in windows fed to
+a StreamMatcher, giving control back to the event loop after each window
+(afinditer and afinditer_stream), so that the latency of the other coroutines
+stays bounded by the time spent on a window.
+
+Example:
+    Searching a regex from a coroutine::
+
+        matches = await amatch(r"error: [0-9]+", line)
+        async for matches in afinditer_stream(compile(rb"error: [0-9]+"), reader):
+            print(matches[0].start_idx, matches[0].match)
+"""
+
+
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterator, Deque, Union
+from .batch import METHODS, as_pattern
+from .match import Match
+from .pattern import Pattern
+from .stream import StreamMatcher
+
+
+# number of characters (or bytes) scanned before giving control back to the
+# event loop
+DEFAULT_WINDOW_SIZE = 1 << 14
+
+
+async def amatch(pattern: Union[Pattern, str, bytes], string: Union[str, bytes], method: str = 'search', executor: Executor = None, ignore_case: int = 0) -> Union[Deque[Match], bool, None]:
+    """ Matches a pattern in an executor, without blocking the event loop.
+
+    Args:
+        pattern (Union[Pattern, str, bytes]): the compiled pattern, or the
+            regular expression
+        string (Union[str, bytes]): the test string
+        method (str): the Pattern method called, one of 'match', 'search',
+            'fullmatch' and 'is_match' (default is 'search')
+        executor (Executor): the executor running the match, if None the
+            default executor of the event loop is used (default is None)
+        ignore_case (int): the ignore_case flag the regular expression is
+            compiled with, unused when pattern is a Pattern (default is 0)
+
+    Returns:
+        Union[Deque[Match], bool, None]: the result of the method
+    """
+    if method not in METHODS:
+        raise Exception(f"Unknown method '{method}'.")
+    matcher = getattr(as_pattern(pattern, ignore_case), method)
+    return await asyncio.get_running_loop().run_in_executor(executor, matcher, string)
+
+
+async def afinditer(pattern: Union[Pattern, str, bytes], string: Union[str, bytes], window_size: int = DEFAULT_WINDOW_SIZE, ignore_case: int = 0) -> AsyncIterator[Deque[Match]]:
+    """ Iterates over the matches in a test string, giving control back to
+    the event loop every window_size characters.
+
+    The matches are the ones Pattern.finditer returns. Each window is
+    scanned once, also when a match spans many windows, so the time between
+    two suspensions does not grow with the length of the matches.
+
+    Args:
+        pattern (Union[Pattern, str, bytes]): the compiled pattern, or the
+            regular expression
+        string (Union[str, bytes]): the test string
+        window_size (int): the number of characters scanned between two
+            suspensions (default is DEFAULT_WINDOW_SIZE)
+        ignore_case (int): the ignore_case flag the regular expression is
+            compiled with, unused when pattern is a Pattern (default is 0)
+
+    Yields:
+        Deque[Match]: the matches of a substring, the whole match in the
+        first position, and in the subsequent positions the groups matched
+    """
+    matcher = StreamMatcher(as_pattern(pattern, ignore_case))
+    for window_start in range(0, len(string), window_size):
+        for matches in matcher.feed(string[window_start:window_start + window_size]):
+            yield matches
+        await asyncio.sleep(0)
+    for matches in matcher.close():
+        yield matches
+
+
+async def afinditer_stream(pattern: Union[Pattern, str, bytes], reader: asyncio.StreamReader, window_size: int = DEFAULT_WINDOW_SIZE, ignore_case: int = 0, encoding: str = "utf-8") -> AsyncIterator[Deque[Match]]:
+    """ Iterates over the matches in the data read from a StreamReader.
+
+    Args:
+        pattern (Union[Pattern, str, bytes]): the compiled pattern, or the
+            regular expression; the data read is decoded with encoding unless
+            the pattern is a bytes one
+        reader (asyncio.StreamReader): the reader, read until its end
+        window_size (int): the maximum number of bytes read, and scanned,
+            between two suspensions (default is DEFAULT_WINDOW_SIZE)
+        ignore_case (int): the ignore_case flag the regular expression is
+            compiled with, unused when pattern is a Pattern (default is 0)
+        encoding (str): the encoding of the data (default is "utf-8")
+
+    Yields:
+        Deque[Match]: the matches of a substring, whose indexes are offsets
+        in the whole data read
+    """
+    matcher = StreamMatcher(as_pattern(pattern, ignore_case), encoding)
+    while True:
+        chunk = await reader.read(window_size)
+        if not chunk:
+            break
+        for matches in matcher.feed(chunk):
+            yield matches
+        # read does not suspend when the data is already buffered
+        await asyncio.sleep(0)
+    for matches in matcher.close():
+        yield matches
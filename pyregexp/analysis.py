@@ -0,0 +1,570 @@
+"""Module containing the static analyses of a regex AST.
+
+The analyses compute properties that every match of the regex has, so that
+the engines can avoid attempting a match where it cannot succeed.
+
+Example:
+    Finding where a match of a regex can start::
+
+        scanner = PrefixScanner.from_ast(Pyrser().parse(r"error: ([0-9]+)"))
+        find = scanner.finder("... error: 42")
+        str_i = find(0)  # 4
+"""
+
+
+from typing import Callable, FrozenSet, List, Set, Tuple, Union
+from .ahocorasick import AhoCorasick
+from .charclass import CharClass
+from .re_ast import RE, ASTNode, GroupNode, OrNode, Element, WildcardElement, SpaceElement, RangeElement, StartElement, EndElement
+
+
+# when a regex can start with at most this many characters, the candidate
+# start indexes are searched with str.find, otherwise with a set lookup
+MAX_FIND_CHARS = 4
+
+# maximum number of literals checked by a RequiredLiterals prefilter, the
+# longest ones are kept
+MAX_REQUIRED_LITERALS = 3
+
+
+def encode_literal(literal: str) -> bytes:
+    """ Encodes a literal of a byte-level regex, whose characters are the
+    bytes decoded as latin-1.
+    """
+    return literal.encode('latin-1')
+
+
+def searchable(string: Union[str, bytes]) -> bool:
+    """ Returns whether literals can be searched in the test string with find
+    and in, which memoryviews do not support.
+    """
+    return isinstance(string, (str, bytes, bytearray))
+
+
+def single_char(node: ASTNode) -> Union[str, None]:
+    """ Returns the only character a leaf node matches, if any."""
+    if type(node) is Element:
+        return node.match
+    if isinstance(node, RangeElement) and node.is_positive_logic and len(node.match) == 1:
+        return chr(node.match.intervals[0][0])
+    return None
+
+
+def alternatives(node: OrNode) -> List[ASTNode]:
+    """ Returns the alternatives of an alternation, e.g. the 3 ones of
+    a|b|c, which is parsed as a|(b|c).
+    """
+    result = []
+    while isinstance(node, OrNode):
+        result.append(node.left)
+        right = node.right
+        if not isinstance(right, OrNode) or right.min != 1 or right.max != 1:
+            result.append(right)
+            break
+        node = right
+    return result
+
+
+def literal_prefix(ast: ASTNode) -> str:
+    """ Computes the literal every match of the regex starts with.
+
+    Args:
+        ast (ASTNode): the regex AST, or one of its nodes
+
+    Returns:
+        str: the literal prefix, the empty string if there is none
+    """
+
+    def prefix(node: ASTNode) -> Tuple[str, bool]:
+        """ Returns the prefix of node, and whether node matches only it."""
+        if isinstance(node, RE):
+            return prefix(node.child)
+        min_, max_ = node.min, node.max
+        if min_ == 0:
+            return '', False
+
+        if isinstance(node, (StartElement, EndElement)):
+            # they do not consume any character
+            return '', True
+
+        ch = single_char(node)
+        if ch is not None:
+            return ch * min_, min_ == max_
+
+        if isinstance(node, GroupNode):
+            once, complete = '', True
+            for child in node.children:
+                child_prefix, child_complete = prefix(child)
+                once += child_prefix
+                if not child_complete:
+                    complete = False
+                    break
+        elif isinstance(node, OrNode):
+            left, left_complete = prefix(node.left)
+            right, right_complete = prefix(node.right)
+            i = 0
+            while i < min(len(left), len(right)) and left[i] == right[i]:
+                i += 1
+            once = left[:i]
+            complete = left_complete and right_complete and left == right
+        else:
+            return '', False
+
+        if complete:
+            return once * min_, min_ == max_
+        return once, False
+
+    return prefix(ast)[0]
+
+
+def first_chars(ast: ASTNode) -> Union[FrozenSet[str], CharClass, None]:
+    """ Computes the characters a match of the regex can start with.
+
+    Args:
+        ast (ASTNode): the regex AST, or one of its nodes
+
+    Returns:
+        Union[FrozenSet[str], CharClass, None]: the set of characters, a
+        CharClass if they are more than MAX_SET_SIZE, None if a match can
+        start with any character or can be empty
+    """
+
+    def first(node: ASTNode) -> Tuple[Union[CharClass, None], bool]:
+        """ Returns the first characters of node, and whether it can be empty.
+
+        A None set means any character.
+        """
+        if isinstance(node, RE):
+            return first(node.child)
+        if isinstance(node, (StartElement, EndElement)):
+            return CharClass(), True
+
+        nullable = node.min == 0
+        if isinstance(node, RangeElement):
+            chars = node.match if node.is_positive_logic else None
+            return chars, nullable
+        if isinstance(node, (WildcardElement, SpaceElement)):
+            return None, nullable
+        if isinstance(node, Element):
+            return CharClass.from_chars(node.match), nullable
+
+        if isinstance(node, GroupNode):
+            chars = CharClass()
+            children_nullable = True
+            for child in node.children:
+                child_chars, child_nullable = first(child)
+                if child_chars is None:
+                    return None, True
+                chars |= child_chars
+                if not child_nullable:
+                    children_nullable = False
+                    break
+            return chars, nullable or children_nullable
+        if isinstance(node, OrNode):
+            left, left_nullable = first(node.left)
+            right, right_nullable = first(node.right)
+            if left is None or right is None:
+                return None, True
+            return left | right, nullable or left_nullable or right_nullable
+        return None, True
+
+    chars, nullable = first(ast)
+    if nullable:
+        return None
+    return chars.chars if chars.chars is not None else chars
+
+
+def literal_alternatives(ast: RE) -> Union[List[str], None]:
+    """ Returns the alternatives of a regex that is an alternation of literals.
+
+    E.g. GET|POST|PUT, whose alternatives are 'GET', 'POST' and 'PUT'.
+
+    Args:
+        ast (RE): the regex AST
+
+    Returns:
+        Union[List[str], None]: the alternatives in the regex order, None if
+        the regex is not an alternation of non empty literals
+    """
+    node = ast.child
+    if not isinstance(node, OrNode):
+        return None
+    branches = []
+    while isinstance(node, OrNode):
+        if node.min != 1 or node.max != 1:
+            return None
+        branches.append(node.left)
+        node = node.right
+    branches.append(node)
+
+    literals = []
+    for branch in branches:
+        if not isinstance(branch, GroupNode) or branch.min != 1 or branch.max != 1:
+            return None
+        literal = ''
+        for child in branch.children:
+            ch = single_char(child)
+            if ch is None or child.min != child.max:
+                return None
+            literal += ch * child.min
+        if not literal:
+            return None
+        literals.append(literal)
+    return literals
+
+
+def match_length_bounds(ast: ASTNode) -> Tuple[int, Union[int, float]]:
+    """ Computes the minimum and maximum length of a match of the regex.
+
+    Args:
+        ast (ASTNode): the regex AST, or one of its nodes
+
+    Returns:
+        Tuple[int, Union[int, float]]: the minimum and the maximum length,
+        the latter is math.inf if the match length is not bounded
+    """
+    if isinstance(ast, RE):
+        return match_length_bounds(ast.child)
+    if isinstance(ast, (StartElement, EndElement)):
+        # they do not consume any character
+        return 0, 0
+
+    if isinstance(ast, GroupNode):
+        once_min, once_max = 0, 0
+        for child in ast.children:
+            child_min, child_max = match_length_bounds(child)
+            once_min += child_min
+            once_max += child_max
+    elif isinstance(ast, OrNode):
+        left_min, left_max = match_length_bounds(ast.left)
+        right_min, right_max = match_length_bounds(ast.right)
+        once_min, once_max = min(left_min, right_min), max(left_max, right_max)
+    else:
+        once_min, once_max = 1, 1
+
+    # 0 * math.inf would be nan
+    max_len = once_max * ast.max if once_max != 0 and ast.max != 0 else 0
+    return once_min * ast.min, max_len
+
+
+def anchored_start(ast: ASTNode) -> bool:
+    """ Returns whether every match of the regex starts with ^.
+
+    Such a regex can only match at the start of the test string.
+
+    Args:
+        ast (ASTNode): the regex AST, or one of its nodes
+
+    Returns:
+        bool: True if the regex is anchored at the start of the test string
+    """
+    if isinstance(ast, RE):
+        return anchored_start(ast.child)
+    if isinstance(ast, StartElement):
+        return True
+    if ast.min == 0:
+        return False
+    if isinstance(ast, GroupNode):
+        return len(ast.children) > 0 and anchored_start(ast.children[0])
+    if isinstance(ast, OrNode):
+        return anchored_start(ast.left) and anchored_start(ast.right)
+    return False
+
+
+def capture_free_nodes(ast: ASTNode) -> Set[int]:
+    """ Collects the groups and alternations holding no capturing group.
+
+    Args:
+        ast (ASTNode): the regex AST, or one of its nodes
+
+    Returns:
+        Set[int]: the ids of the GroupNode, OrNode and RE nodes that are not
+        capturing and have no capturing descendant
+    """
+    result: Set[int] = set()
+
+    def visit(node: ASTNode) -> bool:
+        if isinstance(node, RE):
+            free = visit(node.child) and not node.is_capturing()
+        elif isinstance(node, GroupNode):
+            free = not node.is_capturing()
+            for child in node.children:
+                # every child is visited, to collect the nested nodes too
+                free = visit(child) and free
+        elif isinstance(node, OrNode):
+            free = visit(node.left) & visit(node.right)
+        else:
+            return True
+        if free:
+            result.add(id(node))
+        return free
+
+    visit(ast)
+    return result
+
+
+def required_literals(ast: ASTNode) -> List[str]:
+    """ Computes literals that every match of the regex contains.
+
+    Literals contained in another returned literal are omitted.
+
+    Args:
+        ast (ASTNode): the regex AST, or one of its nodes
+
+    Returns:
+        List[str]: the literals, from the longest to the shortest
+    """
+
+    def literals(node: ASTNode) -> Tuple[Union[str, None], str, str, Set[str]]:
+        """ Returns what is known about the matches of node.
+
+        That is the literal node matches if it only matches one, the literal
+        every match starts with, the one every match ends with, and the set
+        of literals every match contains.
+        """
+        if isinstance(node, RE):
+            return literals(node.child)
+        min_, max_ = node.min, node.max
+        if min_ == 0:
+            return None, '', '', set()
+
+        if isinstance(node, (StartElement, EndElement)):
+            return '', '', '', set()
+
+        ch = single_char(node)
+        if ch is not None:
+            if min_ == max_:
+                return ch * min_, ch * min_, ch * min_, {ch * min_}
+            return None, ch * min_, ch * min_, {ch * min_}
+
+        if isinstance(node, GroupNode):
+            # run is the literal being built from adjacent children
+            exact, prefix, run, required = True, '', '', set()
+            for child in node.children:
+                child_exact, child_prefix, child_suffix, child_required = literals(
+                    child)
+                if child_exact is not None:
+                    run += child_exact
+                    continue
+                run += child_prefix
+                required.add(run)
+                required |= child_required
+                if exact:
+                    exact, prefix = False, run
+                run = child_suffix
+            required.add(run)
+            if exact:
+                once, prefix, suffix = run, run, run
+            else:
+                once, suffix = None, run
+        elif isinstance(node, OrNode):
+            left_exact, left_prefix, left_suffix, left_required = literals(
+                node.left)
+            right_exact, right_prefix, right_suffix, right_required = literals(
+                node.right)
+            if left_exact is not None and left_exact == right_exact:
+                once, prefix, suffix, required = left_exact, left_exact, left_exact, {
+                    left_exact}
+            else:
+                left_prefix = left_exact if left_exact is not None else left_prefix
+                right_prefix = right_exact if right_exact is not None else right_prefix
+                left_suffix = left_exact if left_exact is not None else left_suffix
+                right_suffix = right_exact if right_exact is not None else right_suffix
+                i = 0
+                while i < min(len(left_prefix), len(right_prefix)) and left_prefix[i] == right_prefix[i]:
+                    i += 1
+                j = 0
+                while j < min(len(left_suffix), len(right_suffix)) and left_suffix[-1-j] == right_suffix[-1-j]:
+                    j += 1
+                once, prefix = None, left_prefix[:i]
+                suffix = left_suffix[len(left_suffix)-j:]
+                required = (left_required & right_required) | {prefix, suffix}
+        else:
+            return None, '', '', set()
+
+        if once is not None:
+            if min_ == max_:
+                return once * min_, once * min_, once * min_, {once * min_}
+            return None, once * min_, once * min_, {once * min_}
+        return None, prefix, suffix, required
+
+    exact, prefix, suffix, required = literals(ast)
+    required |= {prefix, suffix}
+    if exact is not None:
+        required.add(exact)
+    result = []
+    for literal in sorted(required, key=len, reverse=True):
+        if literal and not any(literal in longer for longer in result):
+            result.append(literal)
+    return result
+
+
+class RequiredLiterals:
+    """ Prefilter rejecting the test strings lacking a required literal.
+
+    Args:
+        literals (List[Union[str, bytes]]): literals every match contains
+    """
+
+    def __init__(self, literals: List[Union[str, bytes]]) -> None:
+        self.literals: List[Union[str, bytes]] = literals
+
+    @classmethod
+    def from_ast(cls, ast: RE, prefix_scanner: Union['PrefixScanner', None] = None, byte_level: bool = False) -> Union['RequiredLiterals', None]:
+        """ Builds the RequiredLiterals prefilter of a regex.
+
+        Args:
+            ast (RE): the regex AST
+            prefix_scanner (Union[PrefixScanner, None]): the PrefixScanner
+                of the regex, whose prefix needs not to be checked again
+                (default is None)
+            byte_level (bool): if True the literals are encoded to bytes,
+                see Compiler.compile (default is False)
+
+        Returns:
+            Union[RequiredLiterals, None]: the prefilter, None if there is no
+            literal to check
+        """
+        literals = required_literals(ast)
+        if byte_level:
+            literals = [encode_literal(literal) for literal in literals]
+        if prefix_scanner is not None and prefix_scanner.prefix:
+            literals = [
+                literal for literal in literals if literal not in prefix_scanner.prefix]
+        if not literals:
+            return None
+        return cls(literals[:MAX_REQUIRED_LITERALS])
+
+    def check(self, string: Union[str, bytes]) -> bool:
+        """ Returns False if the string cannot contain a match."""
+        if not searchable(string):
+            return True
+        for literal in self.literals:
+            if literal not in string:
+                return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"RequiredLiterals({self.literals!r})"
+
+
+class PrefixScanner:
+    """ Finds the indexes where a match of a regex can start.
+
+    The literals and characters are bytes and ints when the scanner searches
+    bytes-like test strings.
+
+    Args:
+        prefix (Union[str, bytes]): the literal every match starts with
+        chars (Union[FrozenSet[str], FrozenSet[int], CharClass, None]): the
+            characters every match starts with, used when there is no prefix
+        alternatives (List[Union[str, bytes]]): if not None, the literals of
+            a regex that is an alternation of literals, whose occurrences are
+            found by an Aho-Corasick automaton instead (default is None)
+    """
+
+    def __init__(self, prefix: Union[str, bytes], chars: Union[FrozenSet[str], FrozenSet[int], CharClass, None], alternatives: List[Union[str, bytes]] = None) -> None:
+        self.prefix: Union[str, bytes] = prefix if alternatives is None else prefix[:0]
+        self.chars: Union[FrozenSet[str], FrozenSet[int], CharClass, None] = chars if not self.prefix and alternatives is None else None
+        self.automaton: Union[AhoCorasick, None] = AhoCorasick(
+            alternatives) if alternatives is not None else None
+
+    @classmethod
+    def from_ast(cls, ast: RE, byte_level: bool = False) -> Union['PrefixScanner', None]:
+        """ Builds the PrefixScanner of a regex.
+
+        Args:
+            ast (RE): the regex AST
+            byte_level (bool): if True the scanner searches bytes-like test
+                strings, see Compiler.compile (default is False)
+
+        Returns:
+            Union[PrefixScanner, None]: the scanner, None if a match can start
+            at any index
+        """
+        alternatives = literal_alternatives(ast)
+        if alternatives is not None:
+            if byte_level:
+                return cls(b'', None, [encode_literal(alternative) for alternative in alternatives])
+            return cls('', None, alternatives)
+        prefix = literal_prefix(ast)
+        chars = first_chars(ast) if not prefix else None
+        if not prefix and chars is None:
+            return None
+        if byte_level:
+            prefix = encode_literal(prefix)
+            if chars is not None:
+                chars = frozenset(code for code in range(0x100) if chr(code) in chars)
+        return cls(prefix, chars)
+
+    def finder(self, string: str) -> Callable[[int], int]:
+        """ Returns the function finding the candidate indexes in a string.
+
+        The returned function takes an index and returns the first index,
+        from the passed one on, where a match can start, or -1 if no match
+        can start from there. It must be called with non decreasing indexes.
+
+        Args:
+            string (Union[str, bytes]): the test string
+
+        Returns:
+            Callable[[int], int]: the find function
+        """
+        if self.automaton is not None:
+            # each search scans only up to the next occurrence of an
+            # alternative, as the engine calls the finder once per match
+            automaton = self.automaton
+
+            def find_alternative(start_idx: int) -> int:
+                return automaton.first_start(string, start_idx)
+            return find_alternative
+
+        if self.prefix and searchable(string):
+            prefix = self.prefix
+
+            def find_prefix(start_idx: int) -> int:
+                return string.find(prefix, start_idx)
+            return find_prefix
+
+        # a memoryview is searched for the first byte of the prefix only
+        chars = self.chars if not self.prefix else frozenset(self.prefix[:1])
+        if len(chars) > MAX_FIND_CHARS or not searchable(string):
+            str_len = len(string)
+
+            def find_in_set(start_idx: int) -> int:
+                for str_i in range(start_idx, str_len):
+                    if string[str_i] in chars:
+                        return str_i
+                return -1
+            return find_in_set
+
+        # the next occurrence of each char, so that it is searched again only
+        # once the search goes past it
+        next_idx = {ch: -2 for ch in chars}
+
+        def find_chars(start_idx: int) -> int:
+            result = -1
+            for ch, idx in next_idx.items():
+                if idx != -1 and idx < start_idx:
+                    idx = string.find(ch, start_idx)
+                    next_idx[ch] = idx
+                if idx != -1 and (result == -1 or idx < result):
+                    result = idx
+            return result
+        return find_chars
+
+    def __repr__(self) -> str:
+        if self.automaton is not None:
+            return f"PrefixScanner(alternatives={self.automaton.literals!r})"
+        if self.prefix:
+            return f"PrefixScanner(prefix={self.prefix!r})"
+        return f"PrefixScanner(chars={self.chars_repr()})"
+
+    def chars_repr(self) -> str:
+        """ Returns the representation of the sorted first chars."""
+        if isinstance(self.chars, CharClass):
+            return repr(str(self.chars))
+        chars = sorted(self.chars)
+        if chars and isinstance(chars[0], int):
+            return repr(bytes(chars))
+        return repr(''.join(chars))
@@ -0,0 +1,130 @@
+"""Module containing the batch matching functions.
+
+The match_many function matches a single compiled Pattern against many test
+strings, fanning the strings out, in chunks, to a concurrent.futures
+executor. Patterns are safe to share among threads, and are pickled as
+compiled (without being parsed again) when sent to a process pool.
+
+Example:
+    Searching a regex in many lines with a process pool::
+
+        with ProcessPoolExecutor() as executor:
+            results = match_many(r"error: [0-9]+", lines, executor=executor)
+"""
+
+
+import os
+from concurrent.futures import Executor
+from typing import Deque, Iterable, List, Union
+from .cache import get_pattern
+from .match import Match
+from .pattern import Pattern
+
+
+# the methods of Pattern match_many can call
+METHODS = ('match', 'search', 'fullmatch', 'is_match')
+
+# number of chunks submitted per worker of the executor when the chunk size
+# is not set, so that the workers finishing first get more chunks
+CHUNKS_PER_WORKER = 4
+
+
+def as_pattern(pattern: Union[Pattern, str, bytes], ignore_case: int) -> Pattern:
+    """ Returns the compiled pattern, compiling a regex through the shared
+    cache.
+    """
+    if isinstance(pattern, Pattern):
+        return pattern
+    return get_pattern(pattern, ignore_case)
+
+
+def match_chunk(pattern: Pattern, method: str, strings: List[Union[str, bytes]]) -> List[Union[Deque[Match], bool, None]]:
+    """ Matches a pattern against a chunk of test strings.
+
+    Args:
+        pattern (Pattern): the compiled pattern
+        method (str): the name of the Pattern method to call, one of METHODS
+        strings (List[Union[str, bytes]]): the test strings
+
+    Returns:
+        List[Union[Deque[Match], bool, None]]: the result of the method for
+        each test string
+    """
+    matcher = getattr(pattern, method)
+    return [matcher(string) for string in strings]
+
+
+def chunk_size_for(n_strings: int, workers: int = None) -> int:
+    """ Returns the chunk size giving CHUNKS_PER_WORKER chunks to each
+    worker.
+
+    Args:
+        n_strings (int): the number of test strings
+        workers (int): the number of workers of the executor, if None the
+            number of CPUs (default is None)
+
+    Returns:
+        int: the number of test strings matched by a single task
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(-(-n_strings // (workers * CHUNKS_PER_WORKER)), 1)
+
+
+def match_many(pattern: Union[Pattern, str, bytes], strings: Iterable[Union[str, bytes]], method: str = 'search', executor: Executor = None, chunk_size: int = None, workers: int = None, ignore_case: int = 0) -> List[Union[Deque[Match], bool, None]]:
+    """ Matches a pattern against many test strings.
+
+    The pattern is compiled once, and the test strings are split in chunks
+    of chunk_size strings, each matched by a task of the executor, so that
+    the per task overhead does not dominate when the strings are short.
+
+    Args:
+        pattern (Union[Pattern, str, bytes]): the compiled pattern, or the
+            regular expression, compiled through the shared cache
+        strings (Iterable[Union[str, bytes]]): the test strings
+        method (str): the Pattern method called on each test string, one of
+            'match', 'search', 'fullmatch' and 'is_match'
+            (default is 'search')
+        executor (Executor): the thread or process pool running the tasks,
+            if None the strings are matched in the calling thread
+            (default is None)
+        chunk_size (int): the number of test strings matched by a task, if
+            None the strings are split in CHUNKS_PER_WORKER chunks per worker
+            of the executor (default is None)
+        workers (int): the number of workers of the executor, used to
+            choose the chunk size, if None the number of CPUs
+            (default is None)
+        ignore_case (int): the ignore_case flag the regular expression is
+            compiled with, unused when pattern is a Pattern (default is 0)
+
+    Returns:
+        List[Union[Deque[Match], bool, None]]: the result of the method for
+        each test string, in the order of the test strings
+    """
+    if method not in METHODS:
+        raise Exception(f"Unknown method '{method}'.")
+    if chunk_size is not None and chunk_size < 1:
+        raise Exception("The chunk size must be positive.")
+    if workers is not None and workers < 1:
+        raise Exception("The number of workers must be positive.")
+    pattern = as_pattern(pattern, ignore_case)
+    strings = list(strings)
+    if chunk_size is None:
+        # the calling thread matches all the strings in a single chunk
+        chunk_size = chunk_size_for(len(strings), workers) \
+            if executor is not None else max(len(strings), 1)
+
+    chunks = [strings[i:i + chunk_size]
+              for i in range(0, len(strings), chunk_size)]
+    if executor is None:
+        chunk_results = [match_chunk(pattern, method, chunk)
+                         for chunk in chunks]
+    else:
+        # map returns the results in the order of the chunks
+        chunk_results = executor.map(
+            match_chunk, [pattern] * len(chunks), [method] * len(chunks), chunks)
+
+    results: List[Union[Deque[Match], bool, None]] = []
+    for chunk_result in chunk_results:
+        results.extend(chunk_result)
+    return results
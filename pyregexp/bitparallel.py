@@ -0,0 +1,306 @@
+"""Module containing the bit-parallel matcher classes.
+
+Regexes that are plain sequences of quantified leaves, e.g. "[a-z]+@[a-z]+",
+are simulated by the Shift-And algorithm: the state of the Glushkov
+automaton of the regex is kept in the bits of a single int, so that a
+character is consumed by a handful of int operations, whatever the number
+of threads alive.
+
+Example:
+    Searching a regex in some test string::
+
+        matcher = BitParallelMatcher.from_ast(Pyrser().parse(r"a+bx"))
+        if matcher is not None:
+            result, end_idx, matches = matcher.search("aabx")
+"""
+
+
+import itertools
+import math
+from collections import deque
+from typing import Deque, Dict, List, Tuple, Union
+from .match import Match
+from .program import BYTE_SPACES
+from .re_ast import RE, GroupNode, LeafNode, Element, RangeElement, SpaceElement, StartElement, EndElement
+
+
+# maximum number of positions of a regex simulated by a ShiftAnd, so that
+# the state (one bit per position, plus the initial one) fits in 64 bits
+MAX_POSITIONS = 63
+
+
+class ShiftAnd:
+    """ Shift-And simulation of a sequence of quantified leaves.
+
+    Bit k of a state is set when the first k positions of the sequence are
+    matched, so bit 0 is the initial state and the highest bit is the match.
+    A leaf quantified {m,n} takes n positions, the last n-m of which are
+    optional, and a leaf quantified {m,} takes max(m, 1) positions, the last
+    of which is repeatable (and optional when m is 0).
+
+    Args:
+        leaves (List[LeafNode]): the leaves of the sequence, without the
+            start and end elements
+    """
+
+    def __init__(self, leaves: List[LeafNode]) -> None:
+        self.positions: List[LeafNode] = []
+        repeatable, optional = 0, 0
+        for leaf in leaves:
+            min_, max_ = leaf.min, leaf.max
+            for i in range(max(min_, 1) if max_ == math.inf else max_):
+                self.positions.append(leaf)
+                bit = 1 << len(self.positions)
+                if i >= min_:
+                    optional |= bit
+            if max_ == math.inf:
+                repeatable |= 1 << len(self.positions)
+
+        self.match_bit: int = 1 << len(self.positions)
+        # positions matched again by the character that matched them
+        self.repeatable: int = repeatable
+        self.optional: int = optional
+        # the bit preceding and the last bit of each run of optional bits
+        self.optional_entries: int = 0
+        self.optional_ends: int = 0
+        for k in range(1, len(self.positions) + 1):
+            bit = 1 << k
+            if optional & bit:
+                if not optional & (bit >> 1):
+                    self.optional_entries |= bit >> 1
+                if not optional & (bit << 1):
+                    self.optional_ends |= bit
+        # the masks of the characters met so far, computed on demand: threads
+        # computing the same mask at once store the same value
+        self.masks: Dict[str, int] = {}
+        self.initial: int = self.closure(1)
+
+    def char_mask(self, ch: Union[str, int]) -> int:
+        """ Returns the bits of the positions matching ch, a character or a
+        byte of a bytes-like test string.
+        """
+        mask = self.masks.get(ch)
+        if mask is None:
+            mask = 0
+            for k, leaf in enumerate(self.positions, 1):
+                if isinstance(ch, int):
+                    # a byte matches the leaf matching its latin-1 character,
+                    # \s matches the ASCII whitespaces only
+                    matched = ch in BYTE_SPACES if isinstance(
+                        leaf, SpaceElement) else leaf.is_match(ch=chr(ch))
+                else:
+                    matched = leaf.is_match(ch=ch)
+                if matched:
+                    mask |= 1 << k
+            self.masks[ch] = mask
+        return mask
+
+    def closure(self, state: int) -> int:
+        """ Sets the bits reached skipping optional positions.
+
+        Within each run of optional bits, every bit above the lowest set bit
+        of the run (or of the bit preceding it) is set, by a subtraction
+        whose borrow stops at the lowest set bit.
+        """
+        if not self.optional:
+            return state
+        ended = state | self.optional_ends
+        return state | (self.optional & (~(ended - self.optional_entries) ^ ended))
+
+    def step(self, state: int, ch: str) -> int:
+        """ Returns the state reached consuming ch from state."""
+        return self.closure(((state << 1) | (state & self.repeatable)) & self.char_mask(ch))
+
+
+class BitParallelMatcher:
+    """ Capture-free matcher built on Shift-And simulations.
+
+    Finds the same leftmost-longest match of the PikeVM. The whole match is
+    the only group a supported regex has, so it is returned as the PikeVM
+    does.
+
+    Args:
+        leaves (List[LeafNode]): the leaves of the regex sequence, without the
+            start and end elements
+        anchored_start (bool): whether the regex starts with ^
+        anchored_end (bool): whether the regex ends with $
+        group_id (int): the group id of the whole match
+        group_name (str): the group name of the whole match
+    """
+
+    def __init__(self, leaves: List[LeafNode], anchored_start: bool, anchored_end: bool, group_id: int, group_name: str) -> None:
+        self.forward: ShiftAnd = ShiftAnd(leaves)
+        self.reverse: ShiftAnd = ShiftAnd(list(reversed(leaves)))
+        self.anchored_start: bool = anchored_start
+        self.anchored_end: bool = anchored_end
+        self.group_id: int = group_id
+        self.group_name: str = group_name
+
+    @classmethod
+    def from_ast(cls, ast: RE) -> Union['BitParallelMatcher', None]:
+        """ Builds the BitParallelMatcher of a regex.
+
+        Args:
+            ast (RE): the regex AST
+
+        Returns:
+            Union[BitParallelMatcher, None]: the matcher, None if the regex is
+            not a sequence of at most MAX_POSITIONS positions of leaves
+        """
+        root = ast.child
+        if not isinstance(root, GroupNode):
+            return None
+        leaves = list(root.children)
+        anchored_start = len(leaves) > 0 and isinstance(
+            leaves[0], StartElement)
+        if anchored_start:
+            leaves = leaves[1:]
+        anchored_end = len(leaves) > 0 and isinstance(leaves[-1], EndElement)
+        if anchored_end:
+            leaves = leaves[:-1]
+
+        n_positions = 0
+        for leaf in leaves:
+            if not isinstance(leaf, (Element, RangeElement)):
+                return None
+            min_, max_ = leaf.min, leaf.max
+            n_positions += max(min_, 1) if max_ == math.inf else max_
+        if n_positions > MAX_POSITIONS:
+            return None
+        return cls(leaves, anchored_start, anchored_end, root.group_id, root.group_name)
+
+    def is_match(self, string: str, start_idx: int = 0) -> bool:
+        """ Returns whether the regex matches somewhere in the test string.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+
+        Returns:
+            bool: True if a match starting at or after start_idx exists
+        """
+        if self.anchored_start:
+            return start_idx == 0 and self.longest_match_end(string, 0) != -1
+
+        shift_and = self.forward
+        masks, repeatable, match_bit = shift_and.masks, shift_and.repeatable, shift_and.match_bit
+        optional, entries, ends = shift_and.optional, shift_and.optional_entries, shift_and.optional_ends
+        char_mask, initial = shift_and.char_mask, shift_and.initial
+        if self.anchored_end:
+            # only the state at the end of the test string matters
+            match_bit = 0
+        state = initial
+        for ch in (itertools.islice(string, start_idx, None) if start_idx > 0 else string):
+            if state & match_bit:
+                return True
+            mask = masks.get(ch)
+            if mask is None:
+                mask = char_mask(ch)
+            # ShiftAnd.step inlined, a new match can start at every index
+            state = ((state << 1) | (state & repeatable)) & mask
+            if optional:
+                ended = state | ends
+                state |= optional & (~(ended - entries) ^ ended)
+            state |= initial
+        return state & shift_and.match_bit != 0
+
+    def match_starts(self, string: str) -> bytearray:
+        """ Returns the indexes at which a match starts.
+
+        The test string is scanned once backward by the reversed sequence.
+
+        Args:
+            string (str): the test string
+
+        Returns:
+            bytearray: at index i holds 1 if a match starts at index i of the
+            test string, 0 otherwise
+        """
+        str_len = len(string)
+        starts = bytearray(str_len + 1)
+        if self.anchored_start:
+            if self.is_match(string):
+                starts[0] = 1
+            return starts
+
+        shift_and = self.reverse
+        masks, repeatable, match_bit = shift_and.masks, shift_and.repeatable, shift_and.match_bit
+        optional, entries, ends = shift_and.optional, shift_and.optional_entries, shift_and.optional_ends
+        char_mask, initial = shift_and.char_mask, shift_and.initial
+        # the reversed sequence can only start at the end of the test string
+        restart = 0 if self.anchored_end else initial
+        state = initial
+        for str_i in range(str_len - 1, -1, -1):
+            if state & match_bit:
+                starts[str_i + 1] = 1
+            ch = string[str_i]
+            mask = masks.get(ch)
+            if mask is None:
+                mask = char_mask(ch)
+            # ShiftAnd.step inlined
+            state = ((state << 1) | (state & repeatable)) & mask
+            if optional:
+                ended = state | ends
+                state |= optional & (~(ended - entries) ^ ended)
+            state |= restart
+        if state & match_bit:
+            starts[0] = 1
+        return starts
+
+    def longest_match_end(self, string: str, start_idx: int) -> int:
+        """ Returns the end index of the longest match starting at start_idx.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index where the match must start
+
+        Returns:
+            int: the end index of the longest match, -1 if there is no match
+        """
+        if self.anchored_start and start_idx > 0:
+            return -1
+        shift_and = self.forward
+        match_bit = shift_and.match_bit
+        str_len = len(string)
+        end_idx = -1
+        state = shift_and.initial
+        str_i = start_idx
+        while True:
+            if state & match_bit and (not self.anchored_end or str_i == str_len):
+                end_idx = str_i
+            if str_i == str_len or not state:
+                break
+            state = shift_and.step(state, string[str_i])
+            str_i += 1
+        return end_idx
+
+    def search(self, string: str, start_idx: int = 0, anchored: bool = False, starts: bytearray = None) -> Tuple[bool, int, Deque[Match]]:
+        """ Searches the leftmost-longest match in the test string.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+            anchored (bool): if True the match must start at start_idx
+                (default is False)
+            starts (bytearray): the match starts of the test string, as
+                returned by match_starts, passed by the callers searching the
+                same string many times, if None they are computed
+                (default is None)
+
+        Returns:
+            A tuple containing whether a match was found or not, the end index
+            of the match, and the deque containing the whole match.
+        """
+        if anchored:
+            match_start = start_idx
+        else:
+            if starts is None:
+                starts = self.match_starts(string)
+            match_start = starts.find(1, start_idx)
+        end_idx = self.longest_match_end(
+            string, match_start) if match_start != -1 else -1
+        if end_idx == -1:
+            return False, start_idx, deque()
+        return True, end_idx, deque([Match(self.group_id, match_start, end_idx, string, self.group_name)])
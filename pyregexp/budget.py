@@ -0,0 +1,81 @@
+"""Module containing the StepBudget class.
+
+A StepBudget bounds the work of the backtracking engine on a match, whose
+running time can grow exponentially with the test string length on some
+regexes: the engine counts a step at every attempt to match a group and at
+every backtrack, and the budget raises MatchLimitExceeded once the maximum
+number of steps, or the timeout, is exceeded.
+
+Example:
+    Bounding a match::
+
+        try:
+            reng.match(r"(a|aa)*b", "a" * 40, max_steps=100000, timeout=0.05)
+        except MatchLimitExceeded as e:
+            print(e.steps)
+"""
+
+
+import time
+from typing import Union
+
+
+# number of steps between two checks of the timeout, a power of 2
+TIMEOUT_CHECK_INTERVAL = 256
+
+
+class MatchLimitExceeded(Exception):
+    """ Raised when a match exceeds its maximum number of steps or its
+    timeout.
+
+    Args:
+        steps (int): the number of steps taken when the match was stopped
+        reason (str): the limit exceeded, "max_steps" or "timeout"
+    """
+
+    def __init__(self, steps: int, reason: str) -> None:
+        super().__init__(
+            f"The match exceeded its {reason} after {steps} steps.")
+        self.steps: int = steps
+        self.reason: str = reason
+
+
+class StepBudget:
+    """ Counts the steps of a match and enforces its limits.
+
+    Args:
+        max_steps (int): the maximum number of steps, if None the steps are
+            not limited (default is None)
+        timeout (float): the maximum number of seconds, if None the time is
+            not limited (default is None)
+    """
+
+    def __init__(self, max_steps: int = None, timeout: float = None) -> None:
+        if max_steps is not None and max_steps < 0:
+            raise Exception("The maximum number of steps cannot be negative.")
+        if timeout is not None and timeout < 0:
+            raise Exception("The timeout cannot be negative.")
+        self.max_steps: Union[int, None] = max_steps
+        self.timeout: Union[float, None] = timeout
+        self.steps: int = 0
+        self.deadline: Union[float, None] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """ Restarts the count of the steps and the timeout."""
+        self.steps = 0
+        self.deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+
+    def step(self) -> None:
+        """ Counts a step.
+
+        Raises:
+            MatchLimitExceeded: if the steps exceed max_steps, or the time
+            exceeds the timeout, which is checked every
+            TIMEOUT_CHECK_INTERVAL steps
+        """
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise MatchLimitExceeded(self.steps, "max_steps")
+        if self.deadline is not None and self.steps & (TIMEOUT_CHECK_INTERVAL - 1) == 0 and time.monotonic() > self.deadline:
+            raise MatchLimitExceeded(self.steps, "timeout")
@@ -0,0 +1,150 @@
+"""Module containing the compiled patterns cache.
+
+The PatternCache class is a thread-safe LRU cache of compiled Patterns, keyed
+by the regex and the ignore_case flag. The RegexEngine instances share, by
+default, the module-level cache, so alternating between a few regexes does
+not parse them again at every call.
+
+Example:
+    Tuning the shared cache::
+
+        set_capacity(1024)
+        pattern = get_pattern(r"a+bx")
+        print(cache_info())
+        purge()
+"""
+
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, NamedTuple, Tuple
+from .dfa import DEFAULT_MAX_STATES
+from .pattern import Pattern
+
+
+# default maximum number of Patterns kept by a PatternCache
+DEFAULT_CAPACITY = 256
+
+
+class CacheInfo(NamedTuple):
+    """ Statistics of a PatternCache."""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    capacity: int
+
+
+class PatternCache:
+    """ Thread-safe LRU cache of compiled Patterns.
+
+    Args:
+        capacity (int): the maximum number of Patterns kept, when exceeded the
+            least recently used Pattern is evicted (default is
+            DEFAULT_CAPACITY)
+        dfa_max_states (int): the maximum number of states cached by the lazy
+            DFA of each Pattern (default is DEFAULT_MAX_STATES)
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, dfa_max_states: int = DEFAULT_MAX_STATES) -> None:
+        if capacity < 0:
+            raise Exception("The cache capacity cannot be negative.")
+        self.__capacity__: int = capacity
+        self.dfa_max_states: int = dfa_max_states
+        self.__patterns__: Dict[Tuple[str, int], Pattern] = OrderedDict()
+        self.__lock__: Lock = Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    @property
+    def capacity(self) -> int:
+        """ The maximum number of Patterns kept."""
+        return self.__capacity__
+
+    @capacity.setter
+    def capacity(self, capacity: int) -> None:
+        if capacity < 0:
+            raise Exception("The cache capacity cannot be negative.")
+        with self.__lock__:
+            self.__capacity__ = capacity
+            self.__evict__()
+
+    def __len__(self) -> int:
+        return len(self.__patterns__)
+
+    def __evict__(self) -> None:
+        """ Evicts the least recently used Patterns exceeding the capacity.
+
+        Must be called holding the lock.
+        """
+        while len(self.__patterns__) > self.__capacity__:
+            self.__patterns__.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, re: str, ignore_case: int = 0) -> Pattern:
+        """ Returns the Pattern of a regex, compiling it if not cached.
+
+        Args:
+            re (str): the regular expression
+            ignore_case (int): the ignore_case flag the regex is compiled with
+                (default is 0)
+
+        Returns:
+            Pattern: the compiled regex
+        """
+        key = (re, ignore_case)
+        with self.__lock__:
+            pattern = self.__patterns__.get(key)
+            if pattern is not None:
+                self.__patterns__.move_to_end(key)
+                self.hits += 1
+                return pattern
+            self.misses += 1
+
+        # compiling outside of the lock lets the other threads use the cache
+        pattern = Pattern(re, ignore_case, dfa_max_states=self.dfa_max_states)
+
+        with self.__lock__:
+            # another thread may have compiled the same regex meanwhile
+            cached = self.__patterns__.get(key)
+            if cached is not None:
+                self.__patterns__.move_to_end(key)
+                return cached
+            self.__patterns__[key] = pattern
+            self.__evict__()
+        return pattern
+
+    def purge(self) -> None:
+        """ Removes every Pattern from the cache."""
+        with self.__lock__:
+            self.__patterns__.clear()
+
+    def cache_info(self) -> CacheInfo:
+        """ Returns the statistics of the cache."""
+        with self.__lock__:
+            return CacheInfo(self.hits, self.misses, self.evictions, len(self.__patterns__), self.__capacity__)
+
+
+# the cache shared by default among the RegexEngine instances
+shared_cache: PatternCache = PatternCache()
+
+
+def get_pattern(re: str, ignore_case: int = 0) -> Pattern:
+    """ Returns the Pattern of a regex from the shared cache."""
+    return shared_cache.get(re, ignore_case)
+
+
+def purge() -> None:
+    """ Empties the shared cache."""
+    shared_cache.purge()
+
+
+def set_capacity(capacity: int) -> None:
+    """ Sets the capacity of the shared cache."""
+    shared_cache.capacity = capacity
+
+
+def cache_info() -> CacheInfo:
+    """ Returns the statistics of the shared cache."""
+    return shared_cache.cache_info()
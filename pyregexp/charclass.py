@@ -0,0 +1,146 @@
+"""Module containing the CharClass class.
+
+A CharClass is the set of characters of a character class, e.g. "[a-z0-9_]",
+stored as its sorted and disjoint intervals of code points instead of the
+string of all its characters, so that building it and looking a character
+up in it cost the same for "[ab]" and for "[\\u0000-\\uffff]":
+
+- the ASCII characters are looked up in a table of 128 entries;
+- the other characters are binary searched among the intervals;
+- the classes of at most MAX_SET_SIZE characters also keep the frozenset of
+  their characters, which the matchers look the characters up in instead.
+
+Example:
+    Building a class::
+
+        digits = CharClass([(ord('0'), ord('9'))])
+        assert '7' in digits and len(digits) == 10
+"""
+
+
+import bisect
+from typing import FrozenSet, Iterable, Iterator, List, Tuple, Union
+
+
+# the classes up to this number of characters also keep a frozenset of them
+MAX_SET_SIZE = 256
+# the characters looked up in the ASCII table
+ASCII_SIZE = 128
+# the last Unicode code point
+MAX_CODE_POINT = 0x10ffff
+
+
+class CharClass:
+    """ An immutable set of characters, stored as intervals of code points.
+
+    Args:
+        intervals (Iterable[Tuple[int, int]]): the first and last code points
+            of the ranges of characters in the class, in any order, possibly
+            overlapping (default is no interval, the empty class)
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()) -> None:
+        merged: List[Tuple[int, int]] = []
+        for first, last in sorted(intervals):
+            if first > last:
+                raise Exception(
+                    f"Empty interval of code points {first}-{last}.")
+            if merged and first <= merged[-1][1] + 1:
+                if last > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], last)
+            else:
+                merged.append((first, last))
+        self.intervals: Tuple[Tuple[int, int], ...] = tuple(merged)
+        self.__firsts__: List[int] = [first for first, _ in merged]
+        self.__size__: int = sum(last - first + 1 for first, last in merged)
+        ascii_table = bytearray(ASCII_SIZE)
+        for first, last in merged:
+            for code in range(first, min(last, ASCII_SIZE - 1) + 1):
+                ascii_table[code] = 1
+        self.__ascii__: bytes = bytes(ascii_table)
+        self.chars: Union[FrozenSet[str], None] = frozenset(
+            self) if self.__size__ <= MAX_SET_SIZE else None
+
+    @classmethod
+    def from_chars(cls, chars: Iterable[str]) -> 'CharClass':
+        """ Builds the class of some characters.
+
+        Args:
+            chars (Iterable[str]): the characters, e.g. a string
+
+        Returns:
+            CharClass: the class of the characters
+        """
+        return cls((ord(ch), ord(ch)) for ch in chars)
+
+    def __contains__(self, ch: str) -> bool:
+        code = ord(ch)
+        if code < ASCII_SIZE:
+            return self.__ascii__[code] == 1
+        i = bisect.bisect_right(self.__firsts__, code) - 1
+        return i >= 0 and code <= self.intervals[i][1]
+
+    def __len__(self) -> int:
+        return self.__size__
+
+    def __iter__(self) -> Iterator[str]:
+        for first, last in self.intervals:
+            for code in range(first, last + 1):
+                yield chr(code)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, CharClass) and self.intervals == other.intervals
+
+    def __hash__(self) -> int:
+        return hash(self.intervals)
+
+    def __or__(self, other: 'CharClass') -> 'CharClass':
+        return CharClass(self.intervals + other.intervals)
+
+    def __and__(self, other: 'CharClass') -> 'CharClass':
+        intervals: List[Tuple[int, int]] = []
+        i = j = 0
+        while i < len(self.intervals) and j < len(other.intervals):
+            first = max(self.intervals[i][0], other.intervals[j][0])
+            last = min(self.intervals[i][1], other.intervals[j][1])
+            if first <= last:
+                intervals.append((first, last))
+            # the interval ending first cannot meet the following ones
+            if self.intervals[i][1] < other.intervals[j][1]:
+                i += 1
+            else:
+                j += 1
+        return CharClass(intervals)
+
+    def __invert__(self) -> 'CharClass':
+        intervals: List[Tuple[int, int]] = []
+        next_code = 0
+        for first, last in self.intervals:
+            if first > next_code:
+                intervals.append((next_code, first - 1))
+            next_code = last + 1
+        if next_code <= MAX_CODE_POINT:
+            intervals.append((next_code, MAX_CODE_POINT))
+        return CharClass(intervals)
+
+    def __sub__(self, other: 'CharClass') -> 'CharClass':
+        return self & ~other
+
+    def __le__(self, other: 'CharClass') -> bool:
+        return len(self - other) == 0
+
+    def isdisjoint(self, other: 'CharClass') -> bool:
+        """ Returns whether the two classes have no character in common."""
+        return len(self & other) == 0
+
+    def __str__(self) -> str:
+        ranges = []
+        for first, last in self.intervals:
+            if last - first >= 2:
+                ranges.append(f"{chr(first)}-{chr(last)}")
+            else:
+                ranges.extend(chr(code) for code in range(first, last + 1))
+        return ''.join(ranges)
+
+    def __repr__(self) -> str:
+        return f"CharClass({str(self)!r})"
@@ -0,0 +1,443 @@
+"""Module containing the lazy DFA classes.
+
+The LazyDFA class builds the DFA of a Program on demand, one state at a time,
+by subset construction, and caches the states and their transitions in a
+bounded table. Once a transition is cached, consuming a character costs a
+single dictionary lookup.
+
+The DFAMatcher class uses a forward and a reverse LazyDFA to answer the
+question "is there a match?" in a single pass, and to find the bounds of the
+leftmost-longest match without tracking any capturing group.
+
+Example:
+    Searching a regex in some test string::
+
+        dfa = DFAMatcher(Pyrser().parse(r"a+bx"))
+        result = dfa.is_match("aabx")
+        result, end_idx, _ = dfa.search("aabx")
+"""
+
+
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, FrozenSet, List, NamedTuple, Tuple, Union
+from .analysis import PrefixScanner
+from .match import Match
+from .program import Compiler, Program, CHAR, ANY, SPACE, CLASS, SPLIT, JMP, SAVE, ASSERT_START, ASSERT_END, MATCH
+from .re_ast import RE
+
+
+# default maximum number of states a LazyDFA keeps cached
+DEFAULT_MAX_STATES = 4096
+
+
+class DFACacheInfo(NamedTuple):
+    """ Statistics of the states cache of a LazyDFA."""
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    flushes: int
+
+
+class DFAState:
+    """ A state of a LazyDFA.
+
+    Args:
+        pcs (FrozenSet[int]): the program counters of the NFA threads alive
+            in this state, i.e. the ones pointing to consuming instructions,
+            to MATCH, or to an ASSERT_END not yet satisfiable
+        match_pcs (FrozenSet[int]): the program counters of the MATCH
+            instructions among pcs
+    """
+
+    def __init__(self, pcs: FrozenSet[int], match_pcs: FrozenSet[int]) -> None:
+        self.pcs: FrozenSet[int] = pcs
+        self.match_pcs: FrozenSet[int] = match_pcs
+        self.is_match: bool = len(match_pcs) > 0
+        self.accepts_at_end: bool = None
+        self.match_pcs_at_end: FrozenSet[int] = None
+        self.transitions: Dict[str, DFAState] = {}
+
+
+class LazyDFA:
+    """ DFA built lazily from a Program.
+
+    When the states table grows over max_states the whole table is flushed
+    and then rebuilt on demand.
+
+    A LazyDFA can be shared among threads: following a cached transition
+    takes no lock, while the states table is only changed holding the lock
+    of the DFA. The statistics are approximate when the DFA is shared.
+
+    Args:
+        program (Program): the program to simulate
+        max_states (int): the maximum number of cached states
+            (default is DEFAULT_MAX_STATES)
+    """
+
+    def __init__(self, program: Program, max_states: int = DEFAULT_MAX_STATES) -> None:
+        self.program: Program = program
+        self.max_states: int = max_states
+        self.states: Dict[Tuple[FrozenSet[int], bool], DFAState] = {}
+        self.start_states: Dict[Tuple[bool, bool], DFAState] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self.flushes: int = 0
+        self.__lock__: Lock = Lock()
+
+    def cache_info(self) -> DFACacheInfo:
+        """ Returns the statistics of the states cache."""
+        return DFACacheInfo(self.hits, self.misses, len(self.states), self.max_states, self.flushes)
+
+    def clear(self) -> None:
+        """ Empties the states cache and resets its statistics."""
+        with self.__lock__:
+            self.flush()
+            self.hits = self.misses = self.flushes = 0
+
+    def flush(self) -> None:
+        """ Empties the states cache.
+
+        Must be called holding the lock.
+        """
+        states = self.states
+        self.states = {}
+        self.start_states = {}
+        for state in states.values():
+            # states still referenced by a running scan must not keep the
+            # old table alive
+            state.transitions.clear()
+
+    def closure(self, pcs: List[int], at_start: bool) -> List[int]:
+        """ Follows the non-consuming instructions.
+
+        Args:
+            pcs (List[int]): the program counters to start from
+            at_start (bool): whether the current index is the start of the
+                test string
+
+        Returns:
+            List[int]: the reached program counters of consuming instructions,
+            of MATCH, and of ASSERT_END (whose check is delayed until the end
+            of the test string is known to be reached)
+        """
+        program = self.program
+        ops, xs, ys = program.ops, program.xs, program.ys
+        visited = set()
+        result = []
+        stack = list(reversed(pcs))
+        while stack:
+            pc = stack.pop()
+            if pc in visited:
+                continue
+            visited.add(pc)
+            op = ops[pc]
+            if op == JMP:
+                stack.append(xs[pc])
+            elif op == SPLIT:
+                stack.append(ys[pc])
+                stack.append(xs[pc])
+            elif op == SAVE:
+                stack.append(pc + 1)
+            elif op == ASSERT_START:
+                if at_start:
+                    stack.append(pc + 1)
+            else:
+                result.append(pc)
+        return result
+
+    def intern(self, pcs: List[int], unanchored: bool) -> DFAState:
+        """ Returns the cached state for the passed program counters."""
+        key = (frozenset(pcs), unanchored)
+        with self.__lock__:
+            state = self.states.get(key)
+            if state is None:
+                if len(self.states) >= self.max_states:
+                    self.flushes += 1
+                    self.flush()
+                ops = self.program.ops
+                state = DFAState(key[0], frozenset(
+                    pc for pc in pcs if ops[pc] == MATCH))
+                self.states[key] = state
+        return state
+
+    def start_state(self, at_start: bool, unanchored: bool) -> DFAState:
+        """ Returns the initial state.
+
+        Args:
+            at_start (bool): whether the scan starts at the start of the test
+                string
+            unanchored (bool): if True the returned state, and every state
+                reached from it, also starts a new match at every index
+
+        Returns:
+            DFAState: the initial state
+        """
+        key = (at_start, unanchored)
+        state = self.start_states.get(key)
+        if state is None:
+            state = self.intern(self.closure([0], at_start), unanchored)
+            self.start_states[key] = state
+        return state
+
+    def next_state(self, state: DFAState, ch: str, unanchored: bool) -> DFAState:
+        """ Returns the state reached consuming ch from state."""
+        next_ = state.transitions.get(ch)
+        if next_ is not None:
+            self.hits += 1
+            return next_
+        self.misses += 1
+
+        ops, args = self.program.ops, self.program.args
+        pcs = []
+        for pc in sorted(state.pcs):
+            op = ops[pc]
+            if op == CHAR:
+                if ch != args[pc]:
+                    continue
+            elif op == ANY:
+                if ch == '\n':
+                    continue
+            elif op == SPACE:
+                if not ch.isspace():
+                    continue
+            elif op == CLASS:
+                chars, positive = args[pc]
+                if (ch in chars) != positive:
+                    continue
+            else:
+                continue
+            pcs.append(pc + 1)
+        if unanchored:
+            pcs.append(0)
+        next_ = self.intern(self.closure(pcs, False), unanchored)
+        state.transitions[ch] = next_
+        return next_
+
+    def accepts_at_end(self, state: DFAState) -> bool:
+        """ Returns whether state accepts when the test string is finished."""
+        if state.accepts_at_end is None:
+            state.accepts_at_end = state.is_match or self.reaches_match_at_end(state)
+        return state.accepts_at_end
+
+    def matches_at_end(self, state: DFAState) -> FrozenSet[int]:
+        """ Returns the MATCH program counters reached by state when the test
+        string is finished.
+        """
+        if state.match_pcs_at_end is None:
+            program = self.program
+            ops, xs, ys = program.ops, program.xs, program.ys
+            visited = set()
+            match_pcs = set(state.match_pcs)
+            stack = [pc for pc in state.pcs if ops[pc] == ASSERT_END]
+            while stack:
+                pc = stack.pop()
+                if pc in visited:
+                    continue
+                visited.add(pc)
+                op = ops[pc]
+                if op == MATCH:
+                    match_pcs.add(pc)
+                elif op == JMP:
+                    stack.append(xs[pc])
+                elif op == SPLIT:
+                    stack.append(ys[pc])
+                    stack.append(xs[pc])
+                elif op == SAVE or op == ASSERT_END:
+                    stack.append(pc + 1)
+            state.match_pcs_at_end = frozenset(match_pcs)
+        return state.match_pcs_at_end
+
+    def reaches_match_at_end(self, state: DFAState) -> bool:
+        """ Returns whether a delayed ASSERT_END of state leads to MATCH."""
+        program = self.program
+        ops, xs, ys = program.ops, program.xs, program.ys
+        visited = set()
+        stack = [pc for pc in state.pcs if ops[pc] == ASSERT_END]
+        while stack:
+            pc = stack.pop()
+            if pc in visited:
+                continue
+            visited.add(pc)
+            op = ops[pc]
+            if op == MATCH:
+                return True
+            if op == JMP:
+                stack.append(xs[pc])
+            elif op == SPLIT:
+                stack.append(ys[pc])
+                stack.append(xs[pc])
+            elif op == SAVE or op == ASSERT_END:
+                stack.append(pc + 1)
+        return False
+
+
+class DFAMatcher:
+    """ Capture-free matcher built on lazy DFAs.
+
+    Finds the same leftmost-longest match of the PikeVM, without the
+    capturing groups.
+
+    Args:
+        ast (RE): the root node of the regular expression's AST
+        max_states (int): the maximum number of states cached by each of
+            the forward and reverse DFAs (default is DEFAULT_MAX_STATES)
+        prefix_scanner (PrefixScanner): if not None, used by is_match to skip
+            the indexes where a match cannot start (default is None)
+        anchored_start (bool): if True the regex can only match at the start
+            of the test string, so no other start index is tried and the
+            reverse scan is skipped (default is False)
+        byte_level (bool): if True the DFAs match bytes-like test strings,
+            see Compiler.compile (default is False)
+    """
+
+    def __init__(self, ast: RE, max_states: int = DEFAULT_MAX_STATES, prefix_scanner: PrefixScanner = None, anchored_start: bool = False, byte_level: bool = False) -> None:
+        self.prefix_scanner: Union[PrefixScanner, None] = prefix_scanner
+        self.anchored_start: bool = anchored_start
+        compiler = Compiler()
+        self.forward: LazyDFA = LazyDFA(
+            compiler.compile(ast, byte_level=byte_level), max_states)
+        self.reverse: LazyDFA = LazyDFA(
+            compiler.compile(ast, reverse=True, byte_level=byte_level), max_states)
+
+    def cache_info(self) -> DFACacheInfo:
+        """ Returns the statistics of the forward and reverse DFAs combined."""
+        f, r = self.forward.cache_info(), self.reverse.cache_info()
+        return DFACacheInfo(f.hits + r.hits, f.misses + r.misses, f.size + r.size, f.max_size + r.max_size, f.flushes + r.flushes)
+
+    def clear(self) -> None:
+        """ Empties the states caches and resets their statistics."""
+        self.forward.clear()
+        self.reverse.clear()
+
+    def is_match(self, string: str, start_idx: int = 0) -> bool:
+        """ Returns whether the regex matches somewhere in the test string.
+
+        The test string is scanned once, and the scan stops at the first
+        index at which a match ends.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+
+        Returns:
+            bool: True if a match starting at or after start_idx exists
+        """
+        dfa = self.forward
+        str_len = len(string)
+        if self.anchored_start:
+            if start_idx > 0:
+                return False
+            # a single thread started at index 0, stopped as soon as it dies
+            state = dfa.start_state(True, False)
+            for str_i in range(str_len):
+                if state.is_match:
+                    return True
+                if not state.pcs:
+                    return False
+                state = dfa.next_state(state, string[str_i], False)
+            return dfa.accepts_at_end(state)
+
+        state = dfa.start_state(start_idx == 0, True)
+        if self.prefix_scanner is None:
+            for str_i in range(start_idx, str_len):
+                if state.is_match:
+                    return True
+                state = dfa.next_state(state, string[str_i], True)
+            return dfa.accepts_at_end(state)
+
+        find = self.prefix_scanner.finder(string)
+        # the state in which no match is in progress
+        idle_pcs = dfa.start_state(False, True).pcs
+        str_i = start_idx
+        while str_i < str_len:
+            if state.is_match:
+                return True
+            if state.pcs == idle_pcs:
+                # jump to where a match can start, the threads started in
+                # between cannot lead to a match
+                str_i = find(str_i)
+                if str_i == -1:
+                    return False
+                state = dfa.start_state(str_i == 0, True)
+            state = dfa.next_state(state, string[str_i], True)
+            str_i += 1
+        return dfa.accepts_at_end(state)
+
+    def match_starts(self, string: str) -> bytearray:
+        """ Returns the indexes at which a match starts.
+
+        The test string is scanned once backward by the reverse DFA.
+
+        Args:
+            string (str): the test string
+
+        Returns:
+            bytearray: at index i holds 1 if a match starts at index i of the
+            test string, 0 otherwise
+        """
+        str_len = len(string)
+        starts = bytearray(str_len + 1)
+        if self.anchored_start:
+            if self.is_match(string):
+                starts[0] = 1
+            return starts
+
+        dfa = self.reverse
+        state = dfa.start_state(True, True)
+        for str_i in range(str_len - 1, -1, -1):
+            if state.is_match:
+                starts[str_i + 1] = 1
+            state = dfa.next_state(state, string[str_i], True)
+        if dfa.accepts_at_end(state):
+            starts[0] = 1
+        return starts
+
+    def longest_match_end(self, string: str, start_idx: int) -> int:
+        """ Returns the end index of the longest match starting at start_idx.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index where the match must start
+
+        Returns:
+            int: the end index of the longest match, -1 if there is no match
+        """
+        dfa = self.forward
+        str_len = len(string)
+        end_idx = -1
+        state = dfa.start_state(start_idx == 0, False)
+        str_i = start_idx
+        while True:
+            if state.is_match:
+                end_idx = str_i
+            if str_i == str_len:
+                if dfa.accepts_at_end(state):
+                    end_idx = str_i
+                break
+            if not state.pcs:
+                break
+            state = dfa.next_state(state, string[str_i], False)
+            str_i += 1
+        return end_idx
+
+    def search(self, string: str, start_idx: int = 0) -> Tuple[bool, int, Deque[Match]]:
+        """ Searches the leftmost-longest match in the test string.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+
+        Returns:
+            A tuple containing whether a match was found or not, the end index
+            of the match, and an empty deque, as groups are not tracked.
+        """
+        if not self.is_match(string, start_idx):
+            return False, start_idx, deque()
+        match_start = self.match_starts(string).find(1, start_idx)
+        if match_start == -1:
+            return False, start_idx, deque()
+        return True, self.longest_match_end(string, match_start), deque()
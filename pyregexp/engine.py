@@ -7,29 +7,131 @@ Example:
 
         reng = RegexEngine()
         result, consumed = reng.match(r"a+bx", "aabx")
+
+    Matching using the linear-time Pike VM instead of backtracking::
+
+        reng = RegexEngine(engine=PIKEVM)
+        result, consumed = reng.match(r"(a|aa)*b", "aaaaaaaaaaaaaaaaaaaaaaaaaaaaac")
 """
 
 
+import math
 from collections import deque
-from typing import Callable, Deque, Union, Tuple, List
-import unicodedata
-from .pyrser import Pyrser
+from typing import Callable, Deque, Dict, Iterable, Iterator, Union, Tuple, List, IO
 from .match import Match
-from .re_ast import RE, GroupNode, LeafNode, OrNode, EndElement, StartElement
+from .re_ast import RE, GroupNode, LeafNode, LiteralRun, OrNode, EndElement, StartElement
+from .dfa import DFACacheInfo
+from .analysis import PrefixScanner, capture_free_nodes
+from .pattern import iter_matches
+from .budget import StepBudget
+from .redos import POLICIES, REFUSE, ROUTE, UnsafePatternError, high_risks
+from .cache import PatternCache, shared_cache
+from .stream import StreamMatcher, DEFAULT_CHUNK_SIZE
+
+
+# names of the available matching engines
+BACKTRACKING = "backtracking"
+PIKEVM = "pikevm"
+ENGINES = (BACKTRACKING, PIKEVM)
 
 
 class RegexEngine:
     """ Regular Expressions Engine.
 
     This class contains all the necessary to recognize regular expressions in a test string.
+
+    Two matching engines are available: the backtracking one (BACKTRACKING),
+    and the Pike VM (PIKEVM), which simulates the regex NFA and runs in
+    O(len(regex) * len(string)) time, whatever the regex is. The Pike VM
+    returns the leftmost-longest match.
+    When the Pike VM is used and the matches are not requested, the match is
+    found by a lazily built DFA instead, that does not track groups. The
+    backtracking engine first asks the DFA whether there is a match, and
+    fails at once if there is none, without counting steps. When there is
+    one, the backtracking engine still runs, groups included, as the end
+    index it returns is the one of the leftmost-first match, which the DFA,
+    finding the leftmost-longest one, cannot give: its boolean queries are
+    answered in one DFA pass only when they fail.
+    With the Pike VM, the regexes that are plain sequences of quantified
+    leaves, e.g. "[a-z]+@", are instead matched by the bit-parallel matcher,
+    with or without matches, and the regexes that are, as a whole,
+    alternations of literals, e.g. "GET|POST", by an Aho-Corasick automaton.
+    The backtracking engine only asks them, in place of the DFA, whether
+    there is a match. An alternation of literals nested in a larger regex,
+    e.g. "(GET|POST) /x", is matched by every engine as any other group.
+
+    The compiled regexes are kept in a PatternCache, by default the one
+    shared by all the RegexEngine instances.
+
+    A RegexEngine keeps no state between calls, and the compiled regexes
+    can be shared among threads, so a single RegexEngine can be used by many
+    threads at once.
+
+    The backtracking engine can memoize the failed attempts to match a group
+    holding no capturing group at a string index, so that they are not
+    repeated from other start indexes. It does not bound the work of the
+    backtracking engine: the groups holding a capturing group, e.g. in
+    "(a|aa)*b", are not memoized, as their failures can leave the captures
+    of their subgroups behind, and the iterations of a quantified group are
+    not separate attempts. The ROUTE policy bounds it instead.
+
+    The work of the backtracking engine on a call can be bounded by a
+    maximum number of steps (group attempts and backtracks) and by a
+    timeout, past which MatchLimitExceeded is raised. The other matchers run
+    in linear time and are not bounded.
+
+    The regexes are statically checked for the constructs that can make the
+    backtracking engine exponentially slow, e.g. "(a+)+", see redos_risks.
+    With the REFUSE policy the regexes with a high risk raise
+    UnsafePatternError instead of being matched by the backtracking engine,
+    and with the ROUTE policy they are matched by the Pike VM.
+
+    Args:
+        engine (str): the engine used by default by the match method
+            (default is BACKTRACKING)
+        cache (PatternCache): the cache of the compiled regexes, if None the
+            shared cache is used (default is None)
+        memoize (bool): whether the backtracking engine memoizes its
+            failures by default (default is False)
+        max_steps (int): the maximum number of steps of the backtracking
+            engine on a call by default, if None they are not limited
+            (default is None)
+        timeout (float): the maximum number of seconds the backtracking
+            engine spends on a call by default, if None the time is not
+            limited (default is None)
+        redos (str): the policy for the regexes with a high ReDoS risk
+            matched by the backtracking engine by default, REFUSE or ROUTE,
+            if None they are matched as any other regex (default is None)
     """
 
-    def __init__(self):
-        self.parser: Pyrser = Pyrser()
-        self.prev_re: str = None
-        self.prev_ast: RE = None
+    def __init__(self, engine: str = BACKTRACKING, cache: PatternCache = None, memoize: bool = False, max_steps: int = None, timeout: float = None, redos: str = None):
+        if engine not in ENGINES:
+            raise Exception(f"Unknown engine '{engine}'.")
+        if redos is not None and redos not in POLICIES:
+            raise Exception(f"Unknown ReDoS policy '{redos}'.")
+        self.engine: str = engine
+        self.cache: PatternCache = cache if cache is not None else shared_cache
+        self.memoize: bool = memoize
+        self.max_steps: Union[int, None] = max_steps
+        self.timeout: Union[float, None] = timeout
+        self.redos: Union[str, None] = redos
+
+    def dfa_cache_info(self, re: str, ignore_case: int = 0) -> Union[DFACacheInfo, None]:
+        """ Returns the statistics of the lazy DFA of a regex.
 
-    def match(self, re: str, string: str, return_matches: bool = False, continue_after_match: bool = False, ignore_case: int = 0) -> Union[Tuple[bool, int, List[Deque[Match]]], Tuple[bool, int]]:
+        Args:
+            re (str): the regular expression
+            ignore_case (int): the ignore_case flag used to match the regex
+                (default is 0)
+
+        Returns:
+            Union[DFACacheInfo, None]: the hits, misses, size, maximum size
+            and flushes of the DFA states cache, None if the DFA of the regex
+            was never used
+        """
+        return self.cache.get(re, ignore_case).dfa_cache_info()
+
+    def match(self, re: str, string: str, return_matches: bool = False, continue_after_match: bool = False, ignore_case: int = 0, engine: str = None, memoize: bool = None, max_steps: int = None, timeout: float = None, redos: str = None) -> Union[Tuple[bool, int, List[Deque[Match]]], Tuple[bool, int]]:
         """ Searches a regex in a test string.
 
         Searches the passed regular expression in the passed test string and
@@ -54,6 +156,22 @@ class RegexEngine:
             ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
                 case ignoring is performed, when 2 casefolding is performed.
                 (default is 0)
+            engine (str): the engine to use for this call, BACKTRACKING or
+                PIKEVM. If None the engine passed to the constructor is used
+                (default is None)
+            memoize (bool): whether the backtracking engine memoizes its
+                failures for this call. If None the memoize flag passed to the
+                constructor is used (default is None)
+            max_steps (int): the maximum number of steps of the backtracking
+                engine on this call. If None the max_steps passed to the
+                constructor is used (default is None)
+            timeout (float): the maximum number of seconds the backtracking
+                engine spends on this call. If None the timeout passed to the
+                constructor is used (default is None)
+            redos (str): the policy for a regex with a high ReDoS risk
+                matched by the backtracking engine on this call, REFUSE or
+                ROUTE. If None the policy passed to the constructor is used
+                (default is None)
 
         Returns:
             A tuple containing whether a match was found or not, the last
@@ -61,6 +179,12 @@ class RegexEngine:
             list of deques of Match, where each list of matches represents
             in the first position the whole match, and in the subsequent
             positions all the group and subgroups matched. 
+
+        Raises:
+            MatchLimitExceeded: if the backtracking engine exceeds max_steps
+            or timeout
+            UnsafePatternError: if the policy is REFUSE and the regex has a
+            high ReDoS risk
         """
 
         def return_fnc(res: bool, consumed: int, all_matches: List[Deque[Match]], return_matches: bool) -> Union[Tuple[bool, int, List[Deque[Match]]], Tuple[bool, int]]:
@@ -70,44 +194,191 @@ class RegexEngine:
             else:
                 return res, consumed
 
-        if ignore_case == 1:
-            re = unicodedata.normalize("NFKD", re).lower()
-            string = unicodedata.normalize("NFKD", string).casefold()
-        elif ignore_case == 2:
-            re = unicodedata.normalize("NFKD", re).casefold()
-            string = unicodedata.normalize("NFKD", string).casefold()
-
-        ast = self.parser.parse(re=re) if self.prev_re != re else self.prev_ast
-        self.prev_re = re
-        self.prev_ast = ast
+        budget = self.__budget__(max_steps, timeout)
+        search, string = self.__search_fnc__(
+            re, string, return_matches, ignore_case, engine, memoize, budget, redos)
+        if search is None:
+            return return_fnc(False, 0, [], return_matches)
 
         # variables holding the matched groups list for each matched substring in the test string
         all_matches: List[Deque[Match]] = []
         highest_matched_idx: int = 0  # holds the highest matched string's index
 
-        res, consumed, matches = self.__match__(ast, string, 0)
-        if res:
-            highest_matched_idx = consumed
+        res = False
+        for highest_matched_idx, matches in iter_matches(search, string, continue_after_match=continue_after_match):
+            res = True
             all_matches.append(matches)
-        else:
-            return return_fnc(res, highest_matched_idx, all_matches, return_matches)
+        return return_fnc(res, highest_matched_idx, all_matches, return_matches)
 
-        if not continue_after_match or not consumed > 0:
-            return return_fnc(res, highest_matched_idx, all_matches, return_matches)
+    def finditer(self, re: str, string: str, ignore_case: int = 0, engine: str = None, memoize: bool = None, max_steps: int = None, timeout: float = None, redos: str = None) -> Iterator[Deque[Match]]:
+        """ Iterates over the matches of a regex in a test string.
 
-        while True:
-            res, consumed, matches = self.__match__(ast, string, consumed)
+        The matches are the same returned by match with return_matches and
+        continue_after_match set to True, but each one is searched only when
+        the previous one has been consumed, resuming from its end index, so
+        the caller can stop early and the matches are not kept in memory.
 
-            # if consumed is not grater than highest_matched_idx this means the new match
-            # consumed 0 characters, so there is really nothing more to match
-            if res and consumed > highest_matched_idx:
-                highest_matched_idx = consumed
-                all_matches.append(matches)
-            else:
-                return return_fnc(True, highest_matched_idx, all_matches, return_matches)
+        Args:
+            re (str): the regular expression to search
+            string (str): the test string
+            ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
+                case ignoring is performed, when 2 casefolding is performed.
+                (default is 0)
+            engine (str): the engine to use for this call, BACKTRACKING or
+                PIKEVM. If None the engine passed to the constructor is used
+                (default is None)
+            memoize (bool): whether the backtracking engine memoizes its
+                failures for this call. If None the memoize flag passed to the
+                constructor is used (default is None)
+            max_steps (int): the maximum number of steps of the backtracking
+                engine to find each match. If None the max_steps passed to the
+                constructor is used (default is None)
+            timeout (float): the maximum number of seconds the backtracking
+                engine spends to find each match, the time spent by the caller
+                between two matches is not counted. If None the timeout
+                passed to the constructor is used (default is None)
+            redos (str): the policy for a regex with a high ReDoS risk
+                matched by the backtracking engine on this call, REFUSE or
+                ROUTE. If None the policy passed to the constructor is used
+                (default is None)
+
+        Yields:
+            Deque[Match]: the matches of a substring, the whole match in the
+            first position, and in the subsequent positions the groups matched
+
+        Raises:
+            MatchLimitExceeded: if the backtracking engine exceeds max_steps
+            or timeout
+            UnsafePatternError: if the policy is REFUSE and the regex has a
+            high ReDoS risk
+        """
+        budget = self.__budget__(max_steps, timeout)
+        search, string = self.__search_fnc__(
+            re, string, True, ignore_case, engine, memoize, budget, redos)
+        if search is None:
+            return
+        for _, matches in iter_matches(search, string):
+            yield matches
+            if budget is not None:
+                budget.reset()
+
+    def finditer_stream(self, re: str, source: Union[IO, Iterable[Union[str, bytes]]], ignore_case: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = "utf-8") -> Iterator[Deque[Match]]:
+        """ Iterates over the matches of a regex in a chunked input.
+
+        The input is never loaded in memory as a whole, see StreamMatcher.
+        The matches are found by the PikeVM, and their indexes are offsets
+        in the whole input.
+
+        Args:
+            re (str): the regular expression to search
+            source (Union[IO, Iterable[Union[str, bytes]]]): a text or binary
+                file object, or an iterable of chunks
+            ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
+                case ignoring is performed, when 2 casefolding is performed.
+                (default is 0)
+            chunk_size (int): the size of the chunks read from a file object
+                (default is DEFAULT_CHUNK_SIZE)
+            encoding (str): the encoding used to decode the bytes chunks
+                (default is "utf-8")
+
+        Yields:
+            Deque[Match]: the matches of a substring, the whole match in the
+            first position, and in the subsequent positions the groups matched
+        """
+        matcher = StreamMatcher(self.cache.get(re, ignore_case), encoding)
+        return matcher.finditer(source, chunk_size)
+
+    def __budget__(self, max_steps: Union[int, None], timeout: Union[float, None]) -> Union[StepBudget, None]:
+        """ Returns the StepBudget of a call, None if it is not limited."""
+        if max_steps is None:
+            max_steps = self.max_steps
+        if timeout is None:
+            timeout = self.timeout
+        if max_steps is None and timeout is None:
+            return None
+        return StepBudget(max_steps, timeout)
+
+    def __search_fnc__(self, re: str, string: str, return_matches: bool, ignore_case: int, engine: Union[str, None], memoize: Union[bool, None], budget: Union[StepBudget, None] = None, redos: Union[str, None] = None) -> Tuple[Union[Callable[[str, int], Tuple[bool, int, Deque[Match]]], None], str]:
+        """ Chooses the function searching the regex from a string index.
+
+        See match for the meaning of the arguments.
+
+        Returns:
+            A tuple containing the search function, None if the regex surely
+            does not match the test string, and the normalized test string.
+        """
+        if engine is None:
+            engine = self.engine
+        elif engine not in ENGINES:
+            raise Exception(f"Unknown engine '{engine}'.")
+        if memoize is None:
+            memoize = self.memoize
+        if redos is None:
+            redos = self.redos
+        elif redos not in POLICIES:
+            raise Exception(f"Unknown ReDoS policy '{redos}'.")
+
+        pattern = self.cache.get(re, ignore_case)
+        if engine == BACKTRACKING and redos is not None:
+            risks = high_risks(pattern.redos_risks)
+            if risks and redos == REFUSE:
+                raise UnsafePatternError(re, risks)
+            if risks and redos == ROUTE:
+                engine = PIKEVM
+        if pattern.byte_level and engine != PIKEVM:
+            raise Exception("Bytes regexes are matched only by the PikeVM engine.")
+        string = pattern.normalize(string)
+
+        # the string is too short, or a literal every match contains is
+        # missing, no need to run the engine
+        if not pattern.may_match(string):
+            return None, string
+
+        # the backtracking engine matches the runs of characters at once
+        ast = pattern.backtracking_ast
+
+        if engine == PIKEVM and not return_matches:
+            matcher = pattern.matcher
+            # a single forward scan is enough to tell there is no match
+            if not matcher.is_match(string):
+                return None, string
+            starts = matcher.match_starts(string)
+
+            def search(string: str, start_str_i: int) -> Tuple[bool, int, Deque[Match]]:
+                match_start = starts.find(1, start_str_i)
+                if match_start == -1:
+                    return False, start_str_i, deque()
+                return True, matcher.longest_match_end(string, match_start), deque()
+        elif engine == PIKEVM:
+            search = pattern.search_fnc(string)
+        else:
+            # the DFA telling there is no match is enough, the backtracking
+            # engine is only run to find where the leftmost-first match ends
+            if not pattern.matcher.is_match(string):
+                return None, string
+
+            def search(string: str, start_str_i: int) -> Tuple[bool, int, Deque[Match]]:
+                return self.__match__(ast, string, start_str_i, pattern.prefix_scanner, pattern.anchored_start, pattern.min_len, memoize, budget)
+        return search, string
+
+    def __match__(self, ast: RE, string: str, start_str_i: int, prefix_scanner: PrefixScanner = None, anchored_start: bool = False, min_len: int = 0, memoize: bool = False, budget: StepBudget = None) -> Tuple[bool, int, Deque[Match]]:
+        """ Same as match, but always returns after the first match.
+
+        If a prefix_scanner is passed, the match is attempted only at the
+        indexes where the scanner finds that a match can start.
+        If anchored_start is True, the regex can only match at the start of
+        the test string, so the match is attempted at index 0 only.
+        The match is not attempted at the indexes followed by less than
+        min_len characters.
+        If memoize is True, the failed attempts to match a group holding no
+        capturing group at a string index are recorded, and not repeated, also
+        from other start indexes.
+        If a budget is passed, a step is counted at every attempt to match a
+        group and at every backtrack.
+        """
+        if anchored_start and start_str_i > 0:
+            return False, start_str_i, deque()
 
-    def __match__(self, ast: RE, string: str, start_str_i: int) -> Tuple[bool, int, Deque[Match]]:
-        """ Same as match, but always returns after the first match."""
         matches: Deque[Match] = deque()
 
         # used to restore the left match of a ornode if necessary
@@ -192,7 +463,13 @@ class RegexEngine:
             """
             nonlocal start_str_i
             nonlocal str_i
-            backtrack_stack: List[Tuple[int, int, int, List[int]]] = []
+            # the stack entries are (child index, min, matched times,
+            # consumptions), where the consumptions are the list of the
+            # characters consumed by each match of a group, and the characters
+            # consumed by every match of a leaf
+            backtrack_stack: List[Tuple[int, int, int, Union[List[int], int]]] = []
+            if budget is not None:
+                budget.step()
 
             def backtrack(str_i: int, curr_child_i: int, recursive: bool = False) -> Tuple[bool, int, int]:
                 """ Returns whether it is possible to backtrack and the state to backtrack to.
@@ -215,11 +492,14 @@ class RegexEngine:
                 nonlocal max_matched_idx
                 nonlocal ast
 
+                if budget is not None:
+                    budget.step()
+
                 if len(backtrack_stack) == 0:
                     return False, str_i, curr_child_i
 
                 # the fist step is to pop the last tuple from the backtrack_stack
-                popped_child_i, min_, matched_times, consumed_list = backtrack_stack.pop()
+                popped_child_i, min_, matched_times, consumed = backtrack_stack.pop()
 
                 if matched_times == min_:
                     # if a node is already matched the minimum number of times, the
@@ -229,12 +509,12 @@ class RegexEngine:
                     # But, before the recursion, you have to calculate  what the
                     # string index (str_i) value was before the node was matched
                     # even once. Thus, you have to decrease the string index
-                    # of each consumption in the consumed_list.
+                    # of each consumption in the consumed list.
 
                     # calculate_the new str_i
                     before_str_i = str_i
-                    for consumption in consumed_list:
-                        str_i -= consumption
+                    str_i -= sum(consumed) if isinstance(consumed, list) else \
+                        matched_times * consumed
                     if max_matched_idx == -1 or isinstance(ast.children[popped_child_i], LeafNode) or before_str_i == str_i:
                         # recursive call
                         return backtrack(str_i, popped_child_i, True)
@@ -250,12 +530,13 @@ class RegexEngine:
                     # need to remove the last consumption from the list,
                     # decrease the str_i by that amount, decrease the times the node
                     # was matched - matched_times - by 1, and then append the stack
-                    # the tuple with the new matched_times and consumed_list.
-                    last_consumed = consumed_list.pop()
+                    # the tuple with the new matched_times and consumed list.
+                    # A leaf just gives back the characters of one match.
+                    last_consumed = consumed.pop() if isinstance(consumed, list) else consumed
                     new_str_i = str_i - last_consumed
                     if max_matched_idx == -1 or isinstance(ast.children[popped_child_i], LeafNode):
                         backtrack_stack.append(
-                            (popped_child_i, min_, matched_times - 1, consumed_list))
+                            (popped_child_i, min_, matched_times - 1, consumed))
                         # lastly, you return that the backtracking is possible, and
                         # the state to which backtrack to.
                         return True, new_str_i, curr_child_i
@@ -267,12 +548,12 @@ class RegexEngine:
                 """ Removes node from stack and returns the new str_i.
                 """
                 nonlocal backtrack_stack
-                popped_child_i, min_, matched_times, consumed_list = backtrack_stack.pop()
+                popped_child_i, min_, matched_times, consumed = backtrack_stack.pop()
                 if popped_child_i == curr_child_i:
-                    for consumption in consumed_list:
-                        str_i -= consumption
+                    str_i -= sum(consumed) if isinstance(consumed, list) else \
+                        matched_times * consumed
                 else:
-                    backtrack_stack.append((popped_child_i, min_, matched_times, consumed_list))
+                    backtrack_stack.append((popped_child_i, min_, matched_times, consumed))
                 return str_i
 
             curr_node = ast.children[0] if len(ast.children) > 0 else None
@@ -308,12 +589,13 @@ class RegexEngine:
                     while j < max_:
                         tmp_str_i = str_i
 
-                        save_match_left = isinstance(curr_node.left, GroupNode)
+                        # only the capturing groups save a match
+                        save_match_left = isinstance(curr_node.left, GroupNode) and curr_node.left.is_capturing()
                         res_left, str_i_left = save_matches(match_group, curr_node.left, string, str_i, max_matched_idx) if save_match_left else match_group(curr_node.left, string, max_matched_idx)
 
                         str_i = tmp_str_i
 
-                        save_match_right = isinstance(curr_node.right, GroupNode)
+                        save_match_right = isinstance(curr_node.right, GroupNode) and curr_node.right.is_capturing()
                         res_right, str_i_right = save_matches(match_group, curr_node.right, string, str_i, max_matched_idx) if save_match_right else match_group(curr_node.right, string, max_matched_idx)
 
                         if res_left and res_right:
@@ -424,23 +706,82 @@ class RegexEngine:
 
                     continue
 
+                elif isinstance(curr_node, LiteralRun):
+                    # the whole run is matched at once, and pushed on the
+                    # stack as a single node matched exactly once
+                    run_len = len(curr_node.match)
+                    if curr_node.match_at(string, str_i) and (max_matched_idx == -1 or str_i + run_len <= max_matched_idx):
+                        backtrack_stack.append((i, 1, 1, run_len))
+                        str_i += run_len
+                        i += 1
+                        continue
+                    # fails as the sequence of Elements it replaces would: a
+                    # mismatch of its first character as a mismatch of a leaf,
+                    # one of the following characters as a backtrack through
+                    # the characters already matched, which leaves str_i at
+                    # the mismatch
+                    before_str_i = str_i
+                    end_i = len(string) if max_matched_idx == -1 else max(
+                        str_i, min(len(string), max_matched_idx))
+                    run_end_i = curr_node.scan(string, str_i, end_i)
+                    if run_end_i > str_i:
+                        str_i = run_end_i
+                        can_bt, bt_str_i, bt_i = backtrack(before_str_i, i, True)
+                    else:
+                        if str_i < len(string) and i > 0 and not isinstance(ast.children[i-1], LeafNode):
+                            str_i = remove_this_node_from_stack(i, before_str_i)
+                            if str_i == start_str_i:
+                                return False, str_i
+                            max_matched_idx = str_i - 1
+                        can_bt, bt_str_i, bt_i = backtrack(before_str_i, i)
+                    if can_bt:
+                        i = bt_i
+                        str_i = bt_str_i
+                        continue
+                    return False, str_i
+
+                elif isinstance(curr_node, LeafNode) and not isinstance(curr_node, (StartElement, EndElement)):
+                    # the whole run of matching characters is scanned at once,
+                    # and pushed on the stack with the width of a match (1)
+                    # instead of the list of the consumptions
+                    min_, max_ = curr_node.min, curr_node.max
+                    before_str_i = str_i
+                    end_i = len(string) if max_ == math.inf else min(
+                        len(string), str_i + max_)
+                    if max_matched_idx != -1:
+                        end_i = max(str_i, min(end_i, max_matched_idx))
+                    str_i = curr_node.scan(string, str_i, end_i)
+                    if str_i - before_str_i >= min_:
+                        backtrack_stack.append(
+                            (i, min_, str_i - before_str_i, 1))
+                        i += 1
+                        continue
+                    if str_i < len(string) and i > 0 and not isinstance(ast.children[i-1], LeafNode):
+                        str_i = remove_this_node_from_stack(i, str_i)
+                        if str_i == start_str_i:
+                            return False, str_i
+                        # the previous group must end before this node
+                        # started, even if some of its characters matched, or
+                        # it would match the same characters again
+                        max_matched_idx = min(str_i, before_str_i) - 1
+                    can_bt, bt_str_i, bt_i = backtrack(before_str_i, i)
+                    if can_bt:
+                        i = bt_i
+                        str_i = bt_str_i
+                        continue
+                    return False, str_i
+
                 elif isinstance(curr_node, LeafNode):
-                    # it is a LeafNode obviously now
+                    # the anchors, which match without consuming characters
                     min_, max_ = curr_node.min, curr_node.max
                     j = 0
 
-                    consumed_list = []
-
                     before_str_i = str_i  # to discard changes made in case i need to bt
 
                     backtracking = False
                     while j < max_:
                         if str_i < len(string):  # i still have input to match
-                            if curr_node.is_match(ch=string[str_i], str_i=str_i, str_len=len(string)) and (max_matched_idx == -1 or str_i < max_matched_idx):
-                                if not (isinstance(curr_node, StartElement) or isinstance(curr_node, EndElement)):
-                                    consumed_list.append(1)
-                                    str_i += 1
-                            else:
+                            if not curr_node.is_match(ch=string[str_i], str_i=str_i, str_len=len(string)) or (max_matched_idx != -1 and str_i >= max_matched_idx):
                                 if min_ <= j:  # I already met the minimum requirement for match
                                     break
                                 if i > 0 and not isinstance(ast.children[i-1], LeafNode):
@@ -458,7 +799,7 @@ class RegexEngine:
                                 else:
                                     return False, str_i
                         else:  # finished input
-                            if isinstance(curr_node, StartElement) or isinstance(curr_node, EndElement) and curr_node.is_match(str_i=str_i, str_len=len(string)):
+                            if isinstance(curr_node, StartElement) or curr_node.is_match(str_i=str_i, str_len=len(string)):
                                 pass
                             # finished input w/o finishing the regex tree
                             elif min_ <= j:
@@ -476,8 +817,7 @@ class RegexEngine:
                                     return False, str_i
                         j += 1
                     if not backtracking:
-                        backtrack_stack.append(
-                            (i, min_, j, consumed_list))
+                        backtrack_stack.append((i, min_, j, 0))
                         i += 1
                     continue
                 else:
@@ -485,6 +825,42 @@ class RegexEngine:
 
             return True, str_i
 
+        def memoize_failures(match_group: Callable) -> Callable:
+            """ Wraps match_group so that it fails at once in a known failure.
+
+            The failures of the calls not limited by a max_matched_idx are
+            recorded by (node, str_i) pair, together with the str_i left by
+            the failure, for the nodes holding no capturing group only: their
+            failures depend on the pair alone, and leave the matches as they
+            were. Only the failures met are stored, so the memo costs nothing
+            to set up, whatever the length of the test string.
+            """
+            failures: Dict[Tuple[int, int], int] = {}
+            capture_free = capture_free_nodes(ast)
+
+            def memoized_match_group(node: Union[RE, GroupNode, OrNode], string: str, max_matched_idx: int = -1) -> Tuple[bool, int]:
+                nonlocal str_i
+
+                if max_matched_idx != -1 or id(node) not in capture_free:
+                    return match_group(node, string, max_matched_idx)
+
+                key = (id(node), str_i)
+                failed_str_i = failures.get(key)
+                if failed_str_i is not None:
+                    str_i = failed_str_i
+                    return False, str_i
+
+                res, end_idx = match_group(node, string, max_matched_idx)
+                if not res:
+                    failures[key] = str_i
+                return res, end_idx
+
+            return memoized_match_group
+
+        if memoize:
+            # the recursive calls go through the wrapper too
+            match_group = memoize_failures(match_group)
+
         i = str_i
 
         if len(string) == 0:
@@ -492,12 +868,25 @@ class RegexEngine:
                 match_group=match_group, ast=ast, string=string, start_idx=str_i)
             return return_fnc(res, consumed)
 
-        while str_i < len(string):
+        find = prefix_scanner.finder(string) if prefix_scanner is not None else None
+        # a match starting after last_start_i would be shorter than min_len
+        last_start_i = len(string) - min_len
+        while str_i < len(string) and str_i <= last_start_i:
+            if find is not None:
+                # jump straight to the next index where a match can start
+                candidate_str_i = find(str_i)
+                if candidate_str_i == -1 or candidate_str_i > last_start_i:
+                    break
+                str_i = i = candidate_str_i
             res, _ = save_matches(match_group=match_group,
                                   ast=ast, string=string, start_idx=str_i)
             i += 1
             if res:
                 return return_fnc(True, str_i)
+            elif anchored_start:
+                # the only possible start index failed
+                matches = deque()
+                return return_fnc(False, str_i)
             else:
                 matches = deque()
                 str_i = i
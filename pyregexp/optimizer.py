@@ -0,0 +1,296 @@
+"""Module containing the Optimizer class.
+
+The Optimizer rewrites the AST built by Pyrser into an equivalent, smaller
+one before it is compiled for the automaton engines: the Pike VM, the lazy
+DFA, and the matchers that replace them. The backtracking engine, whose
+matches depend on the shape of the AST, matches the regex as written. The
+rewrites go through a pipeline of passes, each of which can be switched off:
+
+- FACTOR_PREFIXES: factors the prefix shared by all the alternatives of an
+  alternation out of it, e.g. "abc|abd" into "ab(?:c|d)";
+- MERGE_ALTERNATIONS: merges the alternations of single characters into
+  a character class, e.g. "(?:c|d)" into "(?:[cd])";
+- FLATTEN_GROUPS: splices the non-capturing groups into their parent, e.g.
+  "x(?:ab)" into "xab", and moves the quantifier of a non-capturing group
+  with a single child onto the child, e.g. "(?:[cd])*" into "[cd]*";
+- FUSE_QUANTIFIERS: fuses the adjacent quantified copies of a leaf,
+  e.g. "a*a*" into "a*" and "aa?" into "a{1,2}".
+
+The passes never remove, add, or reorder the capturing groups, so the group
+ids and the leftmost-longest matches of the optimized regex are the ones of
+the original one.
+
+The fuse_literal_runs function rewrites the runs of plain characters into
+LiteralRun leaves, which only the backtracking engine matches.
+
+Example:
+    Optimizing a regex AST::
+
+        ast, changes = Optimizer().optimize(Pyrser().parse(r"abc|abd"))
+        for change in changes:
+            print(change.pass_name, change.description)
+"""
+
+
+import copy
+from collections import deque
+from typing import Callable, Iterable, List, NamedTuple, Tuple
+from .analysis import alternatives, literal_alternatives, single_char
+from .charclass import CharClass
+from .re_ast import RE, ASTNode, GroupNode, OrNode, LeafNode, Element, LiteralRun, RangeElement, StartElement, EndElement
+
+
+# the passes, in the order they run
+FACTOR_PREFIXES = 'factor_prefixes'
+MERGE_ALTERNATIONS = 'merge_alternations'
+FLATTEN_GROUPS = 'flatten_groups'
+FUSE_QUANTIFIERS = 'fuse_quantifiers'
+PASSES = (FACTOR_PREFIXES, MERGE_ALTERNATIONS,
+          FLATTEN_GROUPS, FUSE_QUANTIFIERS)
+
+
+class Change(NamedTuple):
+    """ A rewrite made by an optimizer pass."""
+    pass_name: str
+    group_id: int
+    description: str
+
+
+def same_leaf(a: ASTNode, b: ASTNode) -> bool:
+    """ Returns whether two nodes are leaves matching the same characters,
+    regardless of their quantifiers.
+    """
+    return isinstance(a, LeafNode) and type(a) is type(b) and a.match == b.match and \
+        getattr(a, 'is_positive_logic', True) == getattr(b, 'is_positive_logic', True)
+
+
+def join_alternatives(branches: List[ASTNode]) -> ASTNode:
+    """ Builds the alternation of some alternatives, nested as Pyrser does."""
+    node = branches[-1]
+    for branch in reversed(branches[:-1]):
+        node = OrNode(left=branch, right=node)
+    return node
+
+
+def group_like(group: GroupNode, children: Iterable[ASTNode]) -> GroupNode:
+    """ Returns a group with the capture of group and the passed children."""
+    return GroupNode(children=deque(children), capturing=group.is_capturing(),
+                     group_name=group.group_name, group_id=group.group_id)
+
+
+def fuse_literal_runs(ast: RE) -> RE:
+    """ Replaces the runs of consecutive non-quantified characters with
+    LiteralRun leaves, e.g. the 4 Elements of "peer" with a single one, so
+    that the backtracking engine matches each run with a single startswith.
+
+    The LiteralRun leaves are only understood by the backtracking engine,
+    the other matchers compile the AST with the single characters.
+
+    Args:
+        ast (RE): the regex AST, which is left unchanged
+
+    Returns:
+        RE: the AST with the literal runs
+    """
+    ast = copy.deepcopy(ast)
+    to_visit: List[ASTNode] = [ast.child]
+    while to_visit:
+        node = to_visit.pop()
+        if isinstance(node, OrNode):
+            to_visit.extend((node.left, node.right))
+            continue
+        if not isinstance(node, GroupNode):
+            continue
+        children = deque()
+        run: List[ASTNode] = []
+        for child in list(node.children) + [None]:
+            if child is not None and child.min == 1 and child.max == 1 and single_char(child) is not None:
+                run.append(child)
+                continue
+            if len(run) > 1:
+                children.append(LiteralRun(
+                    ''.join(single_char(leaf) for leaf in run)))
+            else:
+                children.extend(run)
+            run = []
+            if child is not None:
+                children.append(child)
+                to_visit.append(child)
+        node.children = children
+    return ast
+
+
+class Optimizer:
+    """ Pipeline of rewrites of a regex AST.
+
+    Args:
+        passes (Iterable[str]): the passes to run, among PASSES, which always
+            run in the order of PASSES (default is PASSES)
+    """
+
+    def __init__(self, passes: Iterable[str] = PASSES) -> None:
+        passes = set(passes)
+        for pass_name in passes:
+            if pass_name not in PASSES:
+                raise Exception(f"Unknown optimizer pass '{pass_name}'.")
+        self.passes: Tuple[str, ...] = tuple(
+            pass_name for pass_name in PASSES if pass_name in passes)
+
+    def optimize(self, ast: RE) -> Tuple[RE, List[Change]]:
+        """ Optimizes a regex AST.
+
+        Args:
+            ast (RE): the regex AST, which is left unchanged
+
+        Returns:
+            Tuple[RE, List[Change]]: the optimized AST, and the changes made
+            by the passes, in the order they were made
+        """
+        ast = copy.deepcopy(ast)
+        changes: List[Change] = []
+        rewrites = {
+            FACTOR_PREFIXES: self.__factor_prefixes__,
+            MERGE_ALTERNATIONS: self.__merge_alternations__,
+            FLATTEN_GROUPS: self.__flatten_groups__,
+            FUSE_QUANTIFIERS: self.__fuse_quantifiers__,
+        }
+        for pass_name in self.passes:
+            rewrite = rewrites[pass_name]
+            ast.child = self.__rewrite__(
+                ast.child, lambda node: rewrite(node, ast, changes))
+            ast.children = deque([ast.child])
+        return ast, changes
+
+    def __rewrite__(self, node: ASTNode, rewrite: Callable[[ASTNode], ASTNode]) -> ASTNode:
+        """ Applies a rewrite to the nodes of a subtree, children first.
+
+        The nested OrNodes of an alternation are rewritten as a whole.
+        """
+        if isinstance(node, OrNode):
+            alternation = node
+            while True:
+                alternation.left = self.__rewrite__(alternation.left, rewrite)
+                right = alternation.right
+                if isinstance(right, OrNode) and right.min == 1 and right.max == 1:
+                    alternation = right
+                    continue
+                alternation.right = self.__rewrite__(right, rewrite)
+                break
+            alternation = node
+            while isinstance(alternation, OrNode):
+                alternation.children = [alternation.left, alternation.right]
+                alternation = alternation.right
+        elif isinstance(node, GroupNode):
+            node.children = deque(self.__rewrite__(child, rewrite)
+                                  for child in node.children)
+        return rewrite(node)
+
+    def __factor_prefixes__(self, node: ASTNode, ast: RE, changes: List[Change]) -> ASTNode:
+        """ Factors the leaves every alternative starts with out of an
+        alternation.
+        """
+        if not isinstance(node, OrNode):
+            return node
+        branches = alternatives(node)
+        if not all(isinstance(branch, GroupNode) for branch in branches):
+            return node
+        children = [list(branch.children) for branch in branches]
+        k = 0
+        while all(len(branch_children) > k and same_leaf(branch_children[k], children[0][k])
+                  and branch_children[k].min == children[0][k].min and branch_children[k].max == children[0][k].max
+                  for branch_children in children):
+            k += 1
+        if k == 0:
+            return node
+        suffixes = [branch_children[k:] for branch_children in children]
+        # the Aho-Corasick automaton matching an alternation of literals
+        # already shares their prefixes, unless the suffixes become a class
+        if node is ast.child and literal_alternatives(ast) is not None and \
+                not all(len(suffix) == 1 for suffix in suffixes):
+            return node
+
+        first = branches[0]
+        if all(not suffix for suffix in suffixes):
+            group = group_like(first, children[0])
+        else:
+            inner = join_alternatives([
+                GroupNode(children=deque(suffix), capturing=False,
+                          group_name=first.group_name, group_id=first.group_id)
+                for suffix in suffixes])
+            group = group_like(first, children[0][:k] + [inner])
+        group.min, group.max = node.min, node.max
+        changes.append(Change(FACTOR_PREFIXES, first.group_id,
+                              f"factored {k} leaves out of the {len(branches)} alternatives of group {first.group_id}"))
+        return group
+
+    def __merge_alternations__(self, node: ASTNode, ast: RE, changes: List[Change]) -> ASTNode:
+        """ Replaces an alternation of single characters with a character
+        class.
+        """
+        if not isinstance(node, OrNode):
+            return node
+        branches = alternatives(node)
+        chars = CharClass()
+        for branch in branches:
+            if not isinstance(branch, GroupNode) or len(branch.children) != 1:
+                return node
+            child = branch.children[0]
+            if child.min != 1 or child.max != 1:
+                return node
+            ch = single_char(child)
+            if ch is not None:
+                chars |= CharClass.from_chars(ch)
+            elif isinstance(child, RangeElement) and child.is_positive_logic:
+                chars |= child.match
+            else:
+                return node
+
+        first = branches[0]
+        leaf = Element(match_ch=next(iter(chars))) if len(chars) == 1 else \
+            RangeElement(match_str=chars)
+        group = group_like(first, [leaf])
+        group.min, group.max = node.min, node.max
+        changes.append(Change(MERGE_ALTERNATIONS, first.group_id,
+                              f"merged the {len(branches)} alternatives of group {first.group_id} into a character class"))
+        return group
+
+    def __flatten_groups__(self, node: ASTNode, ast: RE, changes: List[Change]) -> ASTNode:
+        """ Removes the non-capturing groups that only wrap their children."""
+        if not isinstance(node, GroupNode):
+            return node
+        children = deque()
+        for child in node.children:
+            if not isinstance(child, GroupNode) or child.is_capturing():
+                children.append(child)
+            elif child.min == 1 and child.max == 1:
+                children.extend(child.children)
+                changes.append(Change(FLATTEN_GROUPS, node.group_id,
+                                      f"spliced a non-capturing group into group {node.group_id}"))
+            elif len(child.children) == 1 and child.children[0].min == 1 and child.children[0].max == 1:
+                grandchild = child.children[0]
+                grandchild.min, grandchild.max = child.min, child.max
+                children.append(grandchild)
+                changes.append(Change(FLATTEN_GROUPS, node.group_id,
+                                      f"moved the quantifier of a non-capturing group of group {node.group_id} onto its only child"))
+            else:
+                children.append(child)
+        node.children = children
+        return node
+
+    def __fuse_quantifiers__(self, node: ASTNode, ast: RE, changes: List[Change]) -> ASTNode:
+        """ Fuses the adjacent quantified copies of a leaf into one."""
+        if not isinstance(node, GroupNode):
+            return node
+        children = deque()
+        for child in node.children:
+            prev = children[-1] if children else None
+            if prev is not None and same_leaf(prev, child) and \
+                    not isinstance(child, (StartElement, EndElement)) and \
+                    (prev.min, prev.max, child.min, child.max) != (1, 1, 1, 1):
+                prev.min, prev.max = prev.min + child.min, prev.max + child.max
+                changes.append(Change(FUSE_QUANTIFIERS, node.group_id,
+                                      f"fused adjacent quantifiers of group {node.group_id}"))
+            else:
+                children.append(child)
+        node.children = children
+        return node
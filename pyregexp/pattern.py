@@ -0,0 +1,440 @@
+"""Module containing the Pattern class.
+
+A Pattern is a regex compiled once into a Program, that can then be matched
+against any number of test strings without parsing the regex again.
+Patterns are matched by the PikeVM, so they return the leftmost-longest
+match. Regexes that are plain sequences of quantified leaves are matched by
+the faster BitParallelMatcher instead, and the regexes that are, as a
+whole, alternations of literals by the AlternationMatcher, with the same
+results.
+
+Example:
+    Compiling a regex and matching it::
+
+        pattern = compile(r"(?<num>[0-9]+)")
+        matches = pattern.search("error: 1234")
+        if matches is not None:
+            print(matches[0].match)  # the whole match
+"""
+
+
+from threading import Lock
+from typing import Callable, Deque, Iterator, List, Tuple, Union
+import unicodedata
+from .ahocorasick import AlternationMatcher
+from .analysis import PrefixScanner, RequiredLiterals, anchored_start, match_length_bounds
+from .bitparallel import BitParallelMatcher
+from .dfa import DFAMatcher, DFACacheInfo, DEFAULT_MAX_STATES
+from .match import Match
+from .pikevm import PikeVM
+from .optimizer import Change, Optimizer, fuse_literal_runs
+from .program import Compiler, Program
+from .pyrser import Pyrser
+from .re_ast import RE
+from .redos import ReDoSRisk, redos_risks
+
+
+def normalize_re(re: str, ignore_case: int) -> str:
+    """ Normalizes a regex according to the ignore_case flag.
+
+    Args:
+        re (str): the regular expression
+        ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
+            case ignoring is performed, when 2 casefolding is performed
+
+    Returns:
+        str: the normalized regex
+    """
+    if ignore_case == 1:
+        return unicodedata.normalize("NFKD", re).lower()
+    elif ignore_case == 2:
+        return unicodedata.normalize("NFKD", re).casefold()
+    return re
+
+
+def normalize_string(string: Union[str, bytes], ignore_case: int) -> Union[str, bytes]:
+    """ Normalizes a test string according to the ignore_case flag.
+
+    Args:
+        string (Union[str, bytes]): the test string, a str or a bytes-like
+            object
+        ignore_case (int): when 0 the case is not ignored, when 1 or 2 the
+            string is casefolded, only the ASCII letters of a bytes-like
+            string are lowered
+
+    Returns:
+        Union[str, bytes]: the normalized test string
+    """
+    if ignore_case == 1 or ignore_case == 2:
+        if not isinstance(string, str):
+            return bytes(string).lower()
+        return unicodedata.normalize("NFKD", string).casefold()
+    return string
+
+
+def clamp_pos(string: Union[str, bytes], pos: int) -> int:
+    """ Clamps a start index to the test string, as Python's re does.
+
+    Args:
+        string (Union[str, bytes]): the test string
+        pos (int): the index, a negative one means 0, and one beyond the end
+            of the string means its end
+
+    Returns:
+        int: the index, between 0 and len(string)
+    """
+    return min(max(pos, 0), len(string))
+
+
+def iter_matches(search: Callable[[str, int], Tuple[bool, int, Deque[Match]]], string: str, pos: int = 0, continue_after_match: bool = True) -> Iterator[Tuple[int, Deque[Match]]]:
+    """ Iterates over the matches found by a search function.
+
+    Each search resumes from the end index of the previous match, and the
+    iteration stops when a search fails or does not go past the previous
+    end index, e.g. because it found an empty match.
+
+    Args:
+        search (Callable[[str, int], Tuple[bool, int, Deque[Match]]]): the
+            function searching a match from an index of the test string, e.g.
+            PikeVM.search
+        string (str): the test string, already normalized
+        pos (int): the index from which the first search starts
+            (default is 0)
+        continue_after_match (bool): if False only the first match is
+            searched (default is True)
+
+    Yields:
+        Tuple[int, Deque[Match]]: the end index of the match, and its deque of
+        Match
+    """
+    res, consumed, matches = search(string, pos)
+    if not res:
+        return
+    highest_matched_idx = consumed
+    yield consumed, matches
+
+    if not continue_after_match or not consumed > pos:
+        return
+
+    while True:
+        res, consumed, matches = search(string, consumed)
+        # if consumed is not greater than highest_matched_idx this means the
+        # new match consumed 0 characters, so there is nothing more to match
+        if not res or consumed <= highest_matched_idx:
+            return
+        highest_matched_idx = consumed
+        yield consumed, matches
+
+
+class Pattern:
+    """ A compiled regular expression.
+
+    The ignore_case flag may cause unexpected results in the returned matches
+    indexes, e.g. when the character ẞ is present in either the regex or the
+    test string, as the test string is normalized before being matched.
+
+    Matching does not modify a Pattern, apart from the caches of its lazy
+    DFA, which are safe to share, so a Pattern can be matched from many
+    threads at once: the state of each match lives in the call.
+
+    A bytes regex compiles to a byte-level Program, and is matched against
+    bytes, bytearray and memoryview test strings, which are indexed directly
+    without being decoded: the Match objects hold slices of the test string,
+    that do not copy it when it is a memoryview.
+
+    Args:
+        re (Union[str, bytes]): the regular expression
+        ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
+            case ignoring is performed, when 2 casefolding is performed.
+            (default is 0)
+        ast (RE): the already parsed and normalized regex, if None the regex
+            is parsed (default is None)
+        dfa_max_states (int): the maximum number of states cached by the
+            lazy DFA (default is DEFAULT_MAX_STATES)
+        optimizer (Optimizer): the optimizer rewriting the AST before it is
+            compiled for the automaton engines, the backtracking engine
+            matches the regex as written. If None all its passes run
+            (default is None)
+    """
+
+    def __init__(self, re: Union[str, bytes], ignore_case: int = 0, ast: RE = None, dfa_max_states: int = DEFAULT_MAX_STATES, optimizer: Optimizer = None) -> None:
+        self.re: Union[str, bytes] = re
+        self.ignore_case: int = ignore_case
+        # whether the regex matches bytes-like test strings
+        self.byte_level: bool = not isinstance(re, str)
+        if ast is None:
+            if self.byte_level:
+                # each byte of the regex is parsed as a latin-1 character
+                ast = Pyrser().parse(re=bytes(normalize_string(re, ignore_case)).decode('latin-1'))
+            else:
+                ast = Pyrser().parse(re=normalize_re(re, ignore_case))
+        # the constructs that can make the backtracking engine slow, found
+        # in the regex as written, which the optimizer can hide
+        self.redos_risks: List[ReDoSRisk] = redos_risks(ast)
+        if optimizer is None:
+            optimizer = Optimizer()
+        # the rewrites made by the optimizer passes
+        self.optimizations: List[Change]
+        self.ast, self.optimizations = optimizer.optimize(ast)
+        # the AST matched by the backtracking engine, with LiteralRun leaves:
+        # the regex as written, since the matches the backtracking engine
+        # returns depend on the shape of the AST, which the passes change
+        self.backtracking_ast: RE = fuse_literal_runs(ast)
+        self.program: Program = Compiler().compile(
+            self.ast, byte_level=self.byte_level)
+        self.prefix_scanner: Union[PrefixScanner, None] = PrefixScanner.from_ast(
+            self.ast, self.byte_level)
+        self.prefilter: Union[RequiredLiterals, None] = RequiredLiterals.from_ast(
+            self.ast, self.prefix_scanner, self.byte_level)
+        # the length of every match is between min_len and max_len
+        self.min_len, self.max_len = match_length_bounds(self.ast)
+        # whether the regex can only match at the start of the test string
+        self.anchored_start: bool = anchored_start(self.ast)
+        self.vm: PikeVM = PikeVM(
+            self.program, self.prefix_scanner, self.anchored_start)
+        # replace both the PikeVM and the DFA when the regex supports them
+        self.bit_parallel: Union[BitParallelMatcher, None] = BitParallelMatcher.from_ast(
+            self.ast)
+        self.alternation: Union[AlternationMatcher, None] = None
+        if self.prefix_scanner is not None and self.prefix_scanner.automaton is not None:
+            self.alternation = AlternationMatcher.from_ast(
+                self.ast, self.prefix_scanner.automaton)
+        self.dfa_max_states: int = dfa_max_states
+        self.__dfa__: DFAMatcher = None
+        self.__dfa_lock__: Lock = Lock()
+
+    def __getstate__(self) -> dict:
+        """ Returns the state to pickle, without the lazy DFA, which is
+        rebuilt on demand, and its lock.
+        """
+        state = self.__dict__.copy()
+        del state['__dfa__'], state['__dfa_lock__']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.__dfa__ = None
+        self.__dfa_lock__ = Lock()
+
+    @property
+    def dfa(self) -> DFAMatcher:
+        """ The lazy DFA of the regex, built on first use."""
+        if self.__dfa__ is None:
+            with self.__dfa_lock__:
+                # another thread may have built it meanwhile
+                if self.__dfa__ is None:
+                    self.__dfa__ = DFAMatcher(
+                        self.ast, self.dfa_max_states, self.prefix_scanner, self.anchored_start, self.byte_level)
+        return self.__dfa__
+
+    @property
+    def searcher(self) -> Union[BitParallelMatcher, AlternationMatcher, PikeVM]:
+        """ The matcher used when the groups are needed."""
+        if self.bit_parallel is not None:
+            return self.bit_parallel
+        if self.alternation is not None:
+            return self.alternation
+        return self.vm
+
+    @property
+    def matcher(self) -> Union[BitParallelMatcher, AlternationMatcher, DFAMatcher]:
+        """ The matcher used when the groups are not needed."""
+        if self.bit_parallel is not None:
+            return self.bit_parallel
+        if self.alternation is not None:
+            return self.alternation
+        return self.dfa
+
+    def search_fnc(self, string: Union[str, bytes]) -> Callable[[str, int], Tuple[bool, int, Deque[Match]]]:
+        """ Returns the search function of the successive searches of a test
+        string, e.g. by finditer.
+
+        The match starts of the bit-parallel matcher are computed once for all
+        the searches, instead of at each search.
+
+        Args:
+            string (Union[str, bytes]): the test string, already normalized
+
+        Returns:
+            Callable[[str, int], Tuple[bool, int, Deque[Match]]]: the function
+            searching a match of the test string from an index
+        """
+        searcher = self.searcher
+        if searcher is not self.bit_parallel:
+            return searcher.search
+        starts = searcher.match_starts(string)
+
+        def search(string: str, start_idx: int) -> Tuple[bool, int, Deque[Match]]:
+            return searcher.search(string, start_idx, starts=starts)
+        return search
+
+    def dfa_cache_info(self) -> Union[DFACacheInfo, None]:
+        """ Returns the statistics of the lazy DFA.
+
+        Returns:
+            Union[DFACacheInfo, None]: the hits, misses, size, maximum size
+            and flushes of the DFA states cache, None if the DFA was never
+            used
+        """
+        return self.__dfa__.cache_info() if self.__dfa__ is not None else None
+
+    def prefilters(self) -> List[str]:
+        """ Describes the prefilters chosen for the regex.
+
+        Returns:
+            List[str]: the description of each prefilter used, e.g.
+            "prefix 'error: '", "first chars 'abc'" or
+            "required literals ['timeout=', 'ms']"
+        """
+        result = []
+        if self.prefix_scanner is not None:
+            if self.prefix_scanner.automaton is not None:
+                result.append(
+                    f"alternatives {self.prefix_scanner.automaton.literals!r}")
+            elif self.prefix_scanner.prefix:
+                result.append(f"prefix {self.prefix_scanner.prefix!r}")
+            else:
+                result.append(
+                    f"first chars {self.prefix_scanner.chars_repr()}")
+        if self.prefilter is not None:
+            result.append(f"required literals {self.prefilter.literals!r}")
+        return result
+
+    def normalize(self, string: Union[str, bytes]) -> Union[str, bytes]:
+        """ Normalizes a test string according to the ignore_case flag, after
+        checking that its type suits the regex.
+        """
+        if isinstance(string, str) == self.byte_level:
+            if self.byte_level:
+                raise Exception(
+                    "Cannot match a bytes regex against a str test string.")
+            raise Exception(
+                "Cannot match a str regex against a bytes-like test string.")
+        return normalize_string(string, self.ignore_case)
+
+    def may_match(self, string: Union[str, bytes]) -> bool:
+        """ Returns False if the string is too short or the prefilter excludes
+        a match in it.
+
+        The string must be already normalized.
+        """
+        if len(string) < self.min_len:
+            return False
+        return self.prefilter is None or self.prefilter.check(string)
+
+    def match(self, string: Union[str, bytes], pos: int = 0) -> Union[Deque[Match], None]:
+        """ Matches the regex at the start of the test string.
+
+        Args:
+            string (Union[str, bytes]): the test string
+            pos (int): the index where the match must start (default is 0)
+
+        Returns:
+            Union[Deque[Match], None]: None if there is no match, otherwise a
+            deque of Match containing in the first position the whole match,
+            and in the subsequent positions the groups matched
+        """
+        string = self.normalize(string)
+        pos = clamp_pos(string, pos)
+        if not self.may_match(string):
+            return None
+        res, _, matches = self.searcher.search(string, pos, anchored=True)
+        return matches if res else None
+
+    def search(self, string: Union[str, bytes], pos: int = 0) -> Union[Deque[Match], None]:
+        """ Searches the leftmost-longest match in the test string.
+
+        Args:
+            string (Union[str, bytes]): the test string
+            pos (int): the index from which the search starts (default is 0)
+
+        Returns:
+            Union[Deque[Match], None]: None if there is no match, otherwise a
+            deque of Match containing in the first position the whole match,
+            and in the subsequent positions the groups matched
+        """
+        string = self.normalize(string)
+        pos = clamp_pos(string, pos)
+        if not self.may_match(string):
+            return None
+        res, _, matches = self.searcher.search(string, pos)
+        return matches if res else None
+
+    def fullmatch(self, string: Union[str, bytes], pos: int = 0) -> Union[Deque[Match], None]:
+        """ Matches the regex against the whole test string.
+
+        Args:
+            string (Union[str, bytes]): the test string
+            pos (int): the index where the match must start (default is 0)
+
+        Returns:
+            Union[Deque[Match], None]: None if the regex does not match the
+            whole test string (from pos), otherwise a deque of Match
+            containing in the first position the whole match, and in the
+            subsequent positions the groups matched
+        """
+        string = self.normalize(string)
+        pos = clamp_pos(string, pos)
+        if not self.may_match(string):
+            return None
+        res, end_idx, matches = self.searcher.search(
+            string, pos, anchored=True)
+        # the longest match reaches the end of the string if any match does
+        return matches if res and end_idx == len(string) else None
+
+    def finditer(self, string: Union[str, bytes], pos: int = 0) -> Iterator[Deque[Match]]:
+        """ Iterates over the successive matches in the test string.
+
+        Each match is searched from the end index of the previous one, only
+        when the previous one has been consumed.
+
+        Args:
+            string (Union[str, bytes]): the test string
+            pos (int): the index from which the search starts (default is 0)
+
+        Yields:
+            Deque[Match]: the matches of a substring, the whole match in the
+            first position, and in the subsequent positions the groups matched
+        """
+        string = self.normalize(string)
+        pos = clamp_pos(string, pos)
+        if not self.may_match(string):
+            return
+        for _, matches in iter_matches(self.search_fnc(string), string, pos):
+            yield matches
+
+    def is_match(self, string: Union[str, bytes], pos: int = 0) -> bool:
+        """ Returns whether the regex matches somewhere in the test string.
+
+        The lazy DFA, or the bit-parallel matcher, is used, so no group is
+        tracked.
+
+        Args:
+            string (Union[str, bytes]): the test string
+            pos (int): the index from which the search starts (default is 0)
+
+        Returns:
+            bool: True if there is a match, False otherwise
+        """
+        string = self.normalize(string)
+        pos = clamp_pos(string, pos)
+        return self.may_match(string) and self.matcher.is_match(string, pos)
+
+
+def compile(re: Union[str, bytes], ignore_case: int = 0, optimizer: Optimizer = None) -> Pattern:
+    """ Compiles a regular expression into a Pattern.
+
+    Args:
+        re (Union[str, bytes]): the regular expression, a bytes regex matches
+            bytes-like test strings
+        ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
+            case ignoring is performed, when 2 casefolding is performed.
+            (default is 0)
+        optimizer (Optimizer): the optimizer rewriting the AST before it is
+            compiled for the automaton engines, if None all its passes run
+            (default is None)
+
+    Returns:
+        Pattern: the compiled regex
+    """
+    return Pattern(re, ignore_case, optimizer=optimizer)
@@ -0,0 +1,274 @@
+"""Module containing the PikeVM class.
+
+The PikeVM class simulates a regex Program (a Thompson NFA) running all the
+possible matching paths in lockstep, so that the test string is scanned once
+and the running time is bounded by O(len(program) * len(string)), whatever
+the regex is.
+
+The PikeVM implements leftmost-longest semantics: among the matches starting
+at the leftmost possible index, the longest one is returned. Quantifiers are
+greedy, so capturing groups are the ones of the greediest path leading to
+that match.
+
+Example:
+    Searching a regex in some test string::
+
+        vm = PikeVM(Compiler().compile(Pyrser().parse(r"a+bx")))
+        result, end_idx, matches = vm.search("aabx")
+"""
+
+
+from collections import deque
+from typing import Deque, List, NamedTuple, Tuple, Union
+from .analysis import PrefixScanner
+from .match import Match
+from .program import Program, CHAR, ANY, SPACE, CLASS, SPLIT, JMP, SAVE, ASSERT_START, ASSERT_END, MATCH
+
+
+class ScanState(NamedTuple):
+    """ The state of a non final scan at the end of its test string.
+
+    A scan resumed from it, once more characters are appended to the test
+    string, only steps the threads over the new characters.
+    """
+    # the end of the test string, where the threads are
+    str_i: int
+    # the start_idx and anchored arguments of the scan
+    start_idx: int
+    anchored: bool
+    # the threads alive at str_i, in priority order
+    threads: List[Tuple[int, List[int]]]
+    # the capture slots and the start index of the best match found so far
+    best_caps: Union[List[int], None]
+    best_start: int
+
+    def shifted(self, offset: int) -> 'ScanState':
+        """ Returns the state with its indexes decreased by offset, for a test
+        string whose first offset characters were dropped.
+        """
+        def shift(caps: List[int]) -> List[int]:
+            return [idx - offset if idx != -1 else -1 for idx in caps]
+        return ScanState(self.str_i - offset, self.start_idx - offset, self.anchored,
+                         [(pc, shift(caps)) for pc, caps in self.threads],
+                         shift(self.best_caps) if self.best_caps is not None else None,
+                         self.best_start - offset if self.best_start != -1 else -1)
+
+
+class PikeVM:
+    """ Pike Virtual Machine.
+
+    Runs a Program against test strings.
+
+    Args:
+        program (Program): the program to run
+        prefix_scanner (PrefixScanner): if not None, used to skip the indexes
+            where a match cannot start (default is None)
+        anchored_start (bool): if True the program can only match at the start
+            of the test string, so no other start index is tried
+            (default is False)
+    """
+
+    def __init__(self, program: Program, prefix_scanner: PrefixScanner = None, anchored_start: bool = False) -> None:
+        self.program: Program = program
+        self.prefix_scanner: Union[PrefixScanner, None] = prefix_scanner
+        self.anchored_start: bool = anchored_start
+
+    def search(self, string: str, start_idx: int = 0, anchored: bool = False) -> Tuple[bool, int, Deque[Match]]:
+        """ Searches the leftmost-longest match in the test string.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+            anchored (bool): if True the match must start at start_idx
+                (default is False)
+
+        Returns:
+            A tuple containing whether a match was found or not, the end index
+            of the match, and the deque of Match, where the first element is
+            the whole match and the subsequent ones are the groups matched.
+        """
+        best_caps, _, _ = self.scan(string, start_idx, anchored)
+        if best_caps is None:
+            return False, start_idx, deque()
+        return True, best_caps[1], self.build_matches(best_caps, string)
+
+    def scan(self, string: str, start_idx: int = 0, anchored: bool = False, final: bool = True, state: ScanState = None) -> Tuple[Union[List[int], None], int, Union[ScanState, None]]:
+        """ Runs the threads searching the leftmost-longest match.
+
+        Args:
+            string (str): the test string
+            start_idx (int): the index from which the search starts
+                (default is 0)
+            anchored (bool): if True the match must start at start_idx
+                (default is False)
+            final (bool): if False the test string is a prefix of the input,
+                so $ does not match at its end, and the threads still alive
+                at its end are reported instead of being discarded
+                (default is True)
+            state (ScanState): if not None, the state of a non final scan of
+                a prefix of the test string, which the scan resumes from
+                instead of starting at start_idx (default is None)
+
+        Returns:
+            A tuple containing the capture slots of the match, None if no
+            match was found, the lowest start index of the threads alive at
+            the end of a non final test string that could still lead to a
+            match preferred to the one found, -1 if there is none, and the
+            state to resume a non final scan from, None if final is True.
+        """
+
+        if state is not None:
+            start_idx, anchored = state.start_idx, state.anchored
+        elif self.anchored_start:
+            if start_idx > 0:
+                return None, -1, None
+            anchored = True
+
+        program = self.program
+        ops, args, xs, ys = program.ops, program.args, program.xs, program.ys
+        n_slots = program.n_slots
+        str_len = len(string)
+
+        # marks[pc] == generation means pc was already reached at the current
+        # string index, and the thread reaching it again is discarded
+        marks = [-1] * len(ops)
+
+        def add_thread(threads: List[Tuple[int, List[int]]], generation: int, pc: int, caps: List[int], str_i: int) -> None:
+            """ Adds a thread following the non-consuming instructions.
+
+            The threads are explored in priority order, and a program counter
+            already reached by a higher priority thread is discarded.
+            """
+            stack = [(pc, caps)]
+            while stack:
+                pc, caps = stack.pop()
+                if marks[pc] == generation:
+                    continue
+                marks[pc] = generation
+                op = ops[pc]
+                if op == JMP:
+                    stack.append((xs[pc], caps))
+                elif op == SPLIT:
+                    stack.append((ys[pc], caps))
+                    stack.append((xs[pc], caps))
+                elif op == SAVE:
+                    caps = caps[:]
+                    caps[args[pc]] = str_i
+                    stack.append((pc + 1, caps))
+                elif op == ASSERT_START:
+                    if str_i == 0:
+                        stack.append((pc + 1, caps))
+                elif op == ASSERT_END:
+                    if str_i == str_len:
+                        if final:
+                            stack.append((pc + 1, caps))
+                        else:
+                            # $ is pending until the end of the input is known
+                            threads.append((pc, caps))
+                else:
+                    threads.append((pc, caps))
+
+        find = None
+        # the prefix may be cut at the end of a non final test string
+        if self.prefix_scanner is not None and not anchored and final:
+            find = self.prefix_scanner.finder(string)
+
+        # the whole match is group 0, so caps[0] is where a thread started
+        best_caps: List[int] = None
+        best_start = -1
+        alive_start = -1
+        # the threads alive at the end of a non final test string
+        alive: List[Tuple[int, List[int]]] = []
+        clist: List[Tuple[int, List[int]]] = []
+        str_i = start_idx
+        resumed = state is not None
+        if resumed:
+            str_i = state.str_i
+            best_caps, best_start = state.best_caps, state.best_start
+            # the threads are added again, as $ may now match or not at str_i
+            for pc, caps in state.threads:
+                add_thread(clist, str_i, pc, caps, str_i)
+        while str_i <= str_len:
+            if find is not None and not clist and best_caps is None:
+                # no thread is alive, jump to where a match can start
+                str_i = find(str_i)
+                if str_i == -1:
+                    break
+            if resumed:
+                # the thread starting at str_i was added by the previous scan
+                resumed = False
+            elif best_caps is None and (not anchored or str_i == start_idx):
+                # a new thread starting at str_i has the lowest priority
+                add_thread(clist, str_i, 0, [-1] * n_slots, str_i)
+            if not clist:
+                if best_caps is not None or anchored:
+                    break
+                str_i += 1
+                continue
+
+            ch = string[str_i] if str_i < str_len else None
+            nlist: List[Tuple[int, List[int]]] = []
+            for pc, caps in clist:
+                thread_start = caps[0]
+                if best_caps is not None and thread_start > best_start:
+                    # a match starting before this thread was already found
+                    continue
+                op = ops[pc]
+                if op == MATCH:
+                    if best_caps is None or thread_start < best_start or caps[1] > best_caps[1]:
+                        best_caps = caps
+                        best_start = thread_start
+                    continue
+                if ch is None:
+                    if not final:
+                        alive.append((pc, caps))
+                        if alive_start == -1 or thread_start < alive_start:
+                            alive_start = thread_start
+                    continue
+                if op == CHAR:
+                    if ch != args[pc]:
+                        continue
+                elif op == ANY:
+                    if ch == '\n':
+                        continue
+                elif op == SPACE:
+                    if not ch.isspace():
+                        continue
+                elif op == CLASS:
+                    chars, positive = args[pc]
+                    if (ch in chars) != positive:
+                        continue
+                add_thread(nlist, str_i + 1, pc + 1, caps, str_i + 1)
+            clist = nlist
+            str_i += 1
+
+        if alive_start != -1 and best_caps is not None and alive_start > best_start:
+            alive_start = -1
+        if final:
+            return best_caps, alive_start, None
+        return best_caps, alive_start, ScanState(str_len, start_idx, anchored, alive, best_caps, best_start)
+
+    def build_matches(self, caps: List[int], string: str) -> Deque[Match]:
+        """ Builds the deque of Match from the capture slots.
+
+        The matches are ordered as the backtracking engine does, i.e. the whole
+        match first, and then the groups from the last to be completed to the
+        first.
+
+        Args:
+            caps (List[int]): the capture slots of the matching thread
+            string (str): the test string
+
+        Returns:
+            Deque[Match]: the matches of the groups that participated in the
+            match
+        """
+        program = self.program
+        matches: Deque[Match] = deque()
+        for group_id in program.group_order:
+            start_idx, end_idx = caps[2 * group_id], caps[2 * group_id + 1]
+            if start_idx != -1 and end_idx != -1:
+                matches.appendleft(
+                    Match(group_id, start_idx, end_idx, string, program.group_names[group_id]))
+        return matches
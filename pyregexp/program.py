@@ -0,0 +1,272 @@
+"""Module containing the NFA program representation of a regex.
+
+The Compiler class lowers the AST produced by the Pyrser into a flat list of
+Instructions, that is a Thompson NFA in the form used by Pike-style virtual
+machines.
+
+Example:
+    Compiling a regex into a program::
+
+        program = Compiler().compile(Pyrser().parse(r"a+bx"))
+"""
+
+
+import math
+from typing import Dict, FrozenSet, List, Tuple, Union
+from .charclass import CharClass
+from .re_ast import RE, ASTNode, GroupNode, OrNode, LeafNode, Element, WildcardElement, SpaceElement, RangeElement, StartElement, EndElement
+
+
+# opcodes of the program instructions
+CHAR = 0  # consumes the character stored in arg
+ANY = 1  # consumes any character but '\n'
+SPACE = 2  # consumes a whitespace character
+CLASS = 3  # consumes a character in (or not in) the set stored in arg
+SPLIT = 4  # forks the execution, x has priority over y
+JMP = 5  # jumps to x
+SAVE = 6  # saves the current string index in the capture slot arg
+ASSERT_START = 7  # succeeds only at the start of the test string
+ASSERT_END = 8  # succeeds only at the end of the test string
+MATCH = 9  # the regex matched, arg is the regex index in a set program
+
+OPCODE_NAMES = ['CHAR', 'ANY', 'SPACE', 'CLASS', 'SPLIT',
+                'JMP', 'SAVE', 'ASSERT_START', 'ASSERT_END', 'MATCH']
+
+# the bytes matched by \s in a byte-level program, as in Python re
+BYTE_SPACES: FrozenSet[int] = frozenset(b' \t\n\r\x0b\x0c')
+
+
+class Instruction:
+    """ A single instruction of a Program.
+
+    Args:
+        op (int): the opcode
+        arg: the opcode argument, e.g. the character to consume for CHAR, or
+            the slot to save for SAVE
+        x (int): the jump target for JMP, the first (preferred) target for SPLIT
+        y (int): the second target for SPLIT
+    """
+
+    def __init__(self, op: int, arg=None, x: int = -1, y: int = -1) -> None:
+        self.op: int = op
+        self.arg = arg
+        self.x: int = x
+        self.y: int = y
+
+    def __repr__(self) -> str:
+        if self.op == SPLIT:
+            return f"SPLIT {self.x}, {self.y}"
+        if self.op == JMP:
+            return f"JMP {self.x}"
+        if self.op == CLASS:
+            chars, positive = self.arg
+            if isinstance(chars, CharClass):
+                chars = str(chars)
+            else:
+                chars = bytes(sorted(chars)) if any(isinstance(ch, int) for ch in chars) else ''.join(sorted(chars))
+            return f"CLASS {'' if positive else '^'}{chars!r}"
+        if self.arg is not None:
+            return f"{OPCODE_NAMES[self.op]} {self.arg!r}"
+        return OPCODE_NAMES[self.op]
+
+
+class Program:
+    """ A compiled regex.
+
+    Contains the list of instructions and the information needed to rebuild
+    the capturing groups matches from the capture slots.
+    Programs are not meant to be modified after their creation.
+    Group i start and end indexes are saved in slots 2*i and 2*i+1.
+
+    Args:
+        instructions (List[Instruction]): the program instructions
+        n_groups (int): the number of capturing group ids
+        group_names (Dict[int, str]): the name of each capturing group
+        group_order (List[int]): the group ids in the order their matches are
+            completed by the backtracking engine, i.e. the order in which a
+            group closing parenthesis is found in the regex, the last one for
+            the groups closed by many alternatives
+    """
+
+    def __init__(self, instructions: List[Instruction], n_groups: int, group_names: Dict[int, str], group_order: List[int]) -> None:
+        self.instructions: List[Instruction] = instructions
+        # the instructions fields as flat lists, so that interpreters index
+        # plain lists instead of looking up the Instruction attributes
+        self.ops: List[int] = [inst.op for inst in instructions]
+        self.args: list = [inst.arg for inst in instructions]
+        self.xs: List[int] = [inst.x for inst in instructions]
+        self.ys: List[int] = [inst.y for inst in instructions]
+        self.n_groups: int = n_groups
+        self.n_slots: int = 2 * n_groups
+        self.group_names: Dict[int, str] = group_names
+        self.group_order: List[int] = group_order
+
+    def __len__(self) -> int:
+        return len(self.instructions)
+
+    def __repr__(self) -> str:
+        return '\n'.join(f"{i:>4} {inst!r}" for i, inst in enumerate(self.instructions))
+
+
+class Compiler:
+    """ Regex AST to NFA Program compiler.
+
+    Compiler instances lower the AST returned by the Pyrser into a Program.
+    """
+
+    def compile(self, ast: RE, reverse: bool = False, byte_level: bool = False) -> Program:
+        """ Compiles an AST.
+
+        Args:
+            ast (RE): the root node of the regular expression's AST
+            reverse (bool): if True the program matches the reversed regex
+                against the reversed test string, so ASSERT_START succeeds at
+                the end of the test string and ASSERT_END at its start
+                (default is False)
+            byte_level (bool): if True the program matches bytes-like test
+                strings, whose items are ints: the AST characters are the
+                bytes decoded as latin-1, CHAR and CLASS args hold their
+                ordinals, and ANY and SPACE are lowered to CLASS
+                (default is False)
+
+        Returns:
+            Program: the program corresponding to the AST
+        """
+        return self.__compile__([ast], reverse, False, byte_level)
+
+    def compile_set(self, asts: List[RE]) -> Program:
+        """ Compiles many ASTs into a single program matching any of them.
+
+        The program forks at its start into the program of each AST, and the
+        MATCH instruction of the i-th AST has i as arg. The capturing groups
+        of the ASTs share their slots, so they are not meaningful.
+
+        Args:
+            asts (List[RE]): the root nodes of the regular expressions' ASTs
+
+        Returns:
+            Program: the program corresponding to the set of ASTs
+        """
+        return self.__compile__(asts, False, True, False)
+
+    def __compile__(self, asts: List[RE], reverse: bool, indexed_matches: bool, byte_level: bool) -> Program:
+        """ Compiles a list of ASTs, see compile and compile_set."""
+        instructions: List[Instruction] = []
+        group_names: Dict[int, str] = {}
+        group_order: List[int] = []
+
+        def emit(op: int, arg=None, x: int = -1, y: int = -1) -> int:
+            instructions.append(Instruction(op, arg, x, y))
+            return len(instructions) - 1
+
+        def byte(ch: str) -> int:
+            if ord(ch) > 0xff:
+                raise Exception(f"The character {ch!r} is not a byte.")
+            return ord(ch)
+
+        def leaf_instruction(node: LeafNode) -> Tuple[int, object]:
+            if byte_level:
+                op, arg = char_instruction(node)
+                if op == CHAR:
+                    return CHAR, byte(arg)
+                if op == CLASS:
+                    chars, positive = arg
+                    # the characters out of the byte range match no byte
+                    return CLASS, (frozenset(code for code in range(0x100) if chr(code) in chars), positive)
+                if op == ANY:
+                    return CLASS, (frozenset(b'\n'), False)
+                if op == SPACE:
+                    return CLASS, (BYTE_SPACES, True)
+                return op, arg
+            return char_instruction(node)
+
+        def char_instruction(node: LeafNode) -> Tuple[int, object]:
+            if isinstance(node, StartElement):
+                return (ASSERT_END if reverse else ASSERT_START), None
+            if isinstance(node, EndElement):
+                return (ASSERT_START if reverse else ASSERT_END), None
+            if isinstance(node, RangeElement):
+                return CLASS, (node.chars, node.is_positive_logic)
+            if isinstance(node, WildcardElement):
+                return ANY, None
+            if isinstance(node, SpaceElement):
+                return SPACE, None
+            if isinstance(node, Element):
+                return CHAR, node.match
+            raise Exception(f"Unable to compile node {type(node).__name__}.")
+
+        def compile_once(node: ASTNode) -> None:
+            if isinstance(node, RE):
+                compile_node(node.child)
+            elif isinstance(node, OrNode):
+                split = emit(SPLIT)
+                instructions[split].x = len(instructions)
+                compile_node(node.left)
+                jmp = emit(JMP)
+                instructions[split].y = len(instructions)
+                compile_node(node.right)
+                instructions[jmp].x = len(instructions)
+            elif isinstance(node, GroupNode):
+                capturing = node.is_capturing()
+                # the reversed program sees the group end before its start
+                start_slot, end_slot = 2 * node.group_id, 2 * node.group_id + 1
+                if reverse:
+                    start_slot, end_slot = end_slot, start_slot
+                if capturing:
+                    emit(SAVE, start_slot)
+                for child in (reversed(node.children) if reverse else node.children):
+                    compile_node(child)
+                if capturing:
+                    emit(SAVE, end_slot)
+                    if node.group_id not in group_names:
+                        group_names[node.group_id] = node.group_name
+                    else:
+                        # the alternatives of a group close it more than once,
+                        # its last closing is the one after its subgroups
+                        group_order.remove(node.group_id)
+                    group_order.append(node.group_id)
+            elif isinstance(node, LeafNode):
+                op, arg = leaf_instruction(node)
+                emit(op, arg)
+            else:
+                raise Exception(
+                    f"Unable to compile node {type(node).__name__}.")
+
+        def compile_node(node: ASTNode) -> None:
+            min_: Union[int, float] = getattr(node, 'min', 1)
+            max_: Union[int, float] = getattr(node, 'max', 1)
+
+            for _ in range(min_):
+                compile_once(node)
+
+            if max_ == math.inf:
+                # L: SPLIT body, out; body; JMP L
+                split = emit(SPLIT)
+                instructions[split].x = len(instructions)
+                compile_once(node)
+                emit(JMP, x=split)
+                instructions[split].y = len(instructions)
+            else:
+                # every optional repetition jumps straight to the end if skipped
+                splits = []
+                for _ in range(max_ - min_):
+                    split = emit(SPLIT)
+                    instructions[split].x = len(instructions)
+                    splits.append(split)
+                    compile_once(node)
+                for split in splits:
+                    instructions[split].y = len(instructions)
+
+        for i, ast in enumerate(asts):
+            split = -1
+            if i < len(asts) - 1:
+                # L: SPLIT ast, next; ast; MATCH; next: ...
+                split = emit(SPLIT)
+                instructions[split].x = len(instructions)
+            compile_node(ast)
+            emit(MATCH, i if indexed_matches else None)
+            if split != -1:
+                instructions[split].y = len(instructions)
+
+        n_groups = max(group_names.keys(), default=-1) + 1
+        return Program(instructions, n_groups, group_names, group_order)
@@ -1,6 +1,7 @@
-from typing import Union, Callable
+from typing import List, Tuple, Union, Callable
 import itertools
 import math
+from .charclass import CharClass
 from .lexer import Lexer
 from .tokens import *
 from .re_ast import *
@@ -28,14 +29,6 @@ class Pyrser:
             RE: the root node of the regular expression's AST
         """
 
-        def get_range_str(start: str, end: str) -> str:
-            result = ''
-            i = ord(start)
-            while i <= ord(end):
-                result += chr(i)
-                i += 1
-            return result
-
         def next_tkn_initializer(re: str) -> Callable[[bool], Union[Token, None]]:
             tokens = self.lxr.scan(re=re)
 
@@ -82,8 +75,9 @@ class Pyrser:
 
             if isinstance(curr_tkn, OrToken):
                 next_tkn()
+                # the alternatives share the group of the alternation
                 node = OrNode(left=node, right=parse_re_seq(
-                    group_name=node.group_name, group_id=node.group_id))
+                    capturing=capturing, group_name=node.group_name, group_id=node.group_id))
 
             return node
 
@@ -175,9 +169,10 @@ class Pyrser:
                 return parse_el()
 
         def parse_inner_el() -> RangeElement:
-            # parse_inner_el creates a single RangeElement with all the matches
+            # parse_inner_el creates a single RangeElement with all the matches,
+            # collected as intervals of code points
             nonlocal curr_tkn
-            match_str = ''
+            intervals: List[Tuple[int, int]] = []
             if curr_tkn is None:
                 raise Exception(
                     "Missing closing ']'.")
@@ -193,7 +188,7 @@ class Pyrser:
                     break
 
                 if isinstance(curr_tkn, SpaceToken):
-                    match_str += curr_tkn.char
+                    intervals.extend((ord(ch), ord(ch)) for ch in curr_tkn.char)
                     next_tkn()
                     continue
 
@@ -210,7 +205,8 @@ class Pyrser:
                     if isinstance(next_tkn(without_consuming=True), RightBracket) or isinstance(next_tkn(without_consuming=True), SpaceToken):
                         # we're in one of these scenarios: "<char>-]" "<char>-\s"
                         # the dash and previous character must be interpreted as single elements
-                        match_str += prev_char + curr_tkn.char
+                        intervals.extend((ord(ch), ord(ch))
+                                         for ch in prev_char + curr_tkn.char)
                     else:
                         # we're in the case of an actual range (or next_tkn is none)
                         next_tkn()  # curr_tkn is now the one after the dash
@@ -220,14 +216,14 @@ class Pyrser:
                             raise Exception(
                                 f"Range values reversed. Start '{prev_char}' char code is greater than end '{curr_tkn.char}' char code.")
                         else:
-                            match_str += get_range_str(prev_char,
-                                                       curr_tkn.char)
+                            intervals.append(
+                                (ord(prev_char), ord(curr_tkn.char)))
                 else:
-                    # no range, no missing ']', just a char to add to match_str
-                    match_str += curr_tkn.char
+                    # no range, no missing ']', just a char to add to the intervals
+                    intervals.append((ord(curr_tkn.char), ord(curr_tkn.char)))
                 next_tkn()
 
-            return RangeElement(match_str="".join(sorted(set(match_str))), is_positive_logic=positive_logic)
+            return RangeElement(match_str=CharClass(intervals), is_positive_logic=positive_logic)
 
         def parse_el() -> Union[Element, OrNode, GroupNode]:
             group_name: Union[str, None]
@@ -1,5 +1,6 @@
 from collections import deque
-from typing import Deque, List, Union
+from typing import Container, Deque, List, Union
+from .charclass import CharClass
 
 
 class ASTNode:
@@ -58,6 +59,27 @@ class LeafNode(ASTNode):
         """
         return False
 
+    def scan(self, string: str, str_i: int, end_i: int) -> int:
+        """
+        Returns the end of the run of characters matching the node.
+
+        The characters from str_i to end_i are matched one by one, until the
+        first one that does not match with the node.
+
+        Args:
+            string (str): the test string
+            str_i (int): the string index the run starts at
+            end_i (int): the string index the run can not go past
+
+        Returns:
+            int: the index of the first character not in the run, end_i if
+            all the characters match
+        """
+        str_len = len(string)
+        while str_i < end_i and self.is_match(ch=string[str_i], str_i=str_i, str_len=str_len):
+            str_i += 1
+        return str_i
+
 
 class Element(LeafNode):
     """ AST Element.
@@ -74,6 +96,12 @@ class Element(LeafNode):
     def is_match(self, ch: str = None, str_i: int = 0, str_len: int = 0) -> bool:
         return self.match == ch
 
+    def scan(self, string: str, str_i: int, end_i: int) -> int:
+        match = self.match
+        while str_i < end_i and string[str_i] == match:
+            str_i += 1
+        return str_i
+
 
 class WildcardElement(Element):
     """ AST WildcardElement.
@@ -88,6 +116,11 @@ class WildcardElement(Element):
     def is_match(self, ch: str = None, str_i: int = 0, str_len: int = 0) -> bool:
         return ch != '\n'
 
+    def scan(self, string: str, str_i: int, end_i: int) -> int:
+        # the run ends at the first newline
+        newline_i = string.find('\n', str_i, end_i)
+        return end_i if newline_i == -1 else newline_i
+
 
 class SpaceElement(Element):
     """ AST SpaceElement.
@@ -102,6 +135,11 @@ class SpaceElement(Element):
     def is_match(self, ch: str = None, str_i: int = 0, str_len: int = 0) -> bool:
         return ch.isspace() and len(ch) == 1
 
+    def scan(self, string: str, str_i: int, end_i: int) -> int:
+        while str_i < end_i and string[str_i].isspace():
+            str_i += 1
+        return str_i
+
 
 class RangeElement(LeafNode):
     """ AST RangeElement.
@@ -110,16 +148,79 @@ class RangeElement(LeafNode):
     that is that it matches with more than one character.
     """
 
-    def __init__(self, match_str: str, is_positive_logic: bool = True) -> None:
+    def __init__(self, match_str: Union[str, CharClass], is_positive_logic: bool = True) -> None:
         super().__init__()
-        self.match: str = match_str
+        # a str gives the characters of the class one by one
+        self.match: CharClass = match_str if isinstance(
+            match_str, CharClass) else CharClass.from_chars(match_str)
         self.min: Union[int, float] = 1
         self.max: Union[int, float] = 1
         self.is_positive_logic: bool = is_positive_logic
+        # the characters of the small classes are looked up in a frozenset
+        self.chars: Container[str] = self.match.chars if self.match.chars is not None else self.match
 
     def is_match(self, ch: str = None, str_i: int = 0, str_len: int = 0) -> bool:
         # XNOR of whether the ch is found and the logic (positive/negative)
-        return not((ch in self.match) ^ self.is_positive_logic)
+        return not((ch in self.chars) ^ self.is_positive_logic)
+
+    def scan(self, string: str, str_i: int, end_i: int) -> int:
+        chars = self.chars
+        if self.is_positive_logic:
+            while str_i < end_i and string[str_i] in chars:
+                str_i += 1
+        else:
+            while str_i < end_i and string[str_i] not in chars:
+                str_i += 1
+        return str_i
+
+
+class LiteralRun(LeafNode):
+    """ AST LiteralRun.
+
+    Specialization of the LeafNode class modeling a run of consecutive
+    non-quantified Elements, matched as a whole by the backtracking engine.
+    """
+
+    def __init__(self, match_str: str) -> None:
+        super().__init__()
+        self.match: str = match_str
+        self.min: Union[int, float] = 1
+        self.max: Union[int, float] = 1
+
+    def is_match(self, ch: str = None, str_i: int = 0, str_len: int = 0) -> bool:
+        return self.match == ch
+
+    def match_at(self, string: str, str_i: int) -> bool:
+        """ Returns whether the run occurs in the string at str_i.
+
+        Args:
+            string (str): the test string
+            str_i (int): the string index
+
+        Returns:
+            bool: True if the string starts with the run at str_i
+        """
+        return string.startswith(self.match, str_i)
+
+    def scan(self, string: str, str_i: int, end_i: int) -> int:
+        """
+        Returns the end of the longest prefix of the run matched at str_i.
+
+        Args:
+            string (str): the test string
+            str_i (int): the string index the run starts at
+            end_i (int): the string index the run can not go past
+
+        Returns:
+            int: the index of the first character not matching the run, or
+            the end of the run if all its characters match
+        """
+        match = self.match
+        end_i = min(end_i, str_i + len(match))
+        k = str_i
+        while k < end_i and string[k] == match[k - str_i]:
+            k += 1
+        return k
 
 
 class StartElement(LeafNode):
@@ -0,0 +1,315 @@
+"""Module containing the static ReDoS analysis of a regex AST.
+
+The backtracking engine can take a time exponential in the length of the
+test string on regexes that match the same substring in many ways, e.g.
+"(a+)+", "(a|aa)*" or "(.*)*", when the match eventually fails. The
+redos_risks function finds, without running the regex, the constructs that
+can cause such a blow up:
+
+- NESTED_QUANTIFIERS: an unbounded quantifier repeating a group that itself
+  contains an unbounded, or wide range, quantifier, e.g. "(a+)+" or
+  "(a{1,10})*", so that a substring can be split among the iterations in
+  many ways;
+- AMBIGUOUS_ALTERNATION: an unbounded quantifier repeating an alternation
+  whose alternatives can match the same characters;
+- OVERLAPPING_QUANTIFIERS: adjacent unbounded quantifiers over overlapping
+  characters, e.g. "a*a*", also when the end of an iteration of a group
+  meets the start of the next one, e.g. the two "a*" of "(a*,a*)*",
+  whose cost is polynomial.
+
+The analysis is conservative: a reported construct may still be harmless
+for the strings actually matched.
+
+Example:
+    Checking a regex before matching it::
+
+        risks = redos_risks(Pyrser().parse(r"(a|aa)*b"))
+        if any(risk.severity == HIGH for risk in risks):
+            ...
+"""
+
+
+import math
+from typing import List, NamedTuple, Tuple, Union
+from .analysis import alternatives, match_length_bounds
+from .charclass import CharClass
+from .re_ast import RE, ASTNode, GroupNode, OrNode, LeafNode, Element, WildcardElement, SpaceElement, RangeElement
+
+
+# the kinds of risk
+NESTED_QUANTIFIERS = 'nested_quantifiers'
+AMBIGUOUS_ALTERNATION = 'ambiguous_alternation'
+OVERLAPPING_QUANTIFIERS = 'overlapping_quantifiers'
+
+# the severities of a risk: the cost of a failing match can be exponential
+# (HIGH) or polynomial (MEDIUM) in the test string length
+HIGH = 'high'
+MEDIUM = 'medium'
+
+# the policies of RegexEngine for the regexes with a HIGH risk: raise
+# UnsafePatternError, or match them with the linear-time Pike VM instead of
+# the backtracking engine
+REFUSE = 'refuse'
+ROUTE = 'route'
+POLICIES = (REFUSE, ROUTE)
+
+# the characters matched by \s, the ones for which str.isspace is True
+SPACES: CharClass = CharClass([
+    (0x09, 0x0d), (0x1c, 0x20), (0x85, 0x85), (0xa0, 0xa0), (0x1680, 0x1680),
+    (0x2000, 0x200a), (0x2028, 0x2029), (0x202f, 0x202f), (0x205f, 0x205f),
+    (0x3000, 0x3000)])
+
+# a set of characters: the characters in it, or, when negated, the ones
+# not in it
+CharSet = Tuple[CharClass, bool]
+
+
+class ReDoSRisk(NamedTuple):
+    """ A construct of a regex that can make the backtracking engine slow."""
+    kind: str
+    severity: str
+    group_id: Union[int, None]
+    description: str
+
+
+class UnsafePatternError(Exception):
+    """ Raised when a regex with a high ReDoS risk is refused.
+
+    Args:
+        re (str): the regular expression
+        risks (List[ReDoSRisk]): the risks found in the regex
+    """
+
+    def __init__(self, re: str, risks: List[ReDoSRisk]) -> None:
+        super().__init__(
+            f"The regex {re!r} is unsafe: {'; '.join(risk.description for risk in risks)}.")
+        self.re: str = re
+        self.risks: List[ReDoSRisk] = risks
+
+
+def high_risks(risks: List[ReDoSRisk]) -> List[ReDoSRisk]:
+    """ Returns the risks of HIGH severity."""
+    return [risk for risk in risks if risk.severity == HIGH]
+
+
+def union(a: CharSet, b: CharSet) -> CharSet:
+    """ Returns the union of two sets of characters."""
+    a_chars, a_negated = a
+    b_chars, b_negated = b
+    if not a_negated and not b_negated:
+        return a_chars | b_chars, False
+    if a_negated and b_negated:
+        return a_chars & b_chars, True
+    if a_negated:
+        return a_chars - b_chars, True
+    return b_chars - a_chars, True
+
+
+def overlap(a: CharSet, b: CharSet) -> bool:
+    """ Returns whether two sets of characters have a character in common."""
+    a_chars, a_negated = a
+    b_chars, b_negated = b
+    if not a_negated and not b_negated:
+        return not a_chars.isdisjoint(b_chars)
+    if a_negated and b_negated:
+        return True
+    if a_negated:
+        return not b_chars <= a_chars
+    return not a_chars <= b_chars
+
+
+def subset(a: CharSet, b: CharSet) -> bool:
+    """ Returns whether every character of a is in b."""
+    a_chars, a_negated = a
+    b_chars, b_negated = b
+    if not a_negated and not b_negated:
+        return a_chars <= b_chars
+    if not a_negated:
+        return a_chars.isdisjoint(b_chars)
+    if not b_negated:
+        return False
+    return b_chars <= a_chars
+
+
+def node_chars(node: ASTNode) -> CharSet:
+    """ Returns the characters a node, or any of its descendants, matches."""
+    if isinstance(node, RE):
+        return node_chars(node.child)
+    if isinstance(node, RangeElement):
+        return node.match, not node.is_positive_logic
+    if isinstance(node, WildcardElement):
+        return CharClass.from_chars('\n'), True
+    if isinstance(node, SpaceElement):
+        return SPACES, False
+    if isinstance(node, Element):
+        return CharClass.from_chars(node.match), False
+    if isinstance(node, OrNode):
+        return union(node_chars(node.left), node_chars(node.right))
+    if isinstance(node, GroupNode):
+        chars: CharSet = (CharClass(), False)
+        for child in node.children:
+            chars = union(chars, node_chars(child))
+        return chars
+    # ^ and $ match no character
+    return CharClass(), False
+
+
+def group_of(node: ASTNode) -> Union[int, None]:
+    """ Returns the group id of a group or alternation."""
+    while isinstance(node, OrNode):
+        node = node.left
+    return getattr(node, 'group_id', None)
+
+
+def repeated_descendants(node: ASTNode) -> List[ASTNode]:
+    """ Returns the nodes among node and its descendants whose match can be
+    repeated a variable number of times, at least twice, i.e. the unbounded
+    quantified ones and the wide range ones, e.g. "a{1,10}".
+    """
+    result = []
+    to_visit = [node]
+    while to_visit:
+        node = to_visit.pop()
+        if node.max > node.min and node.max >= 2 and match_length_bounds(node)[1] > 0:
+            result.append(node)
+        if isinstance(node, OrNode):
+            to_visit.extend((node.left, node.right))
+        elif isinstance(node, GroupNode):
+            to_visit.extend(node.children)
+    return result
+
+
+def nested_quantifiers(node: ASTNode, body: List[ASTNode]) -> Union[ReDoSRisk, None]:
+    """ Checks the body of an iteration of an unbounded quantified node.
+
+    A repeated node of the body can share its matches with the following
+    iterations. When every required part of the rest of the body, if any,
+    can match its characters, a run of them can be split among any number of
+    iterations (HIGH), otherwise the other parts delimit the iterations, and
+    the run can only be split among the parts of one iteration (MEDIUM).
+    """
+    body = list(body)
+    severity = None
+    for k, child in enumerate(body):
+        others = body[:k] + body[k + 1:]
+        required = [other for other in others if match_length_bounds(other)[0] > 0]
+        for inner in repeated_descendants(child):
+            inner_chars = node_chars(inner)
+            overlapping = [overlap(inner_chars, node_chars(other)) for other in required]
+            if all(overlapping):
+                severity = HIGH
+                break
+            if any(overlapping):
+                severity = MEDIUM
+        if severity == HIGH:
+            break
+    if severity is None:
+        return None
+    group_id = group_of(node)
+    return ReDoSRisk(NESTED_QUANTIFIERS, severity, group_id,
+                     f"group {group_id} repeats a variable quantifier, so its iterations can split a substring in many ways")
+
+
+def edge_quantifiers(body: List[ASTNode]) -> List[ASTNode]:
+    """ Returns the unbounded quantified nodes of a body that can match at
+    its start, i.e. the ones preceded only by nodes that can match nothing.
+    """
+    result = []
+    for child in body:
+        if child.max == math.inf:
+            result.append(child)
+        if match_length_bounds(child)[0] > 0:
+            break
+    return result
+
+
+def overlapping_iterations(node: ASTNode, body: List[ASTNode]) -> Union[ReDoSRisk, None]:
+    """ Checks whether the unbounded quantifiers at the end of an iteration of
+    an unbounded quantified node can match the characters of the ones at the
+    start of the next iteration, e.g. the two "a*" of "(a*,a*)*", which
+    then split a run of them in as many ways as its length.
+    """
+    body = list(body)
+    for last in edge_quantifiers(reversed(body)):
+        for first in edge_quantifiers(body):
+            if overlap(node_chars(last), node_chars(first)):
+                group_id = group_of(node)
+                return ReDoSRisk(OVERLAPPING_QUANTIFIERS, MEDIUM, group_id,
+                                 f"the unbounded quantifiers ending and starting the iterations of group {group_id} can match the same characters")
+    return None
+
+
+def ambiguous_alternation(node: OrNode) -> Union[ReDoSRisk, None]:
+    """ Checks the alternatives of an unbounded quantified alternation.
+
+    The alternatives matching the same characters can match the same
+    substring, which is very likely when the characters of an alternative
+    are all matched by another one.
+    """
+    severity = None
+    chars = [node_chars(alternative) for alternative in alternatives(node)]
+    for i in range(len(chars)):
+        for j in range(i + 1, len(chars)):
+            if not overlap(chars[i], chars[j]):
+                continue
+            if subset(chars[i], chars[j]) or subset(chars[j], chars[i]):
+                severity = HIGH
+                break
+            severity = MEDIUM
+        if severity == HIGH:
+            break
+    if severity is None:
+        return None
+    group_id = group_of(node)
+    return ReDoSRisk(AMBIGUOUS_ALTERNATION, severity, group_id,
+                     f"the repeated alternatives of group {group_id} can match the same characters")
+
+
+def redos_risks(ast: RE) -> List[ReDoSRisk]:
+    """ Finds the constructs of a regex that can make the backtracking engine
+    slow.
+
+    Args:
+        ast (RE): the regex AST
+
+    Returns:
+        List[ReDoSRisk]: the risks found, the most severe first
+    """
+    risks: List[ReDoSRisk] = []
+    to_visit: List[ASTNode] = [ast.child]
+    while to_visit:
+        node = to_visit.pop()
+        if isinstance(node, LeafNode):
+            continue
+        if node.max == math.inf:
+            if isinstance(node, OrNode):
+                risk = ambiguous_alternation(node)
+                if risk is not None:
+                    risks.append(risk)
+                risk = None
+                for alternative in alternatives(node):
+                    body = alternative.children if isinstance(
+                        alternative, GroupNode) else [alternative]
+                    risk = nested_quantifiers(node, body)
+                    if risk is not None:
+                        break
+            else:
+                risk = nested_quantifiers(node, node.children)
+                if risk is None:
+                    risk = overlapping_iterations(node, node.children)
+            if risk is not None:
+                risks.append(risk)
+
+        if isinstance(node, OrNode):
+            to_visit.extend((node.right, node.left))
+            continue
+        children = list(node.children)
+        for first, second in zip(children, children[1:]):
+            if first.max == math.inf and second.max == math.inf and overlap(node_chars(first), node_chars(second)):
+                risks.append(ReDoSRisk(OVERLAPPING_QUANTIFIERS, MEDIUM, node.group_id,
+                                       f"adjacent unbounded quantifiers of group {node.group_id} can match the same characters"))
+                break
+        to_visit.extend(reversed(node.children))
+    # the sort is stable, so the risks of a severity keep the regex order
+    risks.sort(key=lambda risk: risk.severity != HIGH)
+    return risks
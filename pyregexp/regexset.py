@@ -0,0 +1,111 @@
+"""Module containing the RegexSet class.
+
+A RegexSet matches many regexes against a test string in a single scan, and
+reports which of them match. The regexes are compiled into a single Program
+that forks into the program of each regex, and the Program is run by a
+LazyDFA, so the cost of a scan does not grow with the number of regexes
+once the DFA states are cached.
+
+Example:
+    Finding the regexes matching a line::
+
+        rules = RegexSet([r"^GET ", r"HTTP/1\\.[01]$", r"[0-9]+ms"])
+        rules.matches("GET /index.html HTTP/1.1")  # [0, 1]
+"""
+
+
+from typing import Dict, List, Set, Union
+from .dfa import LazyDFA, DFACacheInfo, DEFAULT_MAX_STATES
+from .pattern import normalize_re, normalize_string
+from .program import Compiler, Program, MATCH
+from .pyrser import Pyrser
+from .re_ast import RE
+
+
+class RegexSet:
+    """ A set of regular expressions matched in a single scan.
+
+    Only whether each regex matches is reported, no group is tracked.
+
+    Args:
+        patterns (List[str]): the regular expressions
+        ignore_case (int): when 0 the case is not ignored, when 1 a "soft"
+            case ignoring is performed, when 2 casefolding is performed.
+            (default is 0)
+        max_states (int): the maximum number of states cached by the lazy
+            DFA (default is DEFAULT_MAX_STATES)
+    """
+
+    def __init__(self, patterns: List[str], ignore_case: int = 0, max_states: int = DEFAULT_MAX_STATES) -> None:
+        self.patterns: List[str] = list(patterns)
+        self.ignore_case: int = ignore_case
+        self.asts: List[RE] = [Pyrser().parse(re=normalize_re(re, ignore_case))
+                               for re in self.patterns]
+        self.program: Union[Program, None] = None
+        self.dfa: Union[LazyDFA, None] = None
+        # the index of the regex of each MATCH instruction
+        self.pattern_indexes: Dict[int, int] = {}
+        if self.asts:
+            self.program = Compiler().compile_set(self.asts)
+            self.dfa = LazyDFA(self.program, max_states)
+            self.pattern_indexes = {pc: self.program.args[pc] for pc, op in enumerate(
+                self.program.ops) if op == MATCH}
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def cache_info(self) -> Union[DFACacheInfo, None]:
+        """ Returns the statistics of the lazy DFA, None if the set is empty."""
+        return self.dfa.cache_info() if self.dfa is not None else None
+
+    def matches(self, string: str) -> List[int]:
+        """ Returns the indexes of the regexes matching the test string.
+
+        The test string is scanned once, and the scan stops as soon as every
+        regex has matched.
+
+        Args:
+            string (str): the test string
+
+        Returns:
+            List[int]: the indexes, in the patterns list, of the regexes that
+            match somewhere in the test string, in increasing order
+        """
+        if self.dfa is None:
+            return []
+        string = normalize_string(string, self.ignore_case)
+        dfa = self.dfa
+        n_patterns = len(self.patterns)
+        matched: Set[int] = set()
+        state = dfa.start_state(True, True)
+        for ch in string:
+            if state.is_match:
+                matched |= state.match_pcs
+                if len(matched) == n_patterns:
+                    break
+            state = dfa.next_state(state, ch, True)
+        else:
+            matched |= dfa.matches_at_end(state)
+        return sorted(self.pattern_indexes[pc] for pc in matched)
+
+    def is_match(self, string: str) -> bool:
+        """ Returns whether any regex of the set matches the test string.
+
+        The scan stops at the first index at which a match ends.
+
+        Args:
+            string (str): the test string
+
+        Returns:
+            bool: True if at least one regex matches, False otherwise
+        """
+        if self.dfa is None:
+            return False
+        string = normalize_string(string, self.ignore_case)
+        dfa = self.dfa
+        state = dfa.start_state(True, True)
+        for ch in string:
+            if state.is_match:
+                return True
+            state = dfa.next_state(state, ch, True)
+        return dfa.accepts_at_end(state)
@@ -0,0 +1,282 @@
+"""Module containing the StreamMatcher class.
+
+A StreamMatcher searches a compiled Pattern in an input that arrives in
+chunks, e.g. a file too large to be loaded in memory, and returns the matches
+with their offsets in the whole input. Only the tail of the input that can
+still be part of a match is kept between two chunks: the PikeVM reports the
+lowest start index of the threads alive at the end of the chunks received so
+far, and everything before it is dropped. The threads themselves are kept
+too, and the search resumes from them, so each character is stepped once
+whatever the length of the matches.
+
+The finditer_file and search_file functions memory-map a file. A bytes
+Pattern is matched over a memoryview of the mapping, so only the matched
+spans are copied out of it, unless it ignores the case. A str Pattern is
+not matched over the mapping: the whole file is decoded and normalized a
+chunk at a time and fed to a StreamMatcher, as decoding only the matched
+spans would need the str regex compiled to a program over the encoded
+bytes.
+
+Example:
+    Searching a regex in a file::
+
+        with open("server.log", "rb") as log:
+            for matches in StreamMatcher(compile(r"error: [0-9]+")).finditer(log):
+                print(matches[0].start_idx, matches[0].match)
+
+        # the same, with the file memory-mapped
+        for matches in finditer_file("server.log", compile(r"error: [0-9]+")):
+            print(matches[0].start_idx, matches[0].match)
+"""
+
+
+import codecs
+import mmap
+import os
+from typing import Deque, Iterable, Iterator, List, Union, IO
+from .match import Match
+from .pattern import Pattern
+from .pikevm import ScanState
+
+
+# number of characters (or bytes) read at a time from a file object
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class StreamMatcher:
+    """ Matcher of a Pattern over an input received in chunks.
+
+    Finds the same matches as Pattern.finditer run on the whole input, i.e.
+    the successive leftmost-longest matches, each one searched from the end
+    of the previous one. The start_idx and end_idx of the returned Match are
+    offsets in the whole (normalized) input.
+
+    The chunks of a bytes Pattern are matched without being decoded, and
+    the offsets are then in bytes.
+
+    Args:
+        pattern (Pattern): the compiled pattern to search
+        encoding (str): the encoding used to decode the bytes chunks of a str
+            Pattern (default is "utf-8")
+    """
+
+    def __init__(self, pattern: Pattern, encoding: str = "utf-8") -> None:
+        self.pattern: Pattern = pattern
+        self.encoding: str = encoding
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        # the part of the input that can still be part of a match
+        self.buffer: Union[str, bytes] = b"" if pattern.byte_level else ""
+        # the offset of the buffer in the whole input
+        self.base: int = 0
+        # the index of the buffer from which the next search starts
+        self.pos: int = 0
+        # the end offset of the last match, -1 before the first one
+        self.highest_matched_idx: int = -1
+        # the state of the search at the end of the buffer, None if the
+        # next search starts at pos
+        self.state: Union[ScanState, None] = None
+        self.done: bool = False
+
+    def feed(self, chunk: Union[str, bytes]) -> List[Deque[Match]]:
+        """ Consumes the next chunk of the input.
+
+        Args:
+            chunk (Union[str, bytes]): the chunk, bytes are decoded with the
+                encoding of the matcher unless the Pattern is a bytes one
+
+        Returns:
+            List[Deque[Match]]: the matches that the chunk made certain, i.e.
+            that no further chunk can change
+        """
+        if not self.pattern.byte_level and isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = self.decoder.decode(chunk)
+        if self.done or not chunk:
+            return []
+        self.buffer += self.pattern.normalize(chunk)
+        return self.__search__(False)
+
+    def close(self) -> List[Deque[Match]]:
+        """ Signals the end of the input.
+
+        Returns:
+            List[Deque[Match]]: the remaining matches
+        """
+        if not self.pattern.byte_level:
+            tail = self.decoder.decode(b"", final=True)
+            if tail and not self.done:
+                self.buffer += self.pattern.normalize(tail)
+        all_matches = self.__search__(True) if not self.done else []
+        self.done = True
+        self.buffer = self.buffer[:0]
+        self.state = None
+        return all_matches
+
+    def finditer(self, source: Union[IO, Iterable[Union[str, bytes]]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Deque[Match]]:
+        """ Iterates over the matches in a chunked input.
+
+        Args:
+            source (Union[IO, Iterable[Union[str, bytes]]]): a text or binary
+                file object, read chunk_size at a time, or an iterable of
+                chunks
+            chunk_size (int): the size of the chunks read from a file object
+                (default is DEFAULT_CHUNK_SIZE)
+
+        Yields:
+            Deque[Match]: the matches of a substring, the whole match in the
+            first position, and in the subsequent positions the groups matched
+        """
+        if hasattr(source, "read"):
+            file = source
+            source = iter(lambda: file.read(chunk_size), file.read(0))
+        for chunk in source:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def __search__(self, final: bool) -> List[Deque[Match]]:
+        """ Searches the matches in the buffer.
+
+        Unless final is True, a match is returned only when no thread that
+        could lead to a preferred match is alive at the end of the buffer.
+        The buffer is then trimmed to the threads still alive, plus one
+        character so that ^ cannot match at the start of the trimmed buffer.
+        The search resumes from the state of the threads at the end of the
+        previous buffer, so only the new characters are stepped.
+        """
+        pattern = self.pattern
+        all_matches: List[Deque[Match]] = []
+        buffer = self.buffer
+        search = None
+        while True:
+            if final and self.state is None:
+                if search is None:
+                    search = pattern.search_fnc(buffer)
+                res, consumed, matches = search(buffer, self.pos)
+                alive_start = -1
+            else:
+                caps, alive_start, state = pattern.vm.scan(
+                    buffer, self.pos, final=final, state=self.state)
+                res = caps is not None and alive_start == -1
+                # the next search starts at the end of the match
+                self.state = state if not res else None
+                if res:
+                    consumed = caps[1]
+                    matches = pattern.vm.build_matches(caps, buffer)
+            if not res:
+                break
+
+            # the same stop condition of iter_matches, on the whole input
+            end_idx = self.base + consumed
+            if self.highest_matched_idx != -1 and end_idx <= self.highest_matched_idx:
+                self.done = True
+                break
+            all_matches.append(self.__offset__(matches))
+            self.highest_matched_idx = end_idx
+            if end_idx == 0:
+                self.done = True
+                break
+            self.pos = consumed
+
+        if not final and not self.done:
+            keep = alive_start if alive_start != -1 else len(buffer)
+            cut = max(keep - 1, 0)
+            self.buffer = buffer[cut:]
+            self.base += cut
+            self.pos = keep - cut
+            if self.state is not None:
+                self.state = self.state.shifted(cut)
+        return all_matches
+
+    def __offset__(self, matches: Deque[Match]) -> Deque[Match]:
+        """ Shifts the indexes of the matches by the offset of the buffer."""
+        for match in matches:
+            match.start_idx += self.base
+            match.end_idx += self.base
+        return matches
+
+
+def finditer_file(path: Union[str, os.PathLike], pattern: Pattern, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = "utf-8") -> Iterator[Deque[Match]]:
+    """ Iterates over the matches of a pattern in a memory-mapped file.
+
+    A bytes Pattern is matched over a memoryview of the mapping, without
+    copying the file: only the matched spans are copied, into the bytes
+    held by the returned Match objects, and the offsets are in bytes. With
+    ignore_case the case is folded chunk_size bytes at a time, and the
+    chunks are fed to a StreamMatcher.
+
+    A str Pattern is not matched over the mapping, and the whole file is
+    decoded, not only the matched spans: the mapping is decoded and
+    normalized chunk_size bytes at a time, and the chunks are fed to a
+    StreamMatcher. When the chunks are fed to a StreamMatcher, only the
+    chunk being searched and the tail of the input that can still be part
+    of a match are held in memory.
+
+    Args:
+        path (Union[str, os.PathLike]): the path of the file
+        pattern (Pattern): the compiled pattern to search
+        chunk_size (int): the number of bytes decoded, or case folded, at
+            a time (default is DEFAULT_CHUNK_SIZE)
+        encoding (str): the encoding of the file, unused by a bytes Pattern
+            (default is "utf-8")
+
+    Yields:
+        Deque[Match]: the matches of a substring, the whole match in the
+        first position, and in the subsequent positions the groups matched;
+        the indexes are offsets in the decoded file
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            # an empty file cannot be mapped
+            yield from pattern.finditer(b"" if pattern.byte_level else "")
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            if pattern.byte_level and not pattern.ignore_case:
+                yield from _finditer_mapped(mapped, pattern)
+                return
+            matcher = StreamMatcher(pattern, encoding)
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(view), chunk_size):
+                    yield from matcher.feed(view[offset:offset + chunk_size])
+            finally:
+                view.release()
+    yield from matcher.close()
+
+
+def _finditer_mapped(mapped: mmap.mmap, pattern: Pattern) -> Iterator[Deque[Match]]:
+    """ Iterates over the matches of a bytes pattern in a mapping.
+
+    The matched spans are copied out of the mapping, so that the Match
+    objects stay valid once it is closed, and the view of the mapping is
+    released before it is.
+    """
+    view = memoryview(mapped)
+    all_matches = pattern.finditer(view)
+    try:
+        for matches in all_matches:
+            for match in matches:
+                match.match = bytes(match.match)
+            yield matches
+    finally:
+        all_matches.close()
+        del all_matches
+        view.release()
+
+
+def search_file(path: Union[str, os.PathLike], pattern: Pattern, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding: str = "utf-8") -> Union[Deque[Match], None]:
+    """ Searches the first match of a pattern in a memory-mapped file.
+
+    The file is read only up to the end of the first match, see
+    finditer_file for the meaning of the arguments.
+
+    Returns:
+        Union[Deque[Match], None]: the matches of the first matching
+        substring, None if the pattern does not match
+    """
+    all_matches = finditer_file(path, pattern, chunk_size, encoding)
+    try:
+        return next(all_matches, None)
+    finally:
+        # unmaps and closes the file at once
+        all_matches.close()
@@ -0,0 +1,66 @@
+import time
+from ..pyregexp.ahocorasick import AhoCorasick, AlternationMatcher
+from ..pyregexp.engine import RegexEngine, PIKEVM
+from ..pyregexp.pattern import compile
+
+
+def test_starts():
+    automaton = AhoCorasick(['GET', 'POST', 'PUT'])
+    assert automaton.starts('x PUT GET').find(1) == 2
+    assert list(AhoCorasick(['ab', 'b', 'abc']).starts('xabc')) == [0, 1, 1, 0, 0]
+
+
+def test_overlapping_literals():
+    automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+    starts = automaton.starts('ushers')
+    assert [i for i, start in enumerate(starts) if start] == [1, 2]
+    assert automaton.first_end('ushers') == 4
+    assert automaton.first_end('ushers', 2) == 4
+    assert automaton.first_end('ushers', 3) == -1
+
+
+def test_longest_at():
+    automaton = AhoCorasick(['a', 'ab', 'abc'])
+    assert automaton.longest_at('xabcab', 1) == 4
+    assert automaton.longest_at('xabcab', 4) == 6
+    assert automaton.longest_at('xabcab', 0) == -1
+
+
+def test_alternation_pattern():
+    pattern = compile(r'GET|POST|PUT|DELETE|PATCH')
+    assert pattern.alternation is not None
+    assert pattern.prefilters() == [
+        "alternatives ['GET', 'POST', 'PUT', 'DELETE', 'PATCH']"]
+    matches = pattern.search('curl -X PATCH')
+    assert matches[0].start_idx == 8 and matches[0].match == 'PATCH'
+    assert pattern.match('PUT /') is not None
+    assert pattern.match(' PUT /') is None
+    assert pattern.is_match('HEAD') == False
+    assert isinstance(compile(r'GET|POST').searcher, AlternationMatcher)
+    # only the whole regex is matched by the automaton
+    for regex in (r'x(GET|POST)y', r'(?:GET|POST) /'):
+        pattern = compile(regex)
+        assert pattern.alternation is None
+        assert not isinstance(pattern.searcher, AlternationMatcher)
+    assert compile(r'x(GET|POST)y').search('xPOSTy')[1].match == 'POST'
+
+
+def test_first_start():
+    automaton = AhoCorasick(['abcd', 'bc', 'x'])
+    # the literal found first is not the leftmost one
+    assert automaton.first_start('zabcd') == 1
+    assert automaton.first_start('zabcd', 2) == 2
+    assert automaton.first_start('zabcd', 3) == -1
+    for string in ['', 'abcxbc', 'xxabcdbc', 'babcd']:
+        for start_idx in range(len(string) + 1):
+            assert automaton.first_start(string, start_idx) == automaton.starts(string).find(1, start_idx)
+
+
+def test_many_matches_linear():
+    string = 'GET POST ' * 4000
+    start = time.perf_counter()
+    assert len(list(compile(r'GET|POST').finditer(string))) == 8000
+    assert RegexEngine(engine=PIKEVM).match(r'GET|POST', string, continue_after_match=True) == (True, len(string) - 1)
+    assert RegexEngine().match(r'GET|POST', string, continue_after_match=True) == (True, len(string) - 1)
+    # a search per match rescanning the whole string takes tens of seconds
+    assert time.perf_counter() - start < 5
@@ -0,0 +1,73 @@
+import asyncio
+from ..pyregexp.aio import amatch, afinditer, afinditer_stream
+from ..pyregexp.pattern import compile
+
+
+def spans(all_matches) -> list:
+    return [[(m.group_id, m.start_idx, m.match) for m in matches] for matches in all_matches]
+
+
+async def collect(async_iterator) -> list:
+    return [matches async for matches in async_iterator]
+
+
+def test_amatch():
+    matches = asyncio.run(amatch(r'e(r+)or', 'xx error'))
+    assert matches[0].match == 'error' and matches[1].match == 'rr'
+    assert asyncio.run(amatch(compile(r'x'), 'abc', 'is_match')) == False
+
+
+def test_afinditer():
+    pattern = compile(r'[a-z]+([0-9]+)')
+    test_str = 'ab12 c3 dd 45e6 ' * 10
+    expected = spans(pattern.finditer(test_str))
+    for window_size in (1, 5, 1000):
+        assert spans(asyncio.run(collect(afinditer(pattern, test_str, window_size)))) == expected
+
+
+def test_afinditer_long_match():
+    # a match spanning many windows is not scanned again at each window
+    test_str = 'x' + 'a' * 400000 + 'y'
+    pattern = compile(r'x(a)[^y]*y')
+    scan = pattern.vm.scan
+    stepped = []
+
+    def counting_scan(string, start_idx=0, anchored=False, final=True, state=None):
+        stepped.append(len(string) - (state.str_i if state is not None else start_idx))
+        return scan(string, start_idx, anchored, final, state)
+    pattern.vm.scan = counting_scan
+    matches = asyncio.run(collect(afinditer(pattern, test_str)))
+    assert [(m.group_id, m.start_idx, m.end_idx) for m in matches[0]] == [
+        (0, 0, 400002), (1, 1, 2)]
+    assert len(stepped) > 1 and sum(stepped) <= len(test_str) + len(stepped)
+
+
+def test_afinditer_yields_to_loop():
+    ticks = []
+
+    async def ticker():
+        for i in range(5):
+            ticks.append(i)
+            await asyncio.sleep(0)
+
+    async def main():
+        task = asyncio.create_task(ticker())
+        matches = await collect(afinditer(r'b', 'a' * 100 + 'b', window_size=10))
+        # the ticker ran while the string was being scanned
+        assert ticks == list(range(5))
+        await task
+        return matches
+
+    assert spans(asyncio.run(main())) == [[(0, 100, 'b')]]
+
+
+def test_afinditer_stream():
+    async def main(pattern):
+        reader = asyncio.StreamReader()
+        reader.feed_data('é err1 '.encode())
+        reader.feed_data(b'err22')
+        reader.feed_eof()
+        return await collect(afinditer_stream(pattern, reader, window_size=3))
+
+    assert spans(asyncio.run(main(r'err[0-9]+'))) == [[(0, 2, 'err1')], [(0, 7, 'err22')]]
+    assert spans(asyncio.run(main(rb'err[0-9]+'))) == [[(0, 3, b'err1')], [(0, 8, b'err22')]]
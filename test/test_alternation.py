@@ -0,0 +1,26 @@
+from ..pyregexp.engine import RegexEngine, PIKEVM
+
+
+def test_non_capturing_alternation():
+    reng = RegexEngine()
+    for engine in ('backtracking', PIKEVM):
+        res, _, matches = reng.match(r'(x)(?:a|b)', 'xb', True, engine=engine)
+        assert [(m.group_id, m.match) for m in matches[0]] == [(0, 'xb'), (1, 'x')]
+        res, _, matches = reng.match(r'(?:a|b)c', 'bc', True, engine=engine)
+        assert [(m.group_id, m.match) for m in matches[0]] == [(0, 'bc')]
+
+    # alternatives of unequal length and with nested quantifiers
+    cases = [
+        (r'b?c{2}|(?:\s|c?a*)c{1,2}', 'aa\nc'),
+        (r'(?:a+.|[^a]*\s?)*b*|a?', ' a c b'),
+        (r'(?:ab|a)c', 'abc'),
+        (r'(x)(?:ab|a)c', 'xabc'),
+        (r'(?:a|bcd)+e', 'abcdae'),
+        (r'(?:a|b(?:c)*)*(d)', 'abccbd'),
+    ]
+    for regex, test_str in cases:
+        res, consumed, matches = reng.match(regex, test_str, True, True)
+        expected = reng.match(regex, test_str, True, True, engine=PIKEVM)
+        assert (res, consumed) == expected[:2]
+        assert [[(m.group_id, m.match) for m in ms] for ms in matches] == \
+            [[(m.group_id, m.match) for m in ms] for ms in expected[2]]
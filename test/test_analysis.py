@@ -0,0 +1,164 @@
+import math
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.engine import RegexEngine
+from ..pyregexp.charclass import CharClass
+from ..pyregexp.analysis import literal_prefix, first_chars, literal_alternatives, match_length_bounds, anchored_start, required_literals, capture_free_nodes, PrefixScanner, RequiredLiterals
+
+
+def parse(re: str):
+    return Pyrser().parse(re)
+
+
+def test_literal_prefix():
+    assert literal_prefix(parse(r'error: ([0-9]+)')) == 'error: '
+    assert literal_prefix(parse(r'^abc')) == 'abc'
+    assert literal_prefix(parse(r'a{3}b+c')) == 'aaab'
+    assert literal_prefix(parse(r'(ab){2}c')) == 'ababc'
+    assert literal_prefix(parse(r'abc|abd')) == 'ab'
+    assert literal_prefix(parse(r'[x]yz')) == 'xyz'
+
+
+def test_no_literal_prefix():
+    assert literal_prefix(parse(r'a?b')) == ''
+    assert literal_prefix(parse(r'.abc')) == ''
+    assert literal_prefix(parse(r'abc|xbc')) == ''
+    assert literal_prefix(parse(r'')) == ''
+
+
+def test_first_chars():
+    assert first_chars(parse(r'[a-c]x')) == frozenset('abc')
+    assert first_chars(parse(r'a?b')) == frozenset('ab')
+    assert first_chars(parse(r'(x|y)+z')) == frozenset('xy')
+    assert first_chars(parse(r'^[0-9]')) == frozenset('0123456789')
+    assert first_chars(parse('[\u4e00-\u9fff]x')) == CharClass([(0x4e00, 0x9fff)])
+
+
+def test_no_first_chars():
+    assert first_chars(parse(r'.a')) is None
+    assert first_chars(parse(r'[^a]')) is None
+    assert first_chars(parse(r'\sa')) is None
+    assert first_chars(parse(r'a*')) is None
+    assert first_chars(parse(r'a|')) is None
+
+
+def test_prefix_scanner():
+    assert PrefixScanner.from_ast(parse(r'.*')) is None
+
+    scanner = PrefixScanner.from_ast(parse(r'error: ([0-9]+)'))
+    assert scanner.prefix == 'error: '
+    find = scanner.finder('x error: 1 error: 2')
+    assert find(0) == 2
+    assert find(3) == 11
+    assert find(12) == -1
+
+
+def test_prefix_scanner_chars():
+    scanner = PrefixScanner.from_ast(parse(r'[xy]+z'))
+    assert scanner.prefix == '' and scanner.chars == frozenset('xy')
+    find = scanner.finder('aaxbbybb')
+    assert find(0) == 2
+    assert find(3) == 5
+    assert find(6) == -1
+
+    scanner = PrefixScanner.from_ast(parse(r'[a-z]+@'))
+    find = scanner.finder('12 34 ab@')
+    assert find(0) == 6
+    assert find(9) == -1
+
+
+def test_literal_alternatives():
+    assert literal_alternatives(parse(r'GET|POST|PUT')) == ['GET', 'POST', 'PUT']
+    assert literal_alternatives(parse(r'a{2}b|[c]')) == ['aab', 'c']
+    assert literal_alternatives(parse(r'ab')) is None
+    assert literal_alternatives(parse(r'a+|b')) is None
+    assert literal_alternatives(parse(r'a|.')) is None
+    assert literal_alternatives(parse(r'a|')) is None
+
+
+def test_prefix_scanner_alternatives():
+    scanner = PrefixScanner.from_ast(parse(r'PUT|POST'))
+    assert scanner.prefix == '' and scanner.automaton is not None
+    find = scanner.finder('a POST PUT')
+    assert find(0) == 2
+    assert find(3) == 7
+    assert find(8) == -1
+
+
+def test_match_length_bounds():
+    assert match_length_bounds(parse(r'^abc$')) == (3, 3)
+    assert match_length_bounds(parse(r'a{2,3}(bc)?')) == (2, 5)
+    assert match_length_bounds(parse(r'(ab|c)+d')) == (2, math.inf)
+    assert match_length_bounds(parse(r'(a+){0}b')) == (1, 1)
+
+
+def test_anchored_start():
+    assert anchored_start(parse(r'^abc')) == True
+    assert anchored_start(parse(r'(^a)b')) == True
+    assert anchored_start(parse(r'^a|^b')) == True
+    assert anchored_start(parse(r'^a|b')) == False
+    assert anchored_start(parse(r'(^a)?b')) == False
+    assert anchored_start(parse(r'a$')) == False
+
+
+def test_required_literals():
+    assert required_literals(parse(r'.*timeout=[0-9]+ms')) == ['timeout=', 'ms']
+    assert required_literals(parse(r'a(bc|dc)d')) == ['cd', 'a']
+    assert required_literals(parse(r'a{2,3}b')) == ['aab']
+    assert required_literals(parse(r'x(ab|cab)')) == ['ab', 'x']
+    assert required_literals(parse(r'ab|cd')) == []
+    assert required_literals(parse(r'(abc)?d*')) == []
+
+
+def test_required_literals_prefilter():
+    assert RequiredLiterals.from_ast(parse(r'[0-9]+')) is None
+
+    prefilter = RequiredLiterals.from_ast(parse(r'.*timeout=[0-9]+ms'))
+    assert prefilter.check('a timeout=10ms') == True
+    assert prefilter.check('a timeout=10s') == False
+
+    # the literal prefix is already checked by the PrefixScanner
+    ast = parse(r'error: [0-9]+')
+    assert RequiredLiterals.from_ast(ast, PrefixScanner.from_ast(ast)) is None
+
+
+def test_capture_free_nodes():
+    ast = parse(r'(?:a|(?:bc)+)(d)(?:e(f))*')
+    free = capture_free_nodes(ast)
+    alternation, group, outer = ast.child.children
+    assert id(ast) not in free and id(ast.child) not in free
+    assert id(alternation) in free and id(alternation.right) in free
+    assert id(group) not in free
+    # it holds the capturing group (f)
+    assert id(outer) not in free
+
+
+def test_prefix_skipping():
+    reng = RegexEngine()
+    test_str = 'x' * 1000 + 'error: 42 ' + 'y' * 1000 + 'error: 7'
+
+    res, consumed, matches = reng.match(r'error: ([0-9]+)', test_str, True, True)
+    assert res == True
+    assert consumed == len(test_str)
+    assert [m[1].match for m in matches] == ['42', '7']
+
+    res, consumed = reng.match(r'[ez]rror: [0-9]+', test_str)
+    assert res == True and consumed == 1009
+
+    res, _ = reng.match(r'warning: ([0-9]+)', test_str)
+    assert res == False
+
+
+def test_anchored_start_engine():
+    reng = RegexEngine()
+    test_str = 'a' * 1000 + 'b'
+
+    for engine in ('backtracking', 'pikevm'):
+        res, _ = reng.match(r'^a+c', test_str, engine=engine)
+        assert res == False
+
+        res, consumed, matches = reng.match(r'^(a+)b', test_str, True, True, engine=engine)
+        assert res == True and consumed == len(test_str)
+        assert len(matches) == 1
+
+        res, _ = reng.match(r'^b', test_str, engine=engine)
+        assert res == False
@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import pytest
+from ..pyregexp.batch import match_many, chunk_size_for
+from ..pyregexp.pattern import compile
+
+
+STRINGS = [f'line {i}: ' + ('error: ' + str(i) if i % 3 == 0 else 'ok') for i in range(50)]
+
+
+def expected(method: str) -> list:
+    pattern = compile(r'error: (?<code>[0-9]+)')
+    return [getattr(pattern, method)(string) for string in STRINGS]
+
+
+def spans(results: list) -> list:
+    return [None if matches is None else [(m.name, m.start_idx, m.match) for m in matches] for matches in results]
+
+
+def test_sequential():
+    results = match_many(r'error: (?<code>[0-9]+)', STRINGS)
+    assert spans(results) == spans(expected('search'))
+    assert match_many(compile(r'error'), STRINGS, 'is_match') == expected('is_match')
+    assert match_many(r'a', []) == []
+
+    with pytest.raises(Exception):
+        match_many(r'a', STRINGS, 'findall')
+    with pytest.raises(Exception):
+        match_many(r'a', STRINGS, chunk_size=0)
+
+
+def test_executors():
+    pattern = compile(r'error: (?<code>[0-9]+)')
+    for executor_class in (ThreadPoolExecutor, ProcessPoolExecutor):
+        with executor_class(max_workers=2) as executor:
+            for chunk_size in (None, 1, 7, 100):
+                results = match_many(pattern, iter(STRINGS), executor=executor, chunk_size=chunk_size)
+                assert spans(results) == spans(expected('search'))
+
+
+def test_chunk_size():
+    assert chunk_size_for(1000, 5) == 50
+    assert chunk_size_for(3, 5) == 1
+    assert chunk_size_for(0, 5) == 1
+    assert chunk_size_for(1000) == chunk_size_for(1000, os.cpu_count())
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = match_many(r'error', STRINGS, 'is_match', executor=executor, workers=2)
+        assert results == expected('is_match')
+    with pytest.raises(Exception):
+        match_many(r'a', STRINGS, workers=0)
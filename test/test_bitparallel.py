@@ -0,0 +1,106 @@
+import time
+import pytest
+from ..pyregexp.engine import RegexEngine, PIKEVM
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.pattern import compile
+from ..pyregexp.bitparallel import BitParallelMatcher, ShiftAnd
+
+
+def bp(re: str) -> BitParallelMatcher:
+    return BitParallelMatcher.from_ast(Pyrser().parse(re))
+
+
+@pytest.fixture
+def reng() -> RegexEngine:
+    return RegexEngine(engine=PIKEVM)
+
+
+def test_supported():
+    assert bp(r'[a-z]+@[a-z]+\.com') is not None
+    assert bp(r'^a.?\sb{2,}[^c]*$') is not None
+    assert bp(r'a(b)') is None
+    assert bp(r'a|b') is None
+    assert bp(r'a{64}') is None
+
+
+def test_positions():
+    shift_and = ShiftAnd(list(Pyrser().parse(r'ab?c*d{2,}').child.children))
+    # a, b?, c*, d, d+
+    assert len(shift_and.positions) == 5
+    assert shift_and.optional == 0b001100
+    assert shift_and.repeatable == 0b101000
+    # b and c can be skipped once a is matched
+    assert shift_and.closure(0b10) == 0b1110
+
+
+def test_is_match():
+    matcher = bp(r'a+bx')
+    assert matcher.is_match('ccaabx') == True
+    assert matcher.is_match('ccaab') == False
+    assert matcher.is_match('aabx', 1) == True
+    assert matcher.is_match('aabx', 3) == False
+
+
+def test_anchors():
+    assert bp(r'^ab').is_match('abxx') == True
+    assert bp(r'^ab').is_match('xabx') == False
+    assert bp(r'cd$').is_match('xxcd') == True
+    assert bp(r'cd$').is_match('xcdx') == False
+
+
+def test_search():
+    matcher = bp(r'a?b*c')
+    res, end_idx, matches = matcher.search('xxabbbcab')
+    assert res == True and end_idx == 7
+    assert matches[0].start_idx == 2 and matches[0].match == 'abbbc'
+
+    res, end_idx, matches = matcher.search('xxabbbc', 2, anchored=True)
+    assert res == True and end_idx == 7
+    assert matcher.search('xxabbbc', 1, anchored=True)[0] == False
+
+
+def test_match_starts():
+    assert list(bp(r'ab?').match_starts('abca')) == [1, 0, 0, 1, 0]
+
+
+def test_engine_same_as_pikevm(reng: RegexEngine):
+    string = 'xaab aaab b'
+    expected = reng.match(r'(?:a)+b', string, True, True)
+    res, consumed, matches = reng.match(r'a+b', string, True, True)
+    assert (res, consumed) == expected[:2] == (True, 9)
+    assert [m[0].match for m in matches] == ['aab', 'aaab']
+
+
+def test_many_matches_linear(reng: RegexEngine):
+    string = ' '.join(['abc'] * 10000)
+    start = time.perf_counter()
+    matches = list(compile(r'[a-z]+').finditer(string))
+    assert len(matches) == 10000 and matches[-1][0].start_idx == len(string) - 3
+    assert len(list(RegexEngine(engine=PIKEVM).finditer(r'[a-z]+', string))) == 10000
+    # a search per match rescanning the whole string takes about a minute
+    assert time.perf_counter() - start < 5
+
+
+def test_search_starts():
+    matcher = bp(r'b+')
+    starts = matcher.match_starts('abba')
+    assert matcher.search('abba', 0, starts=starts)[:2] == (True, 3)
+    assert matcher.search('abba', 3, starts=starts)[:2] == (False, 3)
+    assert matcher.search('xbbb', 0)[:2] == (True, 4)
+
+
+def test_finditer_match_starts_once():
+    cases = [
+        (r'[a-z]+', 'ab cd ef'),
+        (rb'[a-z]+', b'ab cd ef'),
+        (rb'[a-z]+', bytearray(b'ab cd ef')),
+        (rb'[a-z]+', memoryview(b'ab cd ef')),
+    ]
+    for regex, string in cases:
+        pattern = compile(regex)
+        matcher = pattern.bit_parallel
+        match_starts = matcher.match_starts
+        calls = []
+        matcher.match_starts = lambda string: calls.append(string) or match_starts(string)
+        assert len(list(pattern.finditer(string))) == 3
+        assert len(calls) == 1
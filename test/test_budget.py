@@ -0,0 +1,42 @@
+import pytest
+from ..pyregexp.engine import RegexEngine, PIKEVM
+from ..pyregexp.budget import MatchLimitExceeded, StepBudget
+
+
+def test_step_budget():
+    reng = RegexEngine()
+    # the DFA finds the match at the end, the backtracking engine tries
+    # every start before it
+    regex, test_str = r'(a|aa)*[bc]', 'a' * 40 + 'db'
+    with pytest.raises(MatchLimitExceeded) as e:
+        reng.match(regex, test_str, max_steps=100)
+    assert e.value.steps == 101 and e.value.reason == 'max_steps'
+    with pytest.raises(MatchLimitExceeded) as e:
+        reng.match(regex, test_str, timeout=0)
+    assert e.value.reason == 'timeout'
+    with pytest.raises(MatchLimitExceeded):
+        RegexEngine(max_steps=100).match(regex, test_str)
+
+    # the budget only bounds the backtracking engine
+    assert reng.match(regex, test_str, engine=PIKEVM, max_steps=1) == (True, 42)
+    assert reng.match(regex, test_str, max_steps=10 ** 6) == (True, 42)
+
+
+def test_step_budget_finditer():
+    reng = RegexEngine()
+    matches = list(reng.finditer(r'(ab)+', 'ab' * 5 + 'x' + 'ab' * 5, max_steps=100))
+    assert len(matches) == 2
+    with pytest.raises(MatchLimitExceeded):
+        list(reng.finditer(r'(ab)+', 'ab' * 5 + 'x' + 'ab' * 5, max_steps=5))
+
+
+def test_step_budget_limits():
+    budget = StepBudget(max_steps=2)
+    budget.step()
+    budget.step()
+    with pytest.raises(MatchLimitExceeded):
+        budget.step()
+    budget.reset()
+    budget.step()
+    with pytest.raises(Exception):
+        StepBudget(max_steps=-1)
@@ -0,0 +1,13 @@
+import pytest
+from ..pyregexp.engine import RegexEngine, PIKEVM
+
+
+def test_bytes():
+    reng = RegexEngine(engine=PIKEVM)
+    res, consumed, matches = reng.match(rb'[0-9]+', b'a12 3', True, True)
+    assert res == True and consumed == 5
+    assert [m[0].match for m in matches] == [b'12', b'3']
+    assert reng.match(rb'x', memoryview(b'a12 3')) == (False, 0)
+
+    with pytest.raises(Exception):
+        RegexEngine().match(rb'a', b'a')
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from ..pyregexp.cache import PatternCache, shared_cache, get_pattern, purge, set_capacity, cache_info, DEFAULT_CAPACITY
+from ..pyregexp.engine import RegexEngine
+
+
+@pytest.fixture
+def cache() -> PatternCache:
+    return PatternCache(capacity=2)
+
+
+def test_hit_and_miss(cache: PatternCache):
+    pattern = cache.get(r'a+b')
+    assert cache.get(r'a+b') is pattern
+    info = cache.cache_info()
+    assert info.hits == 1 and info.misses == 1 and info.size == 1
+
+
+def test_key_includes_ignore_case(cache: PatternCache):
+    assert cache.get(r'A') is not cache.get(r'A', ignore_case=1)
+    assert cache.get(r'A', ignore_case=1).match('a') is not None
+    assert cache.cache_info().misses == 2
+
+
+def test_lru_eviction(cache: PatternCache):
+    a = cache.get(r'a')
+    cache.get(r'b')
+    cache.get(r'a')  # 'b' is now the least recently used
+    cache.get(r'c')
+    info = cache.cache_info()
+    assert info.evictions == 1 and info.size == 2
+    assert cache.get(r'a') is a
+    assert cache.cache_info().hits == 2
+
+
+def test_capacity(cache: PatternCache):
+    cache.get(r'a')
+    cache.get(r'b')
+    cache.capacity = 1
+    assert len(cache) == 1
+    assert cache.cache_info().evictions == 1
+    with pytest.raises(Exception):
+        cache.capacity = -1
+
+
+def test_purge(cache: PatternCache):
+    cache.get(r'a')
+    cache.purge()
+    assert len(cache) == 0
+
+
+def test_parse_error_not_cached(cache: PatternCache):
+    with pytest.raises(Exception):
+        cache.get(r'(a')
+    assert len(cache) == 0
+
+
+def test_shared_cache():
+    purge()
+    reng_1, reng_2 = RegexEngine(), RegexEngine()
+    misses = cache_info().misses
+    assert reng_1.match(r'x+y', 'xxy') == (True, 3)
+    assert reng_2.match(r'x+y', 'xy') == (True, 2)
+    assert cache_info().misses == misses + 1
+    assert get_pattern(r'x+y') is shared_cache.get(r'x+y')
+
+    set_capacity(1)
+    assert cache_info().capacity == 1
+    set_capacity(DEFAULT_CAPACITY)
+
+
+def test_concurrent_access(cache: PatternCache):
+    regexes = [r'a', r'b', r'c', r'd'] * 50
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        patterns = list(executor.map(cache.get, regexes))
+    assert all(p.re == r for p, r in zip(patterns, regexes))
+    info = cache.cache_info()
+    assert info.hits + info.misses == len(regexes)
+    assert info.size <= 2
@@ -0,0 +1,43 @@
+import pytest
+from ..pyregexp.charclass import CharClass, MAX_SET_SIZE, MAX_CODE_POINT
+
+
+def test_intervals():
+    char_class = CharClass([(ord('x'), ord('z')), (ord('a'), ord('c')), (ord('b'), ord('d')), (ord('e'), ord('e'))])
+    assert char_class.intervals == ((ord('a'), ord('e')), (ord('x'), ord('z')))
+    assert len(char_class) == 8
+    assert ''.join(char_class) == 'abcdexyz'
+    assert str(char_class) == 'a-ex-z'
+    assert CharClass.from_chars('zyxedcba') == char_class
+    assert CharClass().intervals == ()
+    with pytest.raises(Exception):
+        CharClass([(ord('z'), ord('a'))])
+
+
+def test_membership():
+    char_class = CharClass([(ord('0'), ord('9')), (0x4e00, 0x9fff)])
+    for ch in '07一中鿿':
+        assert ch in char_class
+    for ch in '/:a䷿ꀀ\U0001f600':
+        assert ch not in char_class
+
+
+def test_small_classes_set():
+    assert CharClass.from_chars('abc').chars == frozenset('abc')
+    assert CharClass([(0, MAX_SET_SIZE - 1)]).chars is not None
+    # the large classes are not expanded
+    assert CharClass([(0, 0xffff)]).chars is None
+    assert len(CharClass([(0, 0xffff)])) == 0x10000
+
+
+def test_set_operations():
+    a_e = CharClass([(ord('a'), ord('e'))])
+    c_g = CharClass([(ord('c'), ord('g'))])
+    assert ''.join(a_e | c_g) == 'abcdefg'
+    assert ''.join(a_e & c_g) == 'cde'
+    assert ''.join(a_e - c_g) == 'ab'
+    assert (~a_e).intervals == ((0, ord('a') - 1), (ord('e') + 1, MAX_CODE_POINT))
+    assert CharClass.from_chars('bc') <= a_e
+    assert not c_g <= a_e
+    assert a_e.isdisjoint(CharClass.from_chars('xyz'))
+    assert not a_e.isdisjoint(c_g)
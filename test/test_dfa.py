@@ -0,0 +1,128 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from ..pyregexp.engine import RegexEngine, PIKEVM
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.dfa import DFAMatcher
+from ..pyregexp.cache import PatternCache
+from ..pyregexp.budget import MatchLimitExceeded
+
+
+def dfa(re: str, max_states: int = 64) -> DFAMatcher:
+    return DFAMatcher(Pyrser().parse(re), max_states)
+
+
+@pytest.fixture
+def reng() -> RegexEngine:
+    return RegexEngine(engine=PIKEVM)
+
+
+def test_is_match():
+    matcher = dfa(r'a+bx')
+    assert matcher.is_match('ccaabx') == True
+    assert matcher.is_match('ccaab') == False
+    assert matcher.is_match('aabx', 1) == True
+    assert matcher.is_match('aabx', 3) == False
+
+
+def test_anchors():
+    matcher = dfa(r'^ab|cd$')
+    assert matcher.is_match('abxx') == True
+    assert matcher.is_match('xabx') == False
+    assert matcher.is_match('xxcd') == True
+    assert matcher.is_match('xcdx') == False
+    assert dfa(r'^$').is_match('') == True
+    assert dfa(r'^$').is_match('a') == False
+
+
+def test_search_leftmost_longest():
+    res, end_idx, matches = dfa(r'a|bcd').search('xabcd')
+    assert res == True and end_idx == 2
+    assert len(matches) == 0
+
+    res, end_idx, _ = dfa(r'ab*').search('xabbbab')
+    assert res == True and end_idx == 5
+
+
+def test_match_starts():
+    starts = dfa(r'ab').match_starts('abxab')
+    assert starts.find(1) == 0
+    assert starts.find(1, 1) == 3
+    assert starts.find(1, 4) == -1
+
+
+def test_longest_match_end():
+    matcher = dfa(r'(a|ab)(c|bcd)')
+    assert matcher.longest_match_end('abcd', 0) == 4
+    assert matcher.longest_match_end('abcd', 1) == -1
+
+
+def test_cache_info():
+    matcher = dfa(r'[a-c]+d')
+    assert matcher.is_match('abcabcabcd') == True
+    info = matcher.cache_info()
+    assert info.misses > 0 and info.hits > 0
+    assert info.size > 0
+    misses = info.misses
+    matcher.is_match('abcabcabcd')
+    info = matcher.cache_info()
+    assert info.misses == misses
+
+    matcher.clear()
+    info = matcher.cache_info()
+    assert info.hits == 0 and info.misses == 0 and info.size == 0
+
+
+def test_bounded_cache():
+    matcher = dfa(r'(a|b)*a(a|b)(a|b)(a|b)(a|b)', max_states=4)
+    assert matcher.is_match('abbbabababbbbbaaab') == True
+    info = matcher.cache_info()
+    assert info.flushes > 0
+    assert info.size <= info.max_size
+
+
+def test_shared_among_threads():
+    matcher = dfa(r'(a|b)*a(a|b)(a|b)(a|b)(a|b)', max_states=4)
+    strings = ['abbbabababbbbbaaab' * 20, 'bbbbbbbbbbbbb' * 20, 'ab' * 100 + 'b']
+    expected = [matcher.is_match(string) for string in strings]
+
+    def run(_) -> list:
+        return [matcher.is_match(string) for string in strings for _ in range(5)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(run, range(16)))
+    assert all(result == [e for e in expected for _ in range(5)] for result in results)
+    assert matcher.cache_info().flushes > 0
+
+
+def test_engine_uses_dfa():
+    reng = RegexEngine(engine=PIKEVM, cache=PatternCache())
+    assert reng.dfa_cache_info(r'(a|c)+b') is None
+    assert reng.match(r'(a|c)+b', 'dcab') == (True, 4)
+    assert reng.dfa_cache_info(r'(a|c)+b').misses > 0
+    assert reng.match(r'(a|c)+b', 'dcac') == (False, 0)
+
+
+def test_engine_dfa_continue_after_match(reng: RegexEngine):
+    string = 'abbabbab'
+    res, consumed = reng.match(r'ab+', string, continue_after_match=True)
+    assert res == True
+    assert consumed == len(string)
+
+    # matches are still returned by the Pike VM
+    res, consumed, matches = reng.match(
+        r'ab+', string, continue_after_match=True, return_matches=True)
+    assert consumed == len(string)
+    assert [m[0].match for m in matches] == ['abb', 'abb', 'ab']
+
+
+def test_boolean_queries_engines():
+    reng = RegexEngine()
+    # the backtracking engine only asks the DFA whether there is a match,
+    # the end index is still the one it finds
+    assert reng.match(r'(a|ab)(c|bcd)', 'abcd') == (True, 3)
+    assert reng.match(r'(a|ab)(c|bcd)', 'abcd', engine=PIKEVM) == (True, 4)
+    # a failing match is rejected by the DFA, without counting steps
+    assert reng.match(r'(a|aa)*[bc]', 'a' * 30 + 'd', max_steps=1) == (False, 0)
+    assert reng.match(r'(a|aa)*[bc]', 'a' * 30 + 'd', True, max_steps=1) == (False, 0, [])
+    with pytest.raises(MatchLimitExceeded):
+        reng.match(r'(a|aa)*[bc]', 'a' * 30 + 'db', max_steps=100)
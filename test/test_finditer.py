@@ -0,0 +1,24 @@
+import pytest
+from ..pyregexp.engine import RegexEngine
+
+
+@pytest.fixture
+def reng() -> RegexEngine:
+    return RegexEngine()
+
+
+def test_finditer(reng: RegexEngine):
+    test_str = 'a1 b22 c333 d'
+    for engine in ('backtracking', 'pikevm'):
+        _, _, expected = reng.match(r'[a-z]([0-9]+)', test_str, True, True, engine=engine)
+        matches = list(reng.finditer(r'[a-z]([0-9]+)', test_str, engine=engine))
+        assert [[(m.group_id, m.start_idx, m.end_idx) for m in ms] for ms in matches] == \
+            [[(m.group_id, m.start_idx, m.end_idx) for m in ms] for ms in expected]
+        assert len(matches) == 3
+
+    iterator = reng.finditer(r'[0-9]+', test_str)
+    assert next(iterator)[0].match == '1'
+    assert next(iterator)[0].match == '22'
+
+    assert list(reng.finditer(r'x', test_str)) == []
+    assert len(list(reng.finditer(r'a*', 'aab'))) == 1
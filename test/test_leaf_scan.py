@@ -0,0 +1,19 @@
+from ..pyregexp.engine import RegexEngine, PIKEVM
+
+
+def test_quantified_leaf_runs():
+    reng = RegexEngine()
+    cases = [
+        (r'^.*x$', 'a' * 5000 + 'x'),
+        (r'[a-z]+@b', 'ab@c ' + 'z' * 5000 + '@b'),
+        (r'(\s*)y', ' ' * 5000 + 'y'),
+        (r'a.{2,4}c(x*)', 'abbbbbcx abcccx'),
+        (r'(a+)a{2}b', 'aaaab'),
+        (r'(ab)?b{2}', 'abba'),
+        (r'.*\n', 'ab\ncd'),
+    ]
+    for regex, test_str in cases:
+        assert reng.match(regex, test_str, continue_after_match=True) == \
+            reng.match(regex, test_str, continue_after_match=True, engine=PIKEVM)
+    _, _, matches = reng.match(r'(a+)a{2}b', 'aaaab', True)
+    assert [(m.group_id, m.match) for m in matches[0]] == [(0, 'aaaab'), (1, 'aa')]
@@ -0,0 +1,25 @@
+from ..pyregexp.engine import RegexEngine, PIKEVM
+
+
+def test_literal_runs():
+    reng = RegexEngine()
+    cases = [
+        (r'connection_reset_by_peer: ([0-9]+)', 'connection_reset_by_pee connection_reset_by_peer: 42'),
+        (r'(ab)*abab', 'abababab'),
+        (r'x(ab)?abc', 'xabcxababc'),
+    ]
+    for regex, test_str in cases:
+        assert reng.match(regex, test_str, continue_after_match=True) == \
+            reng.match(regex, test_str, continue_after_match=True, engine=PIKEVM)
+    _, _, matches = reng.match(cases[0][0], cases[0][1], True)
+    assert [(m.group_id, m.match) for m in matches[0]] == [
+        (0, 'connection_reset_by_peer: 42'), (1, '42')]
+
+
+def test_failed_iteration_index():
+    reng = RegexEngine()
+    # used to loop forever, the budget bounds it if it does again
+    assert reng.match(r'(?:.*c*(\s?c?)*){1,2}(\s[ab])$', 'a b ', max_steps=100000) == (False, 0)
+    assert reng.match(r'^((?:.*[ab]{2})b*a|ab+){1,2}[^a]{1,2}', 'abac') == (True, 4)
+    assert reng.match(r'c(.)(?:b+(?:\s*\s[^a]*)+[^a])*', 'acab \n\nc') == (True, 8)
+    assert reng.match(r'a+(?:(?:ab?abc)*a.+)?$', ' b\n aa  ') == (True, 8)
@@ -0,0 +1,40 @@
+import pytest
+from ..pyregexp.engine import RegexEngine
+from ..pyregexp.budget import MatchLimitExceeded
+
+
+def test_memoize():
+    reng = RegexEngine()
+    memo_reng = RegexEngine(memoize=True)
+    cases = [
+        (r'(?<first>[a-z]+|b{1,2})(?<last>l)', 'abbl'),
+        (r'((ab|a)(b|))*c', 'ab' * 20 + 'c'),
+        (r'(a|b|ab)*c', 'ab' * 20),
+        (r'@(gm|ho).(com|it)', '@hoa.com @gm.it'),
+        # many searches of a long string, each with its own memo
+        (r'(a|b)+[0-9]', 'ab1 ' * 2000),
+        # the failures of the groups without captures are memoized
+        (r'(?:a|aa)*b', 'a' * 40 + 'cb'),
+        (r'x(?:[ab]|ab)*(c)', 'ab' * 20 + 'xabc'),
+    ]
+    for regex, test_str in cases:
+        expected = reng.match(regex, test_str, True, True)
+        for result in (memo_reng.match(regex, test_str, True, True), reng.match(regex, test_str, True, True, memoize=True)):
+            assert result[:2] == expected[:2]
+            assert [[(m.group_id, m.start_idx, m.end_idx) for m in matches] for matches in result[2]] == \
+                [[(m.group_id, m.start_idx, m.end_idx) for m in matches] for matches in expected[2]]
+
+
+def test_memoize_steps():
+    reng = RegexEngine()
+    # each start index fails again to match (?:a|aa) at the c, unless the
+    # failure is memoized
+    regex, test_str = r'(?:a|aa)*b', 'a' * 30 + 'cb'
+    with pytest.raises(MatchLimitExceeded):
+        reng.match(regex, test_str, max_steps=950)
+    assert reng.match(regex, test_str, memoize=True, max_steps=950) == (True, 32)
+
+    # the groups holding a capturing group are not memoized
+    regex = r'(a|aa)*b'
+    with pytest.raises(MatchLimitExceeded):
+        reng.match(regex, test_str, memoize=True, max_steps=950)
@@ -0,0 +1,174 @@
+import math
+import re
+import pytest
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.optimizer import Optimizer, fuse_literal_runs, PASSES, FACTOR_PREFIXES, MERGE_ALTERNATIONS, FLATTEN_GROUPS, FUSE_QUANTIFIERS
+from ..pyregexp.pattern import Pattern, compile
+from ..pyregexp.re_ast import OrNode, Element, LiteralRun, WildcardElement, SpaceElement, RangeElement, StartElement, EndElement
+from ..pyregexp.analysis import alternatives
+from ..pyregexp.cache import PatternCache
+from ..pyregexp.engine import RegexEngine
+
+
+def quantifier(node) -> str:
+    bounds = (node.min, node.max)
+    if bounds == (1, 1):
+        return ''
+    return {(0, math.inf): '*', (1, math.inf): '+', (0, 1): '?'}.get(
+        bounds, '{' + str(node.min) + ',' + ('' if node.max == math.inf else str(node.max)) + '}')
+
+
+def inner(node) -> str:
+    if isinstance(node, OrNode):
+        return '|'.join(inner(branch) for branch in alternatives(node))
+    return ''.join(render(child) for child in node.children)
+
+
+def render(node) -> str:
+    """ Renders an AST back to a regex, with the group ids of the capturing
+    groups, e.g. (1:ab)."""
+    if isinstance(node, LiteralRun):
+        text = '<' + node.match + '>'
+    elif isinstance(node, RangeElement):
+        text = '[' + ('' if node.is_positive_logic else '^') + ''.join(node.match) + ']'
+    elif isinstance(node, WildcardElement):
+        text = '.'
+    elif isinstance(node, SpaceElement):
+        text = r'\s'
+    elif isinstance(node, StartElement):
+        text = '^'
+    elif isinstance(node, EndElement):
+        text = '$'
+    elif isinstance(node, Element):
+        text = node.match
+    else:
+        group = alternatives(node)[0] if isinstance(node, OrNode) else node
+        text = '(' + (f'{group.group_id}:' if group.is_capturing() else '?:') + inner(node) + ')'
+    return text + quantifier(node)
+
+
+def optimize(re: str, passes=PASSES):
+    ast, changes = Optimizer(passes).optimize(Pyrser().parse(re))
+    return render(ast.child), [change.pass_name for change in changes]
+
+
+def test_factor_prefixes():
+    assert optimize(r'x(abc|abd)', [FACTOR_PREFIXES]) == (
+        '(0:x(1:ab(?:c|d)))', [FACTOR_PREFIXES])
+    assert optimize(r'x(ab|a)+', [FACTOR_PREFIXES]) == (
+        '(0:x(1:a(?:b|))+)', [FACTOR_PREFIXES])
+    assert optimize(r'x(?:a|a)', [FACTOR_PREFIXES]) == ('(0:x(?:a))', [FACTOR_PREFIXES])
+    # nothing in common, or quantified differently
+    assert optimize(r'x(ab|cb)', [FACTOR_PREFIXES]) == ('(0:x(1:ab|cb))', [])
+    assert optimize(r'x(a+b|ab)', [FACTOR_PREFIXES]) == ('(0:x(1:a+b|ab))', [])
+    # the literal alternations are left to the Aho-Corasick automaton
+    assert optimize(r'GET|GETS', [FACTOR_PREFIXES]) == ('(0:GET|GETS)', [])
+
+
+def test_merge_alternations():
+    assert optimize(r'(a|c|b)*d', [MERGE_ALTERNATIONS]) == (
+        '(0:(1:[abc])*d)', [MERGE_ALTERNATIONS])
+    assert optimize(r'x(?:a|[bc]|a)', [MERGE_ALTERNATIONS]) == (
+        '(0:x(?:[abc]))', [MERGE_ALTERNATIONS])
+    assert optimize(r'(?:a|ab|[^b])', [MERGE_ALTERNATIONS])[1] == []
+    assert optimize(r'(?:a|b*)', [MERGE_ALTERNATIONS])[1] == []
+
+
+def test_flatten_groups():
+    assert optimize(r'x(?:a(?:bc))d', [FLATTEN_GROUPS]) == (
+        '(0:xabcd)', [FLATTEN_GROUPS, FLATTEN_GROUPS])
+    assert optimize(r'(?:[ab])*(?:ab)*(a)*', [FLATTEN_GROUPS]) == (
+        '(0:[ab]*(?:ab)*(3:a)*)', [FLATTEN_GROUPS])
+
+
+def test_fuse_quantifiers():
+    assert optimize(r'a*a*b', [FUSE_QUANTIFIERS]) == ('(0:a*b)', [FUSE_QUANTIFIERS])
+    assert optimize(r'aa?[ab][ab]{2}', [FUSE_QUANTIFIERS]) == (
+        '(0:a{1,2}[ab]{3,3})', [FUSE_QUANTIFIERS, FUSE_QUANTIFIERS])
+    # the plain literals are kept
+    assert optimize(r'aa[ab]', [FUSE_QUANTIFIERS]) == ('(0:aa[ab])', [])
+
+
+def test_pipeline():
+    assert optimize(r'x(abc|abd)+') == ('(0:x(1:ab[cd])+)', [
+        FACTOR_PREFIXES, MERGE_ALTERNATIONS, FLATTEN_GROUPS])
+    assert optimize(r'(?:a|b)*(?:a)+y') == ('(0:[ab]*a+y)', [
+        MERGE_ALTERNATIONS, FLATTEN_GROUPS, FLATTEN_GROUPS])
+    # the passes are switched off one by one
+    assert optimize(r'(?:a|b)*', []) == ('(0:(?:a|b)*)', [])
+    with pytest.raises(Exception):
+        Optimizer(['inline'])
+
+
+def test_original_ast_unchanged():
+    ast = Pyrser().parse(r'x(abc|abd)')
+    Optimizer().optimize(ast)
+    assert render(ast.child) == '(0:x(1:abc|abd))'
+
+
+def test_pattern_optimizations():
+    pattern = compile(r'x(abc|abd)+y')
+    assert [change.pass_name for change in pattern.optimizations] == [
+        FACTOR_PREFIXES, MERGE_ALTERNATIONS, FLATTEN_GROUPS]
+    assert compile(r'x(abc|abd)+y', optimizer=Optimizer([])).optimizations == []
+    for optimizer in (None, Optimizer([])):
+        matches = Pattern(r'x(abc|abd)+y', optimizer=optimizer).search('_xabcabdy')
+        assert [(m.group_id, m.start_idx, m.end_idx) for m in matches] == [(0, 1, 9), (1, 5, 8)]
+
+
+def test_fuse_literal_runs():
+    ast = Pyrser().parse(r'conn(ection)?_re[s]et+|x(y)')
+    assert render(fuse_literal_runs(ast).child) == '(0:<conn>(1:<ection>)?<_rese>t+|x(2:y))'
+    # the original AST is left unchanged
+    assert render(ast.child) == '(0:conn(1:ection)?_re[s]et+|x(2:y))'
+
+
+def test_fuse_literal_runs_re():
+    reng = RegexEngine()
+    cases = [
+        (r'hello world', 'say hello world!'),
+        (r'hello world', 'hello worl'),
+        (r'peer', 'pepeer'),
+        (r'^GET /index', 'GET /index.html'),
+        (r'(?:abc)+', 'ababcabc'),
+        (r'(foo|bar)baz$', 'foobaz barbaz'),
+        (r'x(abc|abd)+y', '_xabcabdy'),
+        # a mismatch after the first character of a run
+        (r'(abc)*$', 'abybccxa'),
+        (r'(?:a|bc){,2}()(?:a|bc){1,3}', 'bbbaxyya'),
+        (r'(?:a|bc)?(?:x(?:y))*a+[^a]+', 'bacac'),
+    ]
+    for regex, test_str in cases:
+        match = re.search(regex, test_str)
+        assert reng.match(regex, test_str) == ((True, match.end()) if match else (False, 0))
+
+
+class UnoptimizedCache(PatternCache):
+    """ A PatternCache compiling the patterns without the optimizer."""
+
+    def get(self, re: str, ignore_case: int = 0) -> Pattern:
+        return Pattern(re, ignore_case, optimizer=Optimizer([]))
+
+
+def test_backtracking_unoptimized():
+    cases = [
+        (r'b{2,3}|(c(c.a{0,3})[ab])|(?:(..?|[^a]*|a)?)c|.c{2}', 'abaacbccc'),
+        (r'cb+c|(?:ba{0,3})*(?:b|(a.bc|a{2,3}b)?|a{1,2}c+b)b{0,3}b{1,2}', 'bcaabaa'),
+        (r'(?:a|b|c){,2}(?:x(?:y))*(a*)(?:a)', 'xbxycca'),
+        (r'.{1,3}(?:a|b|c)+b*(a|b)', 'aabca'),
+        (r'(?:a|b|c)*a*a|a{1,3}(ab|a)|(?:x(?:y))', 'aa'),
+        (r'x(abc|abd)+y', '_xabcabdy'),
+        (r'a+(?:(?:b)*a.)?$', 'aa '),
+    ]
+    optimized, unoptimized = RegexEngine(), RegexEngine(cache=UnoptimizedCache())
+    for regex, test_str in cases:
+        # the backtracking engine matches the regex as written
+        assert render(compile(regex).backtracking_ast.child) == \
+            render(fuse_literal_runs(Pyrser().parse(regex)).child)
+        results = []
+        for reng in (optimized, unoptimized):
+            res, end_idx, all_matches = reng.match(regex, test_str, True, True)
+            results.append((res, end_idx, [[(m.group_id, m.start_idx, m.end_idx)
+                                            for m in matches] for matches in all_matches]))
+        assert results[0] == results[1]
+    assert optimized.match(r'a+(?:(?:b)*a.)?$', 'aa ') == (True, 3)
@@ -237,3 +237,23 @@ def test_groups_names_double_ornode(parser: Pyrser):
     assert central_gid == rightmost_gid
     assert leftmost_gname == central_gname
     assert central_gname == rightmost_gname
+
+
+def test_non_capturing_alternatives(parser: Pyrser):
+    ast = parser.parse('(?:a|b|c)d')
+    alternation = ast.child.children[0]
+    assert isinstance(alternation, OrNode)
+    assert not alternation.left.is_capturing()
+    assert not alternation.right.left.is_capturing()
+    assert not alternation.right.right.is_capturing()
+
+
+def test_range_intervals(parser: Pyrser):
+    ast = parser.parse('[a-cx一-鿿]')
+    assert ast.child.children[0].match.intervals == (
+        (ord('a'), ord('c')), (ord('x'), ord('x')), (0x4e00, 0x9fff))
+    # the whole class is not expanded into its characters
+    ast = parser.parse('[^\u0000-￿]')
+    assert len(ast.child.children[0].match) == 0x10000
+    assert ast.child.children[0].is_match('ሴ') == False
+    assert ast.child.children[0].is_match('\U0001f600') == True
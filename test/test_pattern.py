@@ -0,0 +1,132 @@
+import pytest
+from ..pyregexp.cache import PatternCache
+from ..pyregexp.engine import RegexEngine, PIKEVM
+from ..pyregexp.pattern import Pattern, compile
+
+
+def test_compile():
+    pattern = compile(r'a+b')
+    assert type(pattern) is Pattern
+    assert pattern.re == r'a+b'
+    assert len(pattern.program) > 0
+
+
+def test_match():
+    pattern = compile(r'a+b')
+    matches = pattern.match('aabc')
+    assert matches is not None
+    assert matches[0].match == 'aab'
+    assert pattern.match('caab') is None
+    assert pattern.match('caab', 1)[0].start_idx == 1
+
+
+def test_search():
+    pattern = compile(r'(?<num>[0-9]+)')
+    matches = pattern.search('error: 1234 at 56')
+    assert matches[0].match == '1234'
+    assert matches[1].name == 'num' and matches[1].match == '1234'
+    assert pattern.search('error: 1234 at 56', 11)[0].match == '56'
+    assert pattern.search('no numbers') is None
+
+
+def test_fullmatch():
+    pattern = compile(r'a|ab')
+    assert pattern.fullmatch('ab')[0].match == 'ab'
+    assert pattern.fullmatch('abc') is None
+    assert pattern.fullmatch('xab', 1)[0].match == 'ab'
+
+
+def test_is_match():
+    pattern = compile(r'^[a-z]+@[a-z]+\.(com|it)$')
+    assert pattern.is_match('me@mail.com') == True
+    assert pattern.is_match('me@mail.org') == False
+    assert pattern.dfa_cache_info().misses > 0
+
+
+def test_pos_out_of_range():
+    # as in Python's re, pos is clamped to the test string
+    for regex in (r'a*', r'$', r'[ab]+', r'(a)|', r'ab|cd'):
+        pattern = compile(regex)
+        for test_str in ('aa', ''):
+            for method in ('match', 'search', 'fullmatch'):
+                for pos, clamped in ((-5, 0), (-1, 0), (len(test_str) + 1, len(test_str)), (10, len(test_str))):
+                    matches, expected = (getattr(pattern, method)(test_str, p) for p in (pos, clamped))
+                    assert (matches is None) == (expected is None)
+                    if matches is not None:
+                        assert (matches[0].start_idx, matches[0].end_idx) == \
+                            (expected[0].start_idx, expected[0].end_idx)
+    assert compile(r'a*').match('aa', 3)[0].start_idx == 2
+    assert compile(r'a*').fullmatch('aa', 10)[0].match == ''
+    assert compile(r'[ab]+').match('aa', -1)[0].match == 'aa'
+    assert compile(r'^$').is_match('', 3) == True
+    assert [m[0].start_idx for m in compile(r'$').finditer('aa', 10)] == [2]
+
+
+def test_ignore_case():
+    pattern = compile(r'ÄCHER', ignore_case=1)
+    assert pattern.match('ächer') is not None
+    assert pattern.is_match('ächer') == True
+    assert compile(r'ẞ', ignore_case=2).fullmatch('SS') is not None
+
+
+def test_prefilters():
+    pattern = compile(r'.*timeout=[0-9]+ms')
+    assert pattern.prefilters() == ["required literals ['timeout=', 'ms']"]
+    assert pattern.search('a timeout=10s') is None
+    assert pattern.is_match('a timeout=10ms') == True
+
+    pattern = compile(r'error: [0-9]+')
+    assert pattern.prefilters() == ["prefix 'error: '"]
+    assert compile(r'[ab]x+y').prefilters() == [
+        "first chars 'ab'", "required literals ['xy']"]
+    assert compile(r'.*').prefilters() == []
+
+
+def test_match_length_bounds():
+    pattern = compile(r'[0-9]{4}:[0-9]{2}(:[0-9]{2})?')
+    assert (pattern.min_len, pattern.max_len) == (7, 10)
+    assert pattern.search('2024:1') is None
+    assert pattern.is_match('2024:1') == False
+    assert pattern.search('x 2024:10') is not None
+
+
+def test_finditer():
+    pattern = compile(r'(?<num>[0-9]+)')
+    assert [m[0].match for m in pattern.finditer('a1 b22 c333')] == ['1', '22', '333']
+    assert [m[0].match for m in pattern.finditer('a1 b22 c333', 3)] == ['22', '333']
+    assert list(pattern.finditer('abc')) == []
+
+
+def test_bytes():
+    pattern = compile(rb'(?<key>[a-z]+)=([0-9]+)')
+    test_bytes = b'\xff\x00 key=12'
+    matches = pattern.search(test_bytes)
+    assert matches[0].match == b'key=12' and matches[0].start_idx == 3
+    assert matches[2].match == b'key'
+
+    view = memoryview(test_bytes)
+    matches = pattern.search(view)
+    assert type(matches[0].match) is memoryview and matches[0].match == b'key=12'
+    assert pattern.is_match(bytearray(test_bytes)) == True
+    assert compile(rb'a.c').search(b'a\nc') is None
+    assert compile(rb'ab', 1).search(b'xAB')[0].match == b'ab'
+
+    with pytest.raises(Exception):
+        pattern.search('key=12')
+    with pytest.raises(Exception):
+        compile(r'a').search(b'a')
+
+
+def test_bytes_like_scaling():
+    # a bytes-like test string is scanned once, not once per match
+    test_bytes = b'ab ' * 5000
+    for string in (bytearray(test_bytes), memoryview(test_bytes)):
+        reng = RegexEngine(cache=PatternCache())
+        matcher = reng.cache.get(rb'[a-z]+').bit_parallel
+        match_starts = matcher.match_starts
+        calls = []
+        matcher.match_starts = lambda string: calls.append(string) or match_starts(string)
+        res, _, matches = reng.match(rb'[a-z]+', string, True, True, engine=PIKEVM)
+        assert res == True and len(matches) == 5000
+        assert len(list(reng.finditer(rb'[a-z]+', string, engine=PIKEVM))) == 5000
+        assert len(calls) == 2
@@ -0,0 +1,108 @@
+import pytest
+from ..pyregexp.engine import RegexEngine, BACKTRACKING, PIKEVM
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.program import Compiler
+from ..pyregexp.pikevm import PikeVM
+from ..pyregexp.pattern import compile
+
+
+def vm(re: str) -> PikeVM:
+    return PikeVM(Compiler().compile(Pyrser().parse(re)))
+
+
+@pytest.fixture
+def reng() -> RegexEngine:
+    return RegexEngine(engine=PIKEVM)
+
+
+def test_search():
+    res, end_idx, matches = vm('b+').search('abbc')
+    assert res == True
+    assert end_idx == 3
+    assert matches[0].start_idx == 1 and matches[0].end_idx == 3
+
+
+def test_search_from_index():
+    res, end_idx, matches = vm('a').search('aba', 1)
+    assert res == True
+    assert matches[0].start_idx == 2 and end_idx == 3
+
+
+def test_anchored_search():
+    res, _, _ = vm('b').search('ab', anchored=True)
+    assert res == False
+    res, _, _ = vm('b').search('ab', 1, anchored=True)
+    assert res == True
+
+
+def test_leftmost_longest():
+    res, end_idx, matches = vm('a|ab|abc').search('xabcd')
+    assert res == True
+    assert matches[0].start_idx == 1 and end_idx == 4
+
+    # the leftmost match wins over a longer one starting later
+    res, end_idx, matches = vm('a|bcd').search('abcd')
+    assert res == True
+    assert matches[0].match == 'a'
+
+
+def test_empty_match_at_end():
+    res, end_idx, _ = vm('b*$').search('aa')
+    assert res == True
+    assert end_idx == 2
+
+
+def test_no_match():
+    res, end_idx, matches = vm('ab').search('aab', 2)
+    assert res == False
+    assert len(matches) == 0
+
+
+def test_groups_last_iteration(reng: RegexEngine):
+    res, _, matches = reng.match(r'(a|b)+', 'abab', return_matches=True)
+    assert res == True
+    assert matches[0][0].match == 'abab'
+    assert matches[0][1].start_idx == 3 and matches[0][1].match == 'b'
+
+
+def test_groups_order(reng: RegexEngine):
+    res, _, matches = reng.match(
+        r'(?<first>n)[a-z]+(?<last>l)', 'nostril', True, True)
+    assert res == True
+    assert [m.match for m in matches[0]] == ['nostril', 'l', 'n']
+    assert [m.name for m in matches[0]][1:] == ['last', 'first']
+
+
+def test_groups_order_alternatives(reng: RegexEngine):
+    # the groups of a later alternative come after the whole match
+    for re, string in [(r'ab|c(d)', 'cd'), (r'x(y|z(w))v|u', 'xzwv')]:
+        expected = [(m.group_id, m.match) for m in RegexEngine().match(re, string, True)[2][0]]
+        assert expected[0][0] == 0
+        assert [(m.group_id, m.match) for m in reng.match(re, string, True)[2][0]] == expected
+        assert [(m.group_id, m.match) for m in compile(re).search(string)] == expected
+
+
+def test_catastrophic_regex(reng: RegexEngine):
+    test_str = 'a' * 40 + 'c'
+    res, _ = reng.match(r'(a|aa)*b', test_str)
+    assert res == False
+    res, _ = reng.match(r'(a*)*b', test_str)
+    assert res == False
+
+
+def test_engine_per_call():
+    reng = RegexEngine()
+    assert reng.match(r'(a+)+b', 'aab', engine=PIKEVM) == \
+        reng.match(r'(a+)+b', 'aab', engine=BACKTRACKING)
+
+
+def test_unknown_engine():
+    with pytest.raises(Exception):
+        RegexEngine(engine='unknown')
+    with pytest.raises(Exception):
+        RegexEngine().match('a', 'a', engine='unknown')
+
+
+def test_empty_group_at_end():
+    res, end_idx, _ = vm('()$').search('ab')
+    assert res == True and end_idx == 2
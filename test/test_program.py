@@ -0,0 +1,77 @@
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.program import Compiler, Program, CHAR, ANY, SPACE, CLASS, SPLIT, JMP, SAVE, ASSERT_START, ASSERT_END, MATCH, BYTE_SPACES
+
+
+def compile_re(re: str) -> Program:
+    return Compiler().compile(Pyrser().parse(re))
+
+
+def test_simple_program():
+    program = compile_re('ab')
+    ops = [inst.op for inst in program.instructions]
+    assert ops == [SAVE, CHAR, CHAR, SAVE, MATCH]
+    assert program.instructions[1].arg == 'a'
+    assert program.instructions[2].arg == 'b'
+    assert program.n_slots == 2
+
+
+def test_leaf_opcodes():
+    program = compile_re(r'^.\s[a-c]$')
+    ops = [inst.op for inst in program.instructions]
+    assert ops == [SAVE, ASSERT_START, ANY, SPACE, CLASS, ASSERT_END, SAVE, MATCH]
+    assert program.instructions[4].arg == (frozenset('abc'), True)
+
+
+def test_star_program():
+    program = compile_re('a*')
+    insts = program.instructions
+    assert insts[1].op == SPLIT and insts[1].x == 2 and insts[1].y == 4
+    assert insts[2].op == CHAR
+    assert insts[3].op == JMP and insts[3].x == 1
+
+
+def test_bounded_quantifier_program():
+    program = compile_re('a{1,3}')
+    ops = [inst.op for inst in program.instructions]
+    assert ops == [SAVE, CHAR, SPLIT, CHAR, SPLIT, CHAR, SAVE, MATCH]
+    assert program.instructions[2].y == 6
+    assert program.instructions[4].y == 6
+
+
+def test_or_program():
+    program = compile_re('a|b')
+    insts = program.instructions
+    assert insts[0].op == SPLIT
+    assert insts[insts[0].x].op == SAVE
+    assert insts[insts[0].y].op == SAVE
+    # both the branches are group 0
+    assert program.n_groups == 1
+
+
+def test_group_order():
+    program = compile_re('(a(b))(?<c>c)')
+    assert program.group_order == [2, 1, 3, 0]
+    assert program.group_names[3] == 'c'
+    assert program.n_slots == 8
+
+
+def test_non_capturing_group_has_no_slots():
+    program = compile_re('(?:a)b')
+    assert program.n_groups == 1
+    assert [inst.op for inst in program.instructions].count(SAVE) == 2
+
+
+def test_set_program():
+    program = Compiler().compile_set([Pyrser().parse('a'), Pyrser().parse('b')])
+    ops = [inst.op for inst in program.instructions]
+    assert ops == [SPLIT, SAVE, CHAR, SAVE, MATCH, SAVE, CHAR, SAVE, MATCH]
+    assert program.instructions[0].x == 1 and program.instructions[0].y == 5
+    assert program.instructions[4].arg == 0
+    assert program.instructions[8].arg == 1
+
+
+def test_byte_level_program():
+    program = Compiler().compile(Pyrser().parse('a[bc].\\s'), byte_level=True)
+    args = [(inst.op, inst.arg) for inst in program.instructions if inst.op not in (SAVE, MATCH)]
+    assert args == [(CHAR, ord('a')), (CLASS, (frozenset(b'bc'), True)),
+                    (CLASS, (frozenset(b'\n'), False)), (CLASS, (BYTE_SPACES, True))]
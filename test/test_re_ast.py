@@ -1,4 +1,5 @@
 from ..pyregexp.re_ast import ASTNode, RE, LeafNode, Element, WildcardElement, SpaceElement, RangeElement, StartElement, EndElement, OrNode, NotNode, GroupNode
+from ..pyregexp.charclass import CharClass
 
 
 def test_ASTNode():
@@ -68,3 +69,23 @@ def test_RangeElement_negative_logic():
 
     assert nre.is_match("a") == False
     assert nre.is_match("x") == True
+
+
+def test_RangeElement_match_str():
+    re = RangeElement(match_str="abc")
+    assert re.is_match("b") == True
+    re = RangeElement(match_str=CharClass(((ord("a"), ord("c")),)), is_positive_logic=False)
+    assert re.is_match("b") == False
+    assert re.is_match("x") == True
+
+
+def test_scan():
+    string = 'aab c\nx'
+    assert Element('a').scan(string, 0, len(string)) == 2
+    assert Element('a').scan(string, 0, 1) == 1
+    assert WildcardElement().scan(string, 1, len(string)) == 5
+    assert WildcardElement().scan(string, 1, 3) == 3
+    assert SpaceElement().scan(string, 3, len(string)) == 4
+    assert RangeElement("ab", True).scan(string, 0, len(string)) == 3
+    assert RangeElement("ab", False).scan(string, 3, len(string)) == 7
+    assert LeafNode().scan(string, 0, len(string)) == 0
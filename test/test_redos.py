@@ -0,0 +1,72 @@
+import pytest
+from ..pyregexp.pyrser import Pyrser
+from ..pyregexp.engine import RegexEngine, PIKEVM
+from ..pyregexp.redos import redos_risks, REFUSE, ROUTE, UnsafePatternError, high_risks, NESTED_QUANTIFIERS, AMBIGUOUS_ALTERNATION, OVERLAPPING_QUANTIFIERS, HIGH, MEDIUM
+
+
+def risks_of(re: str):
+    return [(risk.kind, risk.severity) for risk in redos_risks(Pyrser().parse(re))]
+
+
+def test_nested_quantifiers():
+    for re in [r'(a+)+', r'(.*)*', r'(a*b?)*c', r'((ab)*)*', r'(\s*a+)*', r'(a|b+)*',
+               # the rest of the body can match the characters of the inner
+               # quantifier
+               r'([a-z]+.)+', r'(a+[ab])*',
+               # a wide range quantifier splits a run as an unbounded one
+               r'(a{1,10})*b', r'(a{2,3}b?)+']:
+        assert risks_of(re) == [(NESTED_QUANTIFIERS, HIGH)], re
+    assert risks_of(r'(x+x+)+y') == [
+        (NESTED_QUANTIFIERS, HIGH), (OVERLAPPING_QUANTIFIERS, MEDIUM)]
+    # the b delimits the iterations
+    assert risks_of(r'(a+ab)+') == [(NESTED_QUANTIFIERS, MEDIUM)]
+
+
+def test_ambiguous_alternation():
+    assert risks_of(r'(a|a)*') == [(AMBIGUOUS_ALTERNATION, HIGH)]
+    assert risks_of(r'(a|aa)*b') == [(AMBIGUOUS_ALTERNATION, HIGH)]
+    assert risks_of(r'(a|b|[a-c])+') == [(AMBIGUOUS_ALTERNATION, HIGH)]
+    assert risks_of(r'(ab|ac)*') == [(AMBIGUOUS_ALTERNATION, MEDIUM)]
+
+
+def test_overlapping_quantifiers():
+    assert risks_of(r'a*a*') == [(OVERLAPPING_QUANTIFIERS, MEDIUM)]
+    assert risks_of(r'x\s*.*') == [(OVERLAPPING_QUANTIFIERS, MEDIUM)]
+    # the end of an iteration and the start of the next one
+    assert risks_of(r'(\s*,\s*)*x') == [(OVERLAPPING_QUANTIFIERS, MEDIUM)]
+    assert risks_of(r'(a*,b?a*)+') == [(OVERLAPPING_QUANTIFIERS, MEDIUM)]
+    assert risks_of(r'(\s*,[a-z]+)*x') == []
+
+
+def test_safe():
+    for re in [r'(a|b)*', r'(a+b)+', r'([a-z]+,)+', r'x.*y.*z', r'a+b+', r'[^x]*y', r'(ab)*', r'(a|aa)', r'a{2,5}',
+               r'(a{2})*', r'(a?)*', r'(ab{1,2})*']:
+        assert risks_of(re) == [], re
+
+
+def test_high_risks():
+    risks = redos_risks(Pyrser().parse(r'a*a*(a|aa)*'))
+    assert [risk.severity for risk in risks] == [HIGH, MEDIUM]
+    assert high_risks(risks) == risks[:1]
+    assert risks[0].group_id == 1
+
+
+def test_redos_policy():
+    regex = r'(a|aa)*b'
+    test_str = 'a' * 20 + 'c'
+    with pytest.raises(UnsafePatternError) as e:
+        RegexEngine(redos=REFUSE).match(regex, test_str)
+    assert e.value.risks[0].group_id == 1
+    with pytest.raises(UnsafePatternError):
+        list(RegexEngine().finditer(regex, test_str, redos=REFUSE))
+
+    # routed to the Pike VM, the step budget is never exceeded
+    reng = RegexEngine(redos=ROUTE, max_steps=100)
+    assert reng.match(regex, test_str) == (False, 0)
+    assert reng.match(regex, 'aaab') == (True, 4)
+
+    # the safe regexes, and the linear engines, are not affected
+    assert RegexEngine(redos=REFUSE).match(r'(a|b)*c', 'abc') == (True, 3)
+    assert RegexEngine(redos=REFUSE, engine=PIKEVM).match(regex, 'aab') == (True, 3)
+    with pytest.raises(Exception):
+        RegexEngine(redos='ignore')
@@ -0,0 +1,42 @@
+from ..pyregexp.regexset import RegexSet
+
+
+def test_matches():
+    rules = RegexSet([r'^GET ', r'HTTP/1\.[01]$', r'[0-9]+ms', r'POST'])
+    assert len(rules) == 4
+    assert rules.matches('GET /index.html HTTP/1.1') == [0, 1]
+    assert rules.matches('took 12ms') == [2]
+    assert rules.matches('PUT /x HTTP/2') == []
+
+
+def test_is_match():
+    rules = RegexSet([r'a+b', r'^c'])
+    assert rules.is_match('xaab') == True
+    assert rules.is_match('xc') == False
+    assert rules.is_match('c') == True
+
+
+def test_anchors_and_empty_matches():
+    rules = RegexSet([r'a$', r'()', r'^$'])
+    assert rules.matches('ba') == [0, 1]
+    assert rules.matches('') == [1, 2]
+
+
+def test_ignore_case():
+    rules = RegexSet([r'ERROR', r'warn'], ignore_case=1)
+    assert rules.matches('Error: WARNING') == [0, 1]
+
+
+def test_empty_set():
+    rules = RegexSet([])
+    assert rules.matches('abc') == []
+    assert rules.is_match('abc') == False
+    assert rules.cache_info() is None
+
+
+def test_bounded_cache():
+    rules = RegexSet([r'(a|b)*a(a|b)(a|b)(a|b)', r'bbbb'], max_states=4)
+    assert rules.matches('abbbabababbbbbaaab') == [0, 1]
+    info = rules.cache_info()
+    assert info.flushes > 0
+    assert info.size <= info.max_size
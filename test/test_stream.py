@@ -0,0 +1,144 @@
+import io
+from ..pyregexp.engine import RegexEngine
+from ..pyregexp.pattern import compile
+from ..pyregexp.stream import StreamMatcher, finditer_file, search_file
+
+
+def spans(all_matches):
+    return [[(m.group_id, m.start_idx, m.end_idx, m.match) for m in matches] for matches in all_matches]
+
+
+def test_same_as_finditer():
+    cases = [
+        (r'[a-z]+([0-9]+)', 'ab12 c3 dd 45e6'),
+        (r'(ab|a)*c', 'xaababc aacab'),
+        (r'^a+|b$', 'aaab aab'),
+        (r'a.*b', 'a b\na  b'),
+    ]
+    for regex, test_str in cases:
+        pattern = compile(regex)
+        expected = spans(pattern.finditer(test_str))
+        for size in (1, 2, 3, len(test_str)):
+            chunks = [test_str[i:i + size] for i in range(0, len(test_str), size)]
+            assert spans(StreamMatcher(pattern).finditer(chunks)) == expected
+
+
+def test_feed():
+    matcher = StreamMatcher(compile(r'err[0-9]+'))
+    assert matcher.feed('xx er') == []
+    assert matcher.feed('r12') == []
+    # the match may still grow
+    matches = matcher.feed('3 err')
+    assert len(matches) == 1
+    assert (matches[0][0].start_idx, matches[0][0].match) == (3, 'err123')
+    matches = matcher.close()
+    assert matches == []
+
+
+def test_buffer_is_trimmed():
+    matcher = StreamMatcher(compile(r'a+b'))
+    for _ in range(100):
+        matcher.feed('x' * 100)
+        assert len(matcher.buffer) <= 1
+    matcher.feed('aaa')
+    assert len(matcher.buffer) == 4
+    matches = matcher.feed('bx')
+    assert (matches[0][0].start_idx, matches[0][0].end_idx) == (10000, 10004)
+
+
+def test_long_match_linear():
+    # the threads alive at the end of a chunk are resumed, not run again
+    # from their start on the whole buffer
+    test_str = 'x' + 'a' * 400000 + 'y$'
+    chunks = [test_str[i:i + 16384] for i in range(0, len(test_str), 16384)]
+    pattern = compile(r'x(a)[^y]*y')
+    scan = pattern.vm.scan
+    stepped = []
+
+    def counting_scan(string, start_idx=0, anchored=False, final=True, state=None):
+        stepped.append(len(string) - (state.str_i if state is not None else start_idx))
+        return scan(string, start_idx, anchored, final, state)
+
+    pattern.vm.scan = counting_scan
+    matches = list(StreamMatcher(pattern).finditer(chunks))
+    # every character is stepped once, not once per chunk
+    assert len(stepped) > 1 and sum(stepped) <= len(test_str) + len(stepped)
+    assert [(m.group_id, m.start_idx, m.end_idx) for m in matches[0]] == [
+        (0, 0, 400002), (1, 1, 2)]
+    # the pending $ and the best match found so far are resumed too
+    pattern = compile(r'(ab|a)(b*)$|a')
+    test_str = 'xa' + 'b' * 50
+    for size in (1, 3, 7):
+        chunks = [test_str[i:i + size] for i in range(0, len(test_str), size)]
+        assert spans(StreamMatcher(pattern).finditer(chunks)) == spans(pattern.finditer(test_str))
+
+
+def test_file_objects():
+    text = 'ßerr1 é err22'
+    expected = [(1, 'err1'), (8, 'err22')]
+    for source in (io.StringIO(text), io.BytesIO(text.encode())):
+        matches = StreamMatcher(compile(r'err[0-9]+')).finditer(source, chunk_size=3)
+        assert [(m[0].start_idx, m[0].match) for m in matches] == expected
+
+
+def test_engine():
+    reng = RegexEngine()
+    matches = list(reng.finditer_stream(r'(a)b', ['xa', 'bxab']))
+    assert [(m[0].start_idx, m[1].start_idx) for m in matches] == [(1, 1), (4, 4)]
+
+
+def test_files(tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_text('ok\nerror: 12 é\nerror: 345\n', encoding='utf-8')
+    pattern = compile(r'error: ([0-9]+)')
+    matches = list(finditer_file(path, pattern, chunk_size=4))
+    assert [(m[0].start_idx, m[1].match) for m in matches] == [(3, '12'), (15, '345')]
+    assert search_file(str(path), pattern)[1].match == '12'
+    assert search_file(path, compile(r'warning')) is None
+
+    empty = tmp_path / 'empty.txt'
+    empty.write_text('')
+    assert search_file(empty, pattern) is None
+    assert search_file(empty, compile(r'a*'))[0].match == ''
+
+
+def test_bytes_pattern(tmp_path):
+    path = tmp_path / 'log.bin'
+    path.write_bytes('é err1 err22'.encode())
+    matches = list(finditer_file(path, compile(rb'err[0-9]+'), chunk_size=2))
+    # the offsets are in bytes
+    assert [(m[0].start_idx, m[0].match) for m in matches] == [(3, b'err1'), (8, b'err22')]
+    assert all(type(m[0].match) is bytes for m in matches)
+    # the mapping is closed while the matched spans are still referenced
+    assert search_file(path, compile(rb'(err)[0-9]+'))[1].match == b'err'
+
+    scanned = []
+    pattern = compile(rb'err[0-9]+')
+    finditer = pattern.finditer
+
+    def recording_finditer(string, pos=0):
+        scanned.append(type(string))
+        return finditer(string, pos)
+
+    pattern.finditer = recording_finditer
+    assert len(list(finditer_file(path, pattern))) == 2
+    # the mapping is scanned in place, not copied into bytes chunks
+    assert scanned == [memoryview]
+
+
+def test_bytes_pattern_ignore_case(tmp_path):
+    path = tmp_path / 'log.bin'
+    path.write_bytes(b'x ERR1 err22 Err3')
+    pattern = compile(rb'err[0-9]+', ignore_case=1)
+    scanned = []
+    normalize = pattern.normalize
+
+    def recording_normalize(string):
+        scanned.append(len(string))
+        return normalize(string)
+
+    pattern.normalize = recording_normalize
+    matches = list(finditer_file(path, pattern, chunk_size=4))
+    assert [(m[0].start_idx, m[0].match) for m in matches] == [(2, b'err1'), (7, b'err22'), (13, b'err3')]
+    # the case is folded a chunk at a time, never on the whole mapping
+    assert scanned and max(scanned) <= 4